@@ -0,0 +1,218 @@
+import logging
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Tuple
+
+from async_storage import run_in_storage_pool
+from json_codec import dumps
+from metrics import ADMISSION_REJECTED
+
+if TYPE_CHECKING:
+    import sqlite3
+
+logger = logging.getLogger(__name__)
+
+# Off by default: without RATE_LIMIT_TRUST_PROXY every client behind a proxy or
+# ingress shares the proxy's address, and with it one bucket
+RATE_LIMIT_ENABLED = os.environ.get("RATE_LIMIT_ENABLED", "false").lower() in ("1", "true", "yes")
+# Sustained requests per minute one client may make, per endpoint group
+RATE_LIMIT_ORDERS_PER_MINUTE = float(os.environ.get("RATE_LIMIT_ORDERS_PER_MINUTE", "30"))
+RATE_LIMIT_CONTACT_PER_MINUTE = float(os.environ.get("RATE_LIMIT_CONTACT_PER_MINUTE", "5"))
+# Requests one client may make back to back before the per-minute rate applies
+RATE_LIMIT_BURST = float(os.environ.get("RATE_LIMIT_BURST", "10"))
+# Write requests per second accepted from all clients together
+RATE_LIMIT_GLOBAL_PER_SECOND = float(os.environ.get("RATE_LIMIT_GLOBAL_PER_SECOND", "200"))
+# "memory" keeps buckets per worker process; "sqlite" shares them between workers
+RATE_LIMIT_STORE = os.environ.get("RATE_LIMIT_STORE", "memory")
+# Take the client address from X-Forwarded-For, when running behind a trusted proxy
+RATE_LIMIT_TRUST_PROXY = os.environ.get("RATE_LIMIT_TRUST_PROXY", "false").lower() in ("1", "true", "yes")
+# Write requests in progress in this process beyond which new ones are turned away with a 503;
+# contact messages are shed at a quarter of that so they never crowd out orders
+MAX_PENDING_WRITES = int(os.environ.get("MAX_PENDING_WRITES", "64"))
+CONTACT_SHED_FRACTION = 0.25
+# Buckets remembered by the in-memory store; forgetting one only refills it early
+MAX_TRACKED_CLIENTS = 10000
+
+# (method, path) -> endpoint group
+WRITE_ENDPOINTS = {
+    ("POST", "/api/orders"): "orders",
+    ("POST", "/api/orders/batch"): "orders",
+    ("POST", "/api/contact"): "contact",
+}
+
+# Limit: (bucket key, tokens per second, bucket size)
+Limit = Tuple[str, float, float]
+
+def _refill(tokens: float, updated: float, rate: float, burst: float, now: float) -> float:
+    return min(burst, tokens + max(now - updated, 0.0) * rate)
+
+def _wait(levels: List[float], limits: List[Limit]) -> float:
+    """Seconds until every bucket holds a token, or 0 if they all do now"""
+    return max(((1.0 - level) / rate for level, (_, rate, _) in zip(levels, limits) if level < 1.0), default=0.0)
+
+class MemoryBuckets:
+    """Token buckets held in this process"""
+
+    # take() only touches memory, so it is called on the event loop
+    blocking = False
+
+    def __init__(self, max_keys: int = MAX_TRACKED_CLIENTS):
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        # key -> (tokens, last refill time)
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    def take(self, limits: List[Limit]) -> float:
+        """Take a token from each bucket if all of them have one, else return the seconds to wait"""
+        now = time.monotonic()
+        with self._lock:
+            levels = []
+            for key, rate, burst in limits:
+                tokens, updated = self._buckets.get(key, (burst, now))
+                levels.append(_refill(tokens, updated, rate, burst, now))
+            wait = _wait(levels, limits)
+            for (key, _, _), level in zip(limits, levels):
+                self._buckets[key] = (level - 1.0 if not wait else level, now)
+                self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return wait
+
+class SQLiteBuckets:
+    """Token buckets in a SQLite database shared by every worker process
+
+    Each check is one short write transaction, run in the storage thread
+    pool as it may wait on another worker's lock. Bucket state is
+    disposable, so the database is not synced and a failure to reach it
+    lets the request through rather than rejecting it. sqlite3 is only
+    imported when this store is selected.
+    """
+
+    blocking = True
+
+    def __init__(self, db_path: str):
+        import sqlite3
+        self._sqlite3 = sqlite3
+        self.db_path = db_path
+        self._local = threading.local()
+        self._checks = 0
+        self._connection().execute(
+            "CREATE TABLE IF NOT EXISTS buckets (key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+        )
+
+    def _connection(self) -> "sqlite3.Connection":
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._sqlite3.connect(self.db_path, timeout=0.5, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")
+            self._local.conn = conn
+        return conn
+
+    def take(self, limits: List[Limit]) -> float:
+        """Take a token from each bucket if all of them have one, else return the seconds to wait"""
+        # Wall clock time, as the buckets are shared between processes
+        now = time.time()
+        conn = self._connection()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            levels = []
+            for key, rate, burst in limits:
+                row = conn.execute("SELECT tokens, updated FROM buckets WHERE key = ?", (key,)).fetchone()
+                tokens, updated = row if row else (burst, now)
+                levels.append(_refill(tokens, updated, rate, burst, now))
+            wait = _wait(levels, limits)
+            conn.executemany(
+                "INSERT OR REPLACE INTO buckets (key, tokens, updated) VALUES (?, ?, ?)",
+                [(key, level - 1.0 if not wait else level, now) for (key, _, _), level in zip(limits, levels)],
+            )
+            self._checks += 1
+            if self._checks % 1000 == 0:
+                # Buckets untouched for an hour are full again; forget them
+                conn.execute("DELETE FROM buckets WHERE updated < ?", (now - 3600,))
+            conn.execute("COMMIT")
+            return wait
+        except self._sqlite3.Error as e:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            logger.warning(f"Error checking rate limits: {e}")
+            return 0.0
+
+def create_buckets(store: str, db_path: str):
+    """Create the bucket store selected by RATE_LIMIT_STORE ("memory" or "sqlite")"""
+    if store == "memory":
+        return MemoryBuckets()
+    if store == "sqlite":
+        return SQLiteBuckets(db_path)
+    raise ValueError(f"Unknown rate limit store '{store}'")
+
+class AdmissionMiddleware:
+    """ASGI middleware guarding the write endpoints with rate limits and load shedding
+
+    Each write request takes a token from its client's bucket for the
+    endpoint group and from one global bucket, or is answered with a 429
+    and Retry-After. While MAX_PENDING_WRITES write requests are already in
+    progress, new ones get a 503 instead of joining the queue, so accepted
+    orders keep a bounded latency. Everything else passes straight through.
+    """
+
+    def __init__(self, app: Callable, buckets=None, endpoints: Optional[Dict[Tuple[str, str], str]] = None):
+        self.app = app
+        self.buckets = buckets if buckets is not None else MemoryBuckets()
+        self.endpoints = endpoints if endpoints is not None else WRITE_ENDPOINTS
+        self.per_minute = {"orders": RATE_LIMIT_ORDERS_PER_MINUTE, "contact": RATE_LIMIT_CONTACT_PER_MINUTE}
+        self.shed_at = {"orders": MAX_PENDING_WRITES,
+                        "contact": max(1, int(MAX_PENDING_WRITES * CONTACT_SHED_FRACTION))}
+        self.in_flight = 0
+
+    def _client(self, scope) -> str:
+        if RATE_LIMIT_TRUST_PROXY:
+            for name, value in scope.get("headers", ()):
+                if name == b"x-forwarded-for":
+                    return value.decode("latin-1").split(",")[0].strip()
+        client = scope.get("client")
+        return client[0] if client else "unknown"
+
+    async def _take(self, limits: List[Limit]) -> float:
+        if self.buckets.blocking:
+            return await run_in_storage_pool(self.buckets.take, limits)
+        return self.buckets.take(limits)
+
+    async def _reject(self, send, status: int, retry_after: float, detail: str):
+        body = dumps({"detail": detail})
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode()),
+                        (b"retry-after", str(max(1, math.ceil(retry_after))).encode())],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+    async def __call__(self, scope, receive, send):
+        group = self.endpoints.get((scope.get("method"), scope.get("path"))) if scope["type"] == "http" else None
+        if group is None:
+            await self.app(scope, receive, send)
+            return
+        if self.in_flight >= self.shed_at[group]:
+            ADMISSION_REJECTED.inc(scope["path"], "overloaded")
+            await self._reject(send, 503, 1, "Server is busy, please retry shortly")
+            return
+        per_minute, limits = self.per_minute[group], []
+        # A limit of 0 turns that bucket off
+        if per_minute > 0:
+            limits.append((f"{group}:{self._client(scope)}", per_minute / 60, max(RATE_LIMIT_BURST, 1.0)))
+        if RATE_LIMIT_GLOBAL_PER_SECOND > 0:
+            limits.append(("global", RATE_LIMIT_GLOBAL_PER_SECOND, max(RATE_LIMIT_GLOBAL_PER_SECOND, 1.0)))
+        wait = await self._take(limits) if limits else 0.0
+        if wait:
+            ADMISSION_REJECTED.inc(scope["path"], "rate_limited")
+            await self._reject(send, 429, wait, "Too many requests, please retry later")
+            return
+        self.in_flight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.in_flight -= 1
@@ -0,0 +1,238 @@
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Seconds between rebuilds of the aggregates from order history on storage
+# backends without a change feed, which pick up orders created by other worker processes
+ANALYTICS_REBUILD_INTERVAL = float(os.environ.get("ANALYTICS_REBUILD_INTERVAL", "300"))
+
+def _cents(amount: Any) -> int:
+    return int(round(float(amount or 0) * 100))
+
+class Bucket:
+    """Order counts and revenue (in cents) for one hour or one day"""
+
+    __slots__ = ("orders", "revenue", "order_types", "items")
+
+    def __init__(self):
+        self.orders = 0
+        self.revenue = 0
+        # order_type -> [orders, revenue]
+        self.order_types: Dict[str, List[int]] = {}
+        # item id -> [quantity, revenue]
+        self.items: Dict[Any, List[int]] = {}
+
+    def add(self, orders: int, revenue: int, order_type: str):
+        self.orders += orders
+        self.revenue += revenue
+        counts = self.order_types.setdefault(order_type, [0, 0])
+        counts[0] += orders
+        counts[1] += revenue
+
+    def add_item(self, item_id: Any, quantity: int, revenue: int):
+        counts = self.items.setdefault(item_id, [0, 0])
+        counts[0] += quantity
+        counts[1] += revenue
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "orders": self.orders,
+            "revenue": self.revenue / 100,
+            "average_order_value": round(self.revenue / self.orders / 100, 2) if self.orders else 0,
+            "order_types": {
+                order_type: {"orders": orders, "revenue": revenue / 100}
+                for order_type, (orders, revenue) in sorted(self.order_types.items())
+            },
+        }
+
+class OrderAnalytics:
+    """Revenue, order counts, pickup/delivery split and item popularity per hour and per day
+
+    Buckets are keyed by the UTC hour ("2025-07-30T23") or day ("2025-07-30")
+    of created_at. Each new order updates its two buckets in place, so reads
+    are dictionary lookups. rebuild() recomputes everything from the order
+    history with a vectorized pandas group-by (pandas is only imported then):
+    once on first use, and later only in the background while reads keep
+    using the previous buckets. With a storage change feed new orders are
+    counted from the feed and no periodic rebuild is needed; otherwise the
+    aggregates are rebuilt every ANALYTICS_REBUILD_INTERVAL seconds.
+    Revenue is the order total.
+    """
+
+    def __init__(self, rebuild_interval: float = ANALYTICS_REBUILD_INTERVAL):
+        self.rebuild_interval = rebuild_interval
+        self._lock = threading.Lock()
+        self.hours: Dict[str, Bucket] = {}
+        self.days: Dict[str, Bucket] = {}
+        self.item_names: Dict[Any, str] = {}
+        self._built_at: Optional[float] = None
+        self._sync_lock = threading.Lock()
+        self._rebuilding = False
+        # Change feed position the buckets are current up to, or None without a feed
+        self._position: Any = None
+
+    @property
+    def built(self) -> bool:
+        return self._built_at is not None
+
+    def needs_rebuild(self) -> bool:
+        built_at = self._built_at
+        return built_at is None or time.monotonic() - built_at >= self.rebuild_interval
+
+    def begin_rebuild(self) -> bool:
+        """Claim the next rebuild, or return False if one is already running"""
+        with self._sync_lock:
+            if self._rebuilding:
+                return False
+            self._rebuilding = True
+            return True
+
+    def end_rebuild(self):
+        self._rebuilding = False
+
+    def sync(self, snapshot: Callable[[], Tuple[Iterable[Dict], Any]],
+             changes: Callable[[Any], Optional[Tuple[List[Dict], Any]]]):
+        """Bring the aggregates up to date with the orders in storage
+
+        snapshot() returns every order and the feed position they are
+        current up to (None without a feed); changes(position) returns the
+        order versions stored since, or None once position is no longer
+        valid. Only the first call waits for a full build.
+        """
+        if not self.built:
+            with self._sync_lock:
+                if not self.built:
+                    orders, position = snapshot()
+                    self.rebuild(orders, position)
+            return
+        if self._position is not None:
+            with self._sync_lock:
+                result = changes(self._position) if self._position is not None else None
+                if result is not None:
+                    orders, self._position = result
+                    # A status change appends a new version of an order; only first versions are new
+                    self._count(order for order in orders if "updated_at" not in order)
+                    return
+        elif not self.needs_rebuild():
+            return
+        self.rebuild_in_background(snapshot)
+
+    def rebuild_in_background(self, snapshot: Callable[[], Tuple[Iterable[Dict], Any]]):
+        """Rebuild from snapshot() in a background thread unless a rebuild is already running"""
+        if not self.begin_rebuild():
+            return
+
+        def run():
+            try:
+                orders, position = snapshot()
+                self.rebuild(orders, position)
+            except Exception as e:
+                logger.exception(f"Error rebuilding order analytics: {e}")
+            finally:
+                self.end_rebuild()
+
+        threading.Thread(target=run, name="analytics-rebuild", daemon=True).start()
+
+    def add_orders(self, orders: Iterable[Dict]):
+        """Count orders newly created by this process"""
+        if self._built_at is None or self._position is not None:
+            # Not built yet, so the first build reads these from storage, or
+            # following a change feed, which counts them on the next sync
+            return
+        self._count(orders)
+
+    def _count(self, orders: Iterable[Dict]):
+        with self._lock:
+            for order in orders:
+                created_at = order.get("created_at") or ""
+                total, order_type = _cents(order.get("total")), order.get("order_type", "pickup")
+                buckets = (self.hours.setdefault(created_at[:13], Bucket()),
+                           self.days.setdefault(created_at[:10], Bucket()))
+                for bucket in buckets:
+                    bucket.add(1, total, order_type)
+                for item in order.get("items") or ():
+                    item_id, quantity = item.get("id"), int(item.get("quantity", 0))
+                    self.item_names[item_id] = item.get("name", "")
+                    for bucket in buckets:
+                        bucket.add_item(item_id, quantity, _cents(item.get("price")) * quantity)
+
+    def rebuild(self, orders: Iterable[Dict], position: Any = None):
+        """Recompute every bucket from the order history, current up to the change feed position"""
+        import pandas as pd
+        order_rows: Dict[str, List[Any]] = {"created_at": [], "order_type": [], "revenue": []}
+        item_rows: Dict[str, List[Any]] = {"created_at": [], "item_id": [], "quantity": [], "price": []}
+        item_names: Dict[Any, str] = {}
+        for order in orders:
+            created_at = order.get("created_at") or ""
+            order_rows["created_at"].append(created_at)
+            order_rows["order_type"].append(order.get("order_type", "pickup"))
+            order_rows["revenue"].append(order.get("total") or 0)
+            for item in order.get("items") or ():
+                item_rows["created_at"].append(created_at)
+                item_rows["item_id"].append(item.get("id"))
+                item_rows["quantity"].append(item.get("quantity") or 0)
+                item_rows["price"].append(item.get("price") or 0)
+                item_names[item.get("id")] = item.get("name", "")
+
+        hours: Dict[str, Bucket] = {}
+        days: Dict[str, Bucket] = {}
+        # Explicit dtypes keep the frames usable when there are no rows at all
+        order_rows["created_at"] = pd.Series(order_rows["created_at"], dtype=str)
+        item_rows["created_at"] = pd.Series(item_rows["created_at"], dtype=str)
+        order_frame = pd.DataFrame(order_rows)
+        order_frame["revenue"] = (order_frame["revenue"].astype("float64") * 100).round().astype("int64")
+        item_frame = pd.DataFrame(item_rows)
+        item_frame["quantity"] = item_frame["quantity"].astype("int64")
+        item_frame["revenue"] = (item_frame["price"].astype("float64") * 100).round().astype("int64") * item_frame["quantity"]
+        for buckets, width in ((hours, 13), (days, 10)):
+            order_frame["bucket"] = order_frame["created_at"].str[:width]
+            grouped = order_frame.groupby(["bucket", "order_type"])["revenue"].agg(["count", "sum"])
+            for (key, order_type), row in zip(grouped.index, grouped.itertuples(index=False)):
+                buckets.setdefault(key, Bucket()).add(int(row[0]), int(row[1]), order_type)
+            item_frame["bucket"] = item_frame["created_at"].str[:width]
+            grouped = item_frame.groupby(["bucket", "item_id"])[["quantity", "revenue"]].sum()
+            for (key, item_id), row in zip(grouped.index, grouped.itertuples(index=False)):
+                buckets.setdefault(key, Bucket()).add_item(_plain(item_id), int(row[0]), int(row[1]))
+
+        with self._lock:
+            self.hours, self.days = hours, days
+            self.item_names = item_names
+            self._built_at = time.monotonic()
+            self._position = position
+
+    def day(self, day: str) -> Dict[str, Any]:
+        """Totals for one day ("YYYY-MM-DD")"""
+        with self._lock:
+            bucket = self.days.get(day) or Bucket()
+            return dict(day=day, **bucket.to_dict())
+
+    def daily(self, days: int, until: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Totals for each of the last days days up to and including until (default today)"""
+        end = datetime.strptime(until, "%Y-%m-%d") if until else datetime.utcnow()
+        return [self.day((end - timedelta(days=offset)).strftime("%Y-%m-%d")) for offset in range(days - 1, -1, -1)]
+
+    def hourly(self, day: str) -> List[Dict[str, Any]]:
+        """Totals for each hour of one day"""
+        with self._lock:
+            hours = self.hours
+            return [dict(hour=f"{day}T{hour:02d}", **(hours.get(f"{day}T{hour:02d}") or Bucket()).to_dict())
+                    for hour in range(24)]
+
+    def top_items(self, day: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Best selling items of one day by quantity"""
+        with self._lock:
+            bucket = self.days.get(day) or Bucket()
+            ranked = sorted(bucket.items.items(), key=lambda entry: (-entry[1][0], -entry[1][1]))[:limit]
+        return [{"id": item_id, "name": self.item_names.get(item_id, ""), "quantity": quantity,
+                 "revenue": revenue / 100} for item_id, (quantity, revenue) in ranked]
+
+def _plain(value: Any) -> Any:
+    """Turn numpy scalars from a group-by key back into Python values"""
+    return value.item() if hasattr(value, "item") else value
+
+order_analytics = OrderAnalytics()
@@ -0,0 +1,140 @@
+import gzip
+import os
+import re
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from file_lock import atomic_write, file_lock
+from json_codec import dumps_lines, loads
+from metrics import STORAGE_BYTES_READ, STORAGE_BYTES_WRITTEN
+
+SEGMENT_SUFFIX = ".jsonl.gz"
+# Decoded segments kept in memory for repeated lookups and page reads
+SEGMENT_CACHE_SIZE = 8
+CURSOR_PATTERN = re.compile(r"^(\d{4}-\d{2}-\d{2}):(\d+)$")
+
+class Archive:
+    """Compressed, date-partitioned segments for records moved out of a live log
+
+    Each UTC day of created_at gets one gzip-compressed JSON Lines segment,
+    "<YYYY-MM-DD>.jsonl.gz", which is rewritten atomically when records are
+    added to it. "ids.tsv" maps record keys to the day they are filed under,
+    so a record can be found by key without opening every segment.
+    """
+
+    def __init__(self, directory: Path, key: str = "id"):
+        self.directory = Path(directory)
+        self.key = key
+        self.ids_path = self.directory / "ids.tsv"
+        self._lock = threading.Lock()
+        self._ids: Dict[str, str] = {}
+        self._ids_read = 0
+        self._segments: "OrderedDict[str, Tuple[int, List[Dict]]]" = OrderedDict()
+
+    def _segment_path(self, day: str) -> Path:
+        return self.directory / f"{day}{SEGMENT_SUFFIX}"
+
+    def days(self, created_from: Optional[str] = None, created_to: Optional[str] = None) -> List[str]:
+        """Days that have a segment, oldest first, optionally limited to a created_at range"""
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        days = sorted(name[:-len(SEGMENT_SUFFIX)] for name in names if name.endswith(SEGMENT_SUFFIX))
+        return [day for day in days
+                if (not created_from or day >= created_from[:10]) and (not created_to or day <= created_to[:10])]
+
+    def read_segment(self, day: str) -> List[Dict]:
+        """Decode one day's segment, or return [] if there is none"""
+        path = self._segment_path(day)
+        try:
+            mtime = path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return []
+        with self._lock:
+            cached = self._segments.get(day)
+            if cached is not None and cached[0] == mtime:
+                self._segments.move_to_end(day)
+                return cached[1]
+        with open(path, 'rb') as f:
+            compressed = f.read()
+        STORAGE_BYTES_READ.inc(path.name, amount=len(compressed))
+        records = [loads(line) for line in gzip.decompress(compressed).splitlines() if line.strip()]
+        with self._lock:
+            self._segments[day] = (mtime, records)
+            self._segments.move_to_end(day)
+            while len(self._segments) > SEGMENT_CACHE_SIZE:
+                self._segments.popitem(last=False)
+        return records
+
+    def add(self, records: List[Dict]):
+        """File records under the day of their created_at, replacing earlier copies with the same key
+
+        Re-adding records that are already archived is harmless, so an
+        interrupted compaction can simply be run again.
+        """
+        by_day: Dict[str, List[Dict]] = {}
+        for record in records:
+            by_day.setdefault((record.get("created_at") or "")[:10] or "undated", []).append(record)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with file_lock(self.ids_path):
+            for day, new_records in sorted(by_day.items()):
+                merged = {str(record.get(self.key)): record for record in self.read_segment(day)}
+                merged.update((str(record.get(self.key)), record) for record in new_records)
+                payload = gzip.compress(dumps_lines(merged.values()))
+                path = self._segment_path(day)
+                atomic_write(path, payload)
+                STORAGE_BYTES_WRITTEN.inc(path.name, amount=len(payload))
+            with open(self.ids_path, 'a', encoding='utf-8') as f:
+                f.write("".join(f"{record.get(self.key)}\t{day}\n"
+                                for day, new_records in by_day.items() for record in new_records))
+                f.flush()
+                os.fsync(f.fileno())
+
+    def _load_ids(self):
+        """Read key -> day entries appended to ids.tsv since the last call, by any process"""
+        with self._lock:
+            try:
+                with open(self.ids_path, 'rb') as f:
+                    f.seek(self._ids_read)
+                    data = f.read()
+            except FileNotFoundError:
+                return
+            complete = data.rfind(b"\n") + 1
+            for line in data[:complete].decode('utf-8').splitlines():
+                key, _, day = line.rpartition("\t")
+                self._ids[key] = day
+            self._ids_read += complete
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Find an archived record by key"""
+        self._load_ids()
+        day = self._ids.get(key)
+        if day is None:
+            return None
+        for record in self.read_segment(day):
+            if str(record.get(self.key)) == key:
+                return record
+        return None
+
+    def scan(self, created_from: Optional[str] = None, created_to: Optional[str] = None,
+             cursor: Optional[str] = None) -> Iterator[Tuple[str, Dict]]:
+        """Iterate over archived records in day order, yielding (cursor, record)
+
+        Only segments for days within the created_at range are read; the
+        cursor ("<day>:<position>") can be handed back to resume after record.
+        """
+        start_day, skip = None, 0
+        if cursor:
+            match = CURSOR_PATTERN.match(cursor)
+            if not match:
+                raise ValueError(f"Invalid cursor: {cursor}")
+            start_day, skip = match.group(1), int(match.group(2))
+        for day in self.days(created_from, created_to):
+            if start_day is not None and day < start_day:
+                continue
+            records = self.read_segment(day)
+            for position in range(skip if day == start_day else 0, len(records)):
+                yield f"{day}:{position + 1}", records[position]
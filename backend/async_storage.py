@@ -0,0 +1,86 @@
+import asyncio
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional
+
+STORAGE_POOL_SIZE = int(os.environ.get("STORAGE_POOL_SIZE", "8"))
+
+_executor: Optional[ThreadPoolExecutor] = None
+
+def get_executor() -> ThreadPoolExecutor:
+    """Get the thread pool that blocking storage calls are offloaded to"""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=STORAGE_POOL_SIZE, thread_name_prefix="storage")
+    return _executor
+
+def shutdown_executor():
+    """Wait for in-flight storage calls and release the pool threads"""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True)
+        _executor = None
+
+async def run_in_storage_pool(func: Callable, *args, **kwargs) -> Any:
+    """Run a blocking storage call in the storage thread pool and await its result"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), functools.partial(func, *args, **kwargs))
+
+async def iterate_chunks(records: Any, chunk_size: int = 256) -> AsyncIterator[List]:
+    """Yield lists of up to chunk_size items from a sync iterator (drained in the
+    storage thread pool) or from a natively async iterator"""
+    if not hasattr(records, "__aiter__"):
+        async for chunk in iterate_in_storage_pool(records, chunk_size):
+            yield chunk
+        return
+    chunk = []
+    async for record in records:
+        chunk.append(record)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+async def iterate_in_storage_pool(iterator: Iterator, chunk_size: int = 256) -> AsyncIterator[List]:
+    """Drain a blocking iterator from the storage thread pool, yielding lists of up to chunk_size items"""
+    def next_chunk() -> List:
+        chunk = []
+        for item in iterator:
+            chunk.append(item)
+            if len(chunk) >= chunk_size:
+                break
+        return chunk
+
+    while True:
+        chunk = await run_in_storage_pool(next_chunk)
+        if not chunk:
+            return
+        yield chunk
+
+class AsyncService:
+    """Expose the methods of a synchronous service class as awaitables
+
+    AsyncService(OrderService).create_order(data) runs OrderService.create_order
+    in the storage thread pool, so disk I/O never blocks the event loop.
+    """
+
+    def __init__(self, service: Any):
+        self._service = service
+        self._methods: Dict[str, Callable] = {}
+
+    def __getattr__(self, name: str) -> Any:
+        method = self._methods.get(name)
+        if method is not None:
+            return method
+        target = getattr(self._service, name)
+        if not callable(target):
+            return target
+
+        @functools.wraps(target)
+        async def method(*args, **kwargs):
+            return await run_in_storage_pool(target, *args, **kwargs)
+
+        self._methods[name] = method
+        return method
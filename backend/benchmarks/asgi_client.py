@@ -0,0 +1,51 @@
+"""
+Minimal in-process ASGI client used by the benchmarks, so requests reach the
+app without any socket, HTTP parsing or client library in the way.
+"""
+
+import json
+from typing import Any, Dict, Optional, Tuple
+
+async def asgi_request(app, method: str, path: str, headers: Optional[Dict[str, str]] = None,
+                       body: Any = None) -> Tuple[int, bytes]:
+    """Send one request through an ASGI app and return (status, response body)"""
+    path, _, query = path.partition("?")
+    raw_body = json.dumps(body).encode() if body is not None else b""
+    header_list = [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()]
+    if body is not None:
+        header_list.append((b"content-type", b"application/json"))
+        header_list.append((b"content-length", str(len(raw_body)).encode()))
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query.encode(),
+        "root_path": "",
+        "headers": header_list,
+        "client": ("127.0.0.1", 50000),
+        "server": ("testserver", 80),
+    }
+    status = 0
+    chunks = []
+    sent = False
+
+    async def receive():
+        nonlocal sent
+        if sent:
+            return {"type": "http.disconnect"}
+        sent = True
+        return {"type": "http.request", "body": raw_body, "more_body": False}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return status, b"".join(chunks)
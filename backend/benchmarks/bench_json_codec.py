@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Benchmark parse/serialize throughput of each JSON_CODEC on realistic data.
+
+Builds N synthetic orders against the real menu and times, per installed
+codec: parsing an orders.jsonl file line by line, writing it back as JSON
+Lines, and rendering the GET /api/orders and GET /api/menu bodies.
+
+    python benchmarks/bench_json_codec.py --orders 100000
+"""
+
+import argparse
+import importlib
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+import json_codec
+from bench_order_memory import make_order_lines
+
+def best_of(repeat: int, func) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def bench(codec: str, lines: list, menu: dict, repeat: int) -> dict:
+    os.environ["JSON_CODEC"] = codec
+    importlib.reload(json_codec)
+    loads, dumps, dumps_lines = json_codec.loads, json_codec.dumps, json_codec.dumps_lines
+    raw = [line.encode('utf-8') + b"\n" for line in lines]
+    records = [loads(line) for line in raw]
+    assert records == [json.loads(line) for line in lines]
+    page = records[:100]
+    return {
+        "parse_s": best_of(repeat, lambda: [loads(line) for line in raw]),
+        "write_s": best_of(repeat, lambda: dumps_lines(records)),
+        "orders_us": best_of(repeat, lambda: [dumps(page) for _ in range(100)]) / 100 * 1e6,
+        "menu_us": best_of(repeat, lambda: [dumps(menu) for _ in range(100)]) / 100 * 1e6,
+        "bytes": sum(len(line) for line in raw),
+    }
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark JSON codecs on synthetic orders")
+    parser.add_argument("--orders", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    lines = make_order_lines(args.orders)
+    with open(BACKEND_DIR / "data" / "menu_items.txt", 'r', encoding='utf-8') as f:
+        menu = json.load(f)
+    codecs = ["stdlib"] + list(json_codec.FAST_CODECS)
+
+    print(f"{args.orders} orders, {len(lines[0])} bytes per order line")
+    print(f"{'codec':>8} {'parse (rec/s)':>14} {'parse (MB/s)':>13} {'write (rec/s)':>14} "
+          f"{'100 orders (us)':>16} {'menu (us)':>10}")
+    for codec in codecs:
+        result = bench(codec, lines, menu, args.repeat)
+        print(f"{codec:>8} {args.orders / result['parse_s']:>14,.0f} {result['bytes'] / result['parse_s'] / 1e6:>13.0f} "
+              f"{args.orders / result['write_s']:>14,.0f} {result['orders_us']:>16.0f} {result['menu_us']:>10.1f}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
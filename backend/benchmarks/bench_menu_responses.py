@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Compare requests/sec for the menu and restaurant-info endpoints with and
+without pre-rendered response bodies.
+
+Requests are driven straight through the ASGI app in-process, so the numbers
+reflect server-side work (routing, validation, serialization) only.
+
+    python benchmarks/bench_menu_responses.py --requests 5000
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import server
+from asgi_client import asgi_request
+
+ENDPOINTS = ["/api/menu", "/api/menu/pizza", "/api/restaurant-info"]
+
+async def measure(path: str, requests: int, headers: dict) -> float:
+    for _ in range(50):
+        await asgi_request(server.app, "GET", path, headers)
+    start = time.perf_counter()
+    for _ in range(requests):
+        status, _ = await asgi_request(server.app, "GET", path, headers)
+        assert status == 200, f"{path} returned {status}"
+    return requests / (time.perf_counter() - start)
+
+async def run(requests: int):
+    headers = {"accept-encoding": "gzip, deflate, br"}
+    print(f"{'endpoint':<22} {'pydantic (req/s)':>17} {'pre-rendered (req/s)':>21} {'speedup':>8}")
+    for path in ENDPOINTS:
+        server.PRERENDERED_RESPONSES = False
+        baseline = await measure(path, requests, headers)
+        server.PRERENDERED_RESPONSES = True
+        prerendered = await measure(path, requests, headers)
+        print(f"{path:<22} {baseline:>17.0f} {prerendered:>21.0f} {prerendered / baseline:>7.2f}x")
+    await asyncio.get_running_loop().run_in_executor(None, server.shutdown_executor)
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark pre-rendered menu responses")
+    parser.add_argument("--requests", type=int, default=3000)
+    args = parser.parse_args()
+    asyncio.run(run(args.requests))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
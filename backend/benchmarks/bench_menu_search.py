@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Benchmark menu search against a linear scan of the menu.
+
+Grows the real menu to N items (as a multi-location menu would), builds the
+MenuIndex once and times typical GET /api/menu/search queries through the
+inverted word index and price arrays, next to filtering every item in Python
+the way a client-side search does.
+
+    python benchmarks/bench_menu_search.py --items 5000
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from menu_index import MenuIndex, tokenize
+
+QUERIES = [
+    {"text": "chicken"},
+    {"text": "bbq chick"},
+    {"text": "mozzarella", "max_price": 18},
+    {"min_price": 10, "max_price": 15, "popular": True},
+    {"category": "pizza", "text": "spicy"},
+]
+
+def make_menu(count: int) -> dict:
+    with open(BACKEND_DIR / "data" / "menu_items.txt", 'r', encoding='utf-8') as f:
+        base = json.load(f)
+    rng = random.Random(42)
+    templates = [item for items in base.values() for item in items]
+    menu = {category: [] for category in base}
+    for n in range(count):
+        item = dict(rng.choice(templates), id=n + 1)
+        item["name"] = f"{item['name']} {n % 97}"
+        item["price"] = round(item["price"] * rng.uniform(0.8, 1.2), 2)
+        item["popular"] = rng.random() < 0.1
+        menu[item["category"]].append(item)
+    return menu
+
+def scan(items: list, text=None, min_price=None, max_price=None, popular=None, category=None) -> list:
+    words = tokenize(text)
+    return [
+        item for item in items
+        if (category is None or item["category"] == category)
+        and (popular is None or bool(item.get("popular")) == popular)
+        and (min_price is None or item["price"] >= min_price)
+        and (max_price is None or item["price"] <= max_price)
+        and all(any(token.startswith(word) for token in tokenize(item["name"]) + tokenize(item["description"]))
+                for word in words)
+    ]
+
+def per_call_us(repeat: int, func) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark menu search")
+    parser.add_argument("--items", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    menu = make_menu(args.items)
+    start = time.perf_counter()
+    index = MenuIndex(menu, 1)
+    print(f"{args.items} items, index built in {(time.perf_counter() - start) * 1000:.1f} ms")
+    print(f"{'query':<52} {'matches':>8} {'index (us)':>11} {'scan (us)':>10}")
+    for query in QUERIES:
+        found = index.search(**query)
+        assert [item["id"] for item in found] == [item["id"] for item in scan(index.items, **query)]
+        indexed = per_call_us(args.repeat, lambda: index.search(**query))
+        scanned = per_call_us(max(1, args.repeat // 20), lambda: scan(index.items, **query))
+        print(f"{json.dumps(query):<52} {len(found):>8} {indexed:>11.1f} {scanned:>10.0f}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
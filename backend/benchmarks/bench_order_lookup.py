@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Benchmark GET-by-id latency on the indexed order log.
+
+Seeds a temporary orders.jsonl with N synthetic orders for each requested
+size and times random lookups, which should stay flat as N grows.
+
+    python benchmarks/bench_order_lookup.py --sizes 1000 10000 100000 1000000
+"""
+
+import argparse
+import json
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from log_storage import JsonLinesLog
+
+def make_order(n: int) -> dict:
+    return {
+        "id": f"order_{n:08x}",
+        "items": [{"id": 1, "name": "Margherita Classic", "price": 16.99, "category": "pizza", "quantity": 2}],
+        "customer_info": {"name": "John Smith", "phone": "(555) 123-4567"},
+        "order_type": "pickup",
+        "status": "pending",
+        "subtotal": 33.98,
+        "tax": 2.72,
+        "delivery_fee": 0,
+        "total": 36.70,
+        "created_at": "2025-07-30T23:14:52.209461",
+    }
+
+def seed(log_path: Path, count: int):
+    with open(log_path, 'w', encoding='utf-8') as f:
+        for n in range(count):
+            f.write(json.dumps(make_order(n), separators=(",", ":")) + "\n")
+
+def bench(count: int, lookups: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        log_path = Path(tmp) / "orders.jsonl"
+        seed(log_path, count)
+        log = JsonLinesLog(log_path, fsync="never", index_key="id")
+
+        start = time.perf_counter()
+        log.rebuild_index()
+        rebuild_s = time.perf_counter() - start
+
+        keys = [f"order_{random.randrange(count):08x}" for _ in range(lookups)]
+        start = time.perf_counter()
+        for key in keys:
+            assert log.get(key) is not None
+        lookup_us = (time.perf_counter() - start) / lookups * 1e6
+
+        start = time.perf_counter()
+        for n in range(count, count + lookups):
+            log.append(make_order(n))
+        append_us = (time.perf_counter() - start) / lookups * 1e6
+
+        return {"orders": count, "rebuild_s": rebuild_s, "lookup_us": lookup_us, "append_us": append_us}
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark indexed order lookups")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--lookups", type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"{'orders':>10} {'index build (s)':>16} {'get (us)':>10} {'append (us)':>12}")
+    for count in args.sizes:
+        r = bench(count, args.lookups)
+        print(f"{r['orders']:>10} {r['rebuild_s']:>16.3f} {r['lookup_us']:>10.1f} {r['append_us']:>12.1f}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
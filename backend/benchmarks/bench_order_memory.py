@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Benchmark the memory held by a working set of orders.
+
+Builds N synthetic orders against the real menu, decodes them from JSON the
+way storage does, and measures the memory they hold as plain dicts and as
+CompactOrder records, plus the cost of converting back at the API boundary.
+
+    python benchmarks/bench_order_memory.py --orders 100000
+"""
+
+import argparse
+import gc
+import json
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from order_records import CompactOrder, item_catalog
+
+def make_order_lines(count: int) -> list:
+    with open(BACKEND_DIR / "data" / "menu_items.txt", 'r', encoding='utf-8') as f:
+        menu = json.load(f)
+    menu_items = [{k: v for k, v in item.items() if k not in ("popular", "prep_minutes")} for items in menu.values() for item in items]
+    rng = random.Random(42)
+    start = datetime(2025, 7, 30, 11, 0)
+    lines = []
+    for n in range(count):
+        items = [dict(item, quantity=rng.randint(1, 3)) for item in rng.sample(menu_items, rng.randint(1, 4))]
+        subtotal = round(sum(item["price"] * item["quantity"] for item in items), 2)
+        order_type = rng.choice(["pickup", "delivery"])
+        lines.append(json.dumps({
+            "id": f"order_{n:08x}",
+            "items": items,
+            "customer_info": {"name": f"Customer {n}", "phone": f"(555) {rng.randint(100, 999)}-{rng.randint(1000, 9999)}",
+                              "email": "", "address": f"{n} Main St, Anaheim, CA 92805" if order_type == "delivery" else ""},
+            "order_type": order_type,
+            "status": rng.choice(["pending", "preparing", "ready"]),
+            "subtotal": subtotal,
+            "tax": round(subtotal * 0.0875, 2),
+            "delivery_fee": 3.99 if order_type == "delivery" else 0,
+            "total": round(subtotal * 1.0875 + (3.99 if order_type == "delivery" else 0), 2),
+            "created_at": (start + timedelta(seconds=n)).isoformat(),
+        }, separators=(",", ":")))
+    return lines
+
+def measure(build):
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - started
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, size, elapsed
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark working set memory per order representation")
+    parser.add_argument("--orders", type=int, default=100000)
+    args = parser.parse_args()
+
+    lines = make_order_lines(args.orders)
+    dicts, dict_bytes, dict_s = measure(lambda: [json.loads(line) for line in lines])
+    compact, compact_bytes, compact_s = measure(lambda: [CompactOrder.from_dict(json.loads(line)) for line in lines])
+    started = time.perf_counter()
+    for order in compact[:10000]:
+        order.to_dict()
+    to_dict_us = (time.perf_counter() - started) / min(len(compact), 10000) * 1e6
+    assert compact[0].to_dict() == dicts[0]
+
+    print(f"{args.orders} orders, {len(item_catalog.entries)} catalog entries")
+    print(f"{'representation':>16} {'total (MB)':>11} {'per order (B)':>14} {'build (s)':>10}")
+    print(f"{'dict':>16} {dict_bytes / 1e6:>11.1f} {dict_bytes / args.orders:>14.0f} {dict_s:>10.2f}")
+    print(f"{'CompactOrder':>16} {compact_bytes / 1e6:>11.1f} {compact_bytes / args.orders:>14.0f} {compact_s:>10.2f}")
+    print(f"to_dict at the API boundary: {to_dict_us:.1f} us per order")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
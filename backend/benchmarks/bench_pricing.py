@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Benchmark server-side order pricing throughput.
+
+Prices N synthetic orders against a synthetic menu three ways: a plain
+per-item dict lookup loop, the price table called once per order (what a
+single POST /api/orders does) and the vectorized numpy path over the whole
+batch (what catering and bulk imports of PRICING_VECTORIZE_MIN_ORDERS or more
+use), timed after numpy is imported and the price arrays are built.
+
+    python benchmarks/bench_pricing.py --sizes 100 10000 100000 --menu-items 200
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from menu_index import MenuIndex
+from pricing import DELIVERY_FEE, ORDER_ITEM_FIELDS, TAX_RATE, PriceTable, to_cents
+
+def make_menu(item_count: int) -> Dict[str, List[Dict]]:
+    menu = {"pizza": [], "chicken": []}
+    for item_id in range(1, item_count + 1):
+        category = "pizza" if item_id % 2 else "chicken"
+        menu[category].append({"id": item_id, "name": f"Item #{item_id}", "description": "", "image": "",
+                               "price": round(8 + (item_id % 20) * 0.75, 2), "category": category})
+    return menu
+
+def make_orders(menu_items: List[Dict], count: int) -> List[Dict]:
+    rng = random.Random(42)
+    orders = []
+    for _ in range(count):
+        items = [dict(item, quantity=rng.randint(1, 3)) for item in rng.sample(menu_items, rng.randint(1, 6))]
+        order_type = rng.choice(["pickup", "delivery"])
+        subtotal = round(sum(item["price"] * item["quantity"] for item in items), 2)
+        tax = round(subtotal * TAX_RATE, 2)
+        delivery_fee = DELIVERY_FEE if order_type == "delivery" else 0
+        orders.append({"items": items, "order_type": order_type, "subtotal": subtotal, "tax": tax,
+                       "delivery_fee": delivery_fee, "total": round(subtotal + tax + delivery_fee, 2)})
+    return orders
+
+def price_with_loop(index: MenuIndex, orders: List[Dict]) -> int:
+    """Reference implementation: one menu lookup per cart line in a Python loop"""
+    rejected = 0
+    for order in orders:
+        subtotal, items = 0, []
+        for item in order["items"]:
+            menu_item = index.get_item(item["id"])
+            if menu_item is None or to_cents(menu_item["price"]) != to_cents(item["price"]):
+                rejected += 1
+                break
+            subtotal += to_cents(menu_item["price"]) * item["quantity"]
+            items.append(dict({field: menu_item.get(field) for field in ORDER_ITEM_FIELDS}, quantity=item["quantity"]))
+        tax = int(subtotal * TAX_RATE + 0.5)
+        fee = to_cents(DELIVERY_FEE) if order["order_type"] == "delivery" else 0
+        if abs(to_cents(order["total"]) - (subtotal + tax + fee)) > 1:
+            rejected += 1
+    return rejected
+
+def bench(index: MenuIndex, orders: List[Dict]) -> Dict[str, float]:
+    table = PriceTable(index)
+    # Import numpy and build the sorted price arrays before any timing
+    table._quote_batch(orders[:1])
+    results = {}
+
+    start = time.perf_counter()
+    assert price_with_loop(index, orders) == 0
+    results["loop"] = len(orders) / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for order in orders:
+        assert not table.quote([order])[0]["errors"]
+    results["per_order"] = len(orders) / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    assert not any(quote["errors"] for quote in table._quote_batch(orders))
+    results["batch"] = len(orders) / (time.perf_counter() - start)
+    return results
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark order pricing throughput")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 10000, 100000])
+    parser.add_argument("--menu-items", type=int, default=200)
+    args = parser.parse_args()
+
+    menu = make_menu(args.menu_items)
+    index = MenuIndex(menu)
+    menu_items = menu["pizza"] + menu["chicken"]
+    print(f"{'orders':>10} {'loop (orders/s)':>16} {'per order (orders/s)':>21} {'batch (orders/s)':>17}")
+    for count in args.sizes:
+        r = bench(index, make_orders(menu_items, count))
+        print(f"{count:>10} {r['loop']:>16.0f} {r['per_order']:>21.0f} {r['batch']:>17.0f}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Benchmark worker cold starts.
+
+Measures, each in a fresh interpreter: how long `import server` takes and
+which heavy optional packages it pulls in, and the time from launching a
+uvicorn worker until its first GET /api/menu is answered. Optionally lists
+the slowest imports reported by `python -X importtime`.
+
+    python benchmarks/bench_startup.py --runs 5 --top 15
+"""
+
+import argparse
+import http.client
+import json
+import os
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+HEAVY_MODULES = ("numpy", "pandas", "motor", "pymongo", "boto3", "orjson", "msgspec")
+
+IMPORT_PROBE = f"""
+import json, sys, time
+start = time.perf_counter()
+import server
+elapsed = time.perf_counter() - start
+print(json.dumps({{"import_s": elapsed, "heavy": [m for m in {HEAVY_MODULES!r} if m in sys.modules]}}))
+"""
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def measure_import(env: dict) -> dict:
+    out = subprocess.run([sys.executable, "-c", IMPORT_PROBE], cwd=BACKEND_DIR, env=env,
+                         capture_output=True, text=True, check=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+def measure_first_request(env: dict, timeout: float = 30.0) -> float:
+    port = free_port()
+    start = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, "-m", "uvicorn", "server:app", "--port", str(port), "--log-level", "warning"],
+                            cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while time.perf_counter() - start < timeout:
+            try:
+                conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+                conn.request("GET", "/api/menu")
+                if conn.getresponse().status == 200:
+                    return time.perf_counter() - start
+            except OSError:
+                time.sleep(0.005)
+        raise RuntimeError("server did not answer in time")
+    finally:
+        proc.terminate()
+        proc.wait()
+
+def slowest_imports(env: dict, top: int) -> list:
+    err = subprocess.run([sys.executable, "-X", "importtime", "-c", "import server"], cwd=BACKEND_DIR, env=env,
+                         capture_output=True, text=True, check=True).stderr
+    rows = []
+    for line in err.splitlines():
+        parts = line.split("|")
+        if len(parts) == 3 and parts[1].strip().isdigit():
+            rows.append((int(parts[1]), parts[2].rstrip()))
+    return sorted(rows, reverse=True)[:top]
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark import time and time to first request of a worker")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=0, help="Also list this many slowest imports")
+    args = parser.parse_args()
+
+    tmp_dir = tempfile.mkdtemp(prefix="chickza-startup-")
+    try:
+        # A copy of the data directory, so the benchmark never touches real data
+        shutil.copytree(BACKEND_DIR / "data", Path(tmp_dir) / "data",
+                        ignore=shutil.ignore_patterns("*.lock", "*.tmp", "*.db*"))
+        env = dict(os.environ, DATA_DIR=str(Path(tmp_dir) / "data"))
+        imports = [measure_import(env) for _ in range(args.runs)]
+        first_requests = [measure_first_request(env) for _ in range(args.runs)]
+        import_ms = [run["import_s"] * 1000 for run in imports]
+        first_ms = [seconds * 1000 for seconds in first_requests]
+        print(f"import server:          median {statistics.median(import_ms):7.0f} ms  best {min(import_ms):7.0f} ms")
+        print(f"launch to first reply:  median {statistics.median(first_ms):7.0f} ms  best {min(first_ms):7.0f} ms")
+        print(f"heavy modules imported: {', '.join(imports[-1]['heavy']) or 'none'}")
+        if args.top:
+            print("\nslowest imports (cumulative):")
+            for micros, name in slowest_imports(env, args.top):
+                print(f"{micros / 1000:9.1f} ms {name}")
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+"""
+Local load test for the Chickza /api endpoints.
+
+Seeds a temporary data directory with a configurable menu and order history,
+then drives a concurrent mix of menu browsing, order creation, order polling
+and admin listing against the app, reporting throughput and p50/p95/p99
+latency per endpoint.
+
+The app runs either in-process (requests go straight through the ASGI app)
+or as a real uvicorn server with one or more worker processes:
+
+    python benchmarks/load_test.py --orders 100000 --concurrency 32 --duration 20
+    python benchmarks/load_test.py --mode uvicorn --workers 4 --storage sqlite
+    python benchmarks/load_test.py --output after.json --compare before.json
+"""
+
+import argparse
+import asyncio
+import http.client
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from asgi_client import asgi_request
+from pricing import DELIVERY_FEE, TAX_RATE
+
+DEFAULT_MIX = "browse=60,create=10,poll=25,admin=5"
+SEED_BATCH_SIZE = 5000
+# Order ids kept around for the polling workload
+POLL_ID_SAMPLE = 10000
+
+def parse_mix(mix: str) -> Dict[str, int]:
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        if name not in ("browse", "create", "poll", "admin"):
+            raise ValueError(f"Unknown workload '{name}'")
+        weights[name] = int(weight)
+    return weights
+
+def make_menu(item_count: int) -> Dict[str, List[Dict]]:
+    menu = {"pizza": [], "chicken": []}
+    for item_id in range(1, item_count + 1):
+        category = "pizza" if item_id % 2 else "chicken"
+        menu[category].append({
+            "id": item_id,
+            "name": f"{category.title()} Special #{item_id}",
+            "description": "Benchmark menu item with a realistic description length for the payload",
+            "price": round(8 + (item_id % 20) * 0.75, 2),
+            "image": f"https://images.unsplash.com/photo-{item_id}?w=400",
+            "category": category,
+            "popular": item_id % 7 == 0,
+        })
+    return menu
+
+def make_order_request(menu_items: List[Dict], rng: random.Random) -> Dict:
+    items = [dict(item, quantity=rng.randint(1, 3)) for item in rng.sample(menu_items, rng.randint(1, 4))]
+    for item in items:
+        item.pop("popular", None)
+    order_type = rng.choice(["pickup", "delivery"])
+    subtotal = round(sum(item["price"] * item["quantity"] for item in items), 2)
+    tax = round(subtotal * TAX_RATE, 2)
+    delivery_fee = DELIVERY_FEE if order_type == "delivery" else 0
+    return {
+        "items": items,
+        "customer_info": {"name": "Load Test", "phone": f"(555) {rng.randint(100, 999)}-{rng.randint(1000, 9999)}"},
+        "order_type": order_type,
+        "subtotal": subtotal,
+        "tax": tax,
+        "delivery_fee": delivery_fee,
+        "total": round(subtotal + tax + delivery_fee, 2),
+    }
+
+def seed_data_dir(data_dir: Path, menu_item_count: int, order_count: int) -> Tuple[List[Dict], List[str]]:
+    """Write the menu and restaurant info files and bulk-load the order history"""
+    menu = make_menu(menu_item_count)
+    with open(data_dir / "menu_items.txt", 'w', encoding='utf-8') as f:
+        json.dump(menu, f, indent=2)
+    shutil.copy(BACKEND_DIR / "data" / "restaurant_info.txt", data_dir / "restaurant_info.txt")
+
+    import file_storage
+
+    backend = file_storage.get_backend()
+    menu_items = menu["pizza"] + menu["chicken"]
+    rng = random.Random(42)
+    now = datetime.utcnow()
+    order_ids = []
+    for start in range(0, order_count, SEED_BATCH_SIZE):
+        batch = []
+        for n in range(start, min(start + SEED_BATCH_SIZE, order_count)):
+            order = file_storage.build_order(make_order_request(menu_items, rng))
+            order["id"] = f"order_{n:08x}"
+            order["created_at"] = (now - timedelta(minutes=order_count - n)).isoformat()
+            order["status"] = rng.choice(["pending", "completed", "completed", "completed"])
+            batch.append(order)
+        if not backend.add_orders(batch):
+            raise RuntimeError("Failed to seed orders")
+        order_ids.extend(order["id"] for order in batch[:: max(1, order_count // POLL_ID_SAMPLE)])
+    file_storage.close_backend()
+    return menu_items, order_ids
+
+class Workload:
+    """Picks the next request to send according to the configured mix"""
+
+    def __init__(self, weights: Dict[str, int], menu_items: List[Dict], order_ids: List[str], seed: int):
+        self.names = list(weights)
+        self.weights = [weights[name] for name in self.names]
+        self.menu_items = menu_items
+        self.order_ids = order_ids
+        self.rng = random.Random(seed)
+
+    def next_request(self) -> Tuple[str, str, str, Optional[Dict]]:
+        """Return (label, method, path, body) for the next request"""
+        kind = self.rng.choices(self.names, self.weights)[0]
+        rng = self.rng
+        if kind == "browse":
+            choice = rng.randrange(4)
+            if choice == 0:
+                return "GET /api/menu", "GET", "/api/menu", None
+            if choice == 1:
+                category = rng.choice(["pizza", "chicken"])
+                return "GET /api/menu/{category}", "GET", f"/api/menu/{category}", None
+            if choice == 2:
+                item_id = rng.choice(self.menu_items)["id"]
+                return "GET /api/menu/item/{item_id}", "GET", f"/api/menu/item/{item_id}", None
+            return "GET /api/restaurant-info", "GET", "/api/restaurant-info", None
+        if kind == "create":
+            return "POST /api/orders", "POST", "/api/orders", make_order_request(self.menu_items, rng)
+        if kind == "poll" and self.order_ids:
+            order_id = rng.choice(self.order_ids)
+            return "GET /api/orders/{order_id}", "GET", f"/api/orders/{order_id}", None
+        return "GET /api/orders", "GET", "/api/orders?limit=50&status=pending", None
+
+class Recorder:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def record(self, label: str, latency: float, status: int):
+        with self._lock:
+            self.latencies[label].append(latency)
+            if status >= 400:
+                self.errors[label] += 1
+
+async def run_in_process(workload_args: dict, concurrency: int, duration: float, recorder: Recorder):
+    import server
+
+    await server.app.router.startup()
+    try:
+        deadline = time.perf_counter() + duration
+
+        async def client(seed: int):
+            workload = Workload(seed=seed, **workload_args)
+            while time.perf_counter() < deadline:
+                label, method, path, body = workload.next_request()
+                start = time.perf_counter()
+                status, _ = await asgi_request(server.app, method, path, body=body)
+                recorder.record(label, time.perf_counter() - start, status)
+
+        await asyncio.gather(*(client(seed) for seed in range(concurrency)))
+    finally:
+        await server.app.router.shutdown()
+
+def wait_for_server(port: int, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            conn.request("GET", "/api/")
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"uvicorn did not come up on port {port}")
+
+def run_uvicorn(workload_args: dict, concurrency: int, duration: float, recorder: Recorder,
+                port: int, workers: int, env: Dict[str, str]):
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "server:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env,
+    )
+    try:
+        wait_for_server(port)
+        deadline = time.perf_counter() + duration
+
+        def client(seed: int):
+            workload = Workload(seed=seed, **workload_args)
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+            conn.connect()
+            # Without this, Nagle's algorithm and delayed ACKs add ~40ms per request
+            conn.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            while time.perf_counter() < deadline:
+                label, method, path, body = workload.next_request()
+                payload = json.dumps(body) if body is not None else None
+                headers = {"Content-Type": "application/json"} if body is not None else {}
+                start = time.perf_counter()
+                conn.request(method, path, body=payload, headers=headers)
+                response = conn.getresponse()
+                response.read()
+                recorder.record(label, time.perf_counter() - start, response.status)
+            conn.close()
+
+        threads = [threading.Thread(target=client, args=(seed,)) for seed in range(concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+def summarize(recorder: Recorder, elapsed: float) -> Dict[str, Dict[str, float]]:
+    summary = {}
+    for label, values in sorted(recorder.latencies.items()):
+        values = sorted(values)
+        summary[label] = {
+            "requests": len(values),
+            "errors": recorder.errors.get(label, 0),
+            "rps": len(values) / elapsed,
+            "p50_ms": percentile(values, 0.50) * 1000,
+            "p95_ms": percentile(values, 0.95) * 1000,
+            "p99_ms": percentile(values, 0.99) * 1000,
+            "max_ms": values[-1] * 1000,
+        }
+    return summary
+
+def print_summary(summary: Dict[str, Dict[str, float]], elapsed: float):
+    print(f"{'endpoint':<30} {'reqs':>8} {'errors':>7} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for label, s in summary.items():
+        print(f"{label:<30} {s['requests']:>8} {s['errors']:>7} {s['rps']:>9.1f} "
+              f"{s['p50_ms']:>8.2f} {s['p95_ms']:>8.2f} {s['p99_ms']:>8.2f} {s['max_ms']:>8.2f}")
+    total = sum(s["requests"] for s in summary.values())
+    print(f"{'total':<30} {total:>8} {sum(s['errors'] for s in summary.values()):>7} {total / elapsed:>9.1f}")
+
+def compare(summary: Dict[str, Dict[str, float]], baseline_path: str, max_regression: float) -> bool:
+    """Print p95 changes against a baseline run; return False if any endpoint regressed too far"""
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)["endpoints"]
+    ok = True
+    print(f"\n{'endpoint':<30} {'base p95':>9} {'p95':>9} {'change':>8}")
+    for label, s in summary.items():
+        if label not in baseline:
+            continue
+        before, after = baseline[label]["p95_ms"], s["p95_ms"]
+        change = (after - before) / before if before else 0.0
+        flag = ""
+        if change > max_regression:
+            ok, flag = False, "  REGRESSION"
+        print(f"{label:<30} {before:>9.2f} {after:>9.2f} {change:>+7.0%}{flag}")
+    return ok
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Load test the Chickza API")
+    parser.add_argument("--mode", choices=["inprocess", "uvicorn"], default="inprocess")
+    parser.add_argument("--storage", choices=["file", "sqlite"], default="file")
+    parser.add_argument("--menu-items", type=int, default=20)
+    parser.add_argument("--orders", type=int, default=10000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds to drive load for")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Workload weights, e.g. " + DEFAULT_MIX)
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes (uvicorn mode)")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--rate-limits", action="store_true",
+                        help="Keep the per-client write rate limits on (all load comes from one client)")
+    parser.add_argument("--data-dir", help="Seed into this directory instead of a temporary one")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    parser.add_argument("--compare", help="Baseline JSON from an earlier --output run")
+    parser.add_argument("--max-regression", type=float, default=0.2,
+                        help="Allowed relative p95 increase against --compare before failing")
+    args = parser.parse_args()
+
+    tmp_dir = None if args.data_dir else tempfile.mkdtemp(prefix="chickza-load-")
+    data_dir = Path(args.data_dir or tmp_dir)
+    data_dir.mkdir(parents=True, exist_ok=True)
+    env = dict(os.environ, DATA_DIR=str(data_dir.resolve()), STORAGE_BACKEND=args.storage,
+               RATE_LIMIT_ENABLED="true" if args.rate_limits else "false")
+    os.environ.update(env)
+
+    try:
+        print(f"Seeding {args.menu_items} menu items and {args.orders} orders into {data_dir} ({args.storage})")
+        menu_items, order_ids = seed_data_dir(data_dir, args.menu_items, args.orders)
+        workload_args = {"weights": parse_mix(args.mix), "menu_items": menu_items, "order_ids": order_ids}
+
+        recorder = Recorder()
+        print(f"Driving {args.mix} with {args.concurrency} clients for {args.duration:.0f}s ({args.mode})\n")
+        start = time.perf_counter()
+        if args.mode == "inprocess":
+            asyncio.run(run_in_process(workload_args, args.concurrency, args.duration, recorder))
+        else:
+            run_uvicorn(workload_args, args.concurrency, args.duration, recorder, args.port, args.workers, env)
+        elapsed = time.perf_counter() - start
+
+        summary = summarize(recorder, elapsed)
+        print_summary(summary, elapsed)
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                json.dump({"args": vars(args), "elapsed_s": elapsed, "endpoints": summary}, f, indent=2)
+        if args.compare and not compare(summary, args.compare, args.max_regression):
+            return 1
+        return 0
+    finally:
+        if tmp_dir:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    sys.exit(main())
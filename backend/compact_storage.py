@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Move orders and contact messages created more than ARCHIVE_AFTER_DAYS days
+ago out of the JSON Lines logs into compressed daily archive segments under
+data/archive/, where they can still be looked up by id and date range.
+Orders that are not completed yet stay until they are more than
+ARCHIVE_OPEN_ORDERS_AFTER_DAYS days old, by which time they were abandoned.
+
+Safe to run from cron while the server is running; an interrupted run can
+simply be repeated.
+"""
+
+import argparse
+import os
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+# Imported after load_dotenv so storage settings from .env are applied
+from file_storage import JsonLinesBackend, storage
+
+ARCHIVE_AFTER_DAYS = float(os.environ.get("ARCHIVE_AFTER_DAYS", "90"))
+# Age in days after which orders that never reached "completed" are archived as well
+ARCHIVE_OPEN_ORDERS_AFTER_DAYS = float(os.environ.get("ARCHIVE_OPEN_ORDERS_AFTER_DAYS", "180"))
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Archive old orders and contact messages")
+    parser.add_argument("--days", type=float, default=ARCHIVE_AFTER_DAYS,
+                        help="Archive records created more than this many days ago")
+    parser.add_argument("--open-days", type=float, default=ARCHIVE_OPEN_ORDERS_AFTER_DAYS,
+                        help="Also archive orders that are not completed once created more than this many days ago")
+    args = parser.parse_args()
+
+    now = datetime.utcnow()
+    archive_before = (now - timedelta(days=args.days)).isoformat()
+    open_before = (now - timedelta(days=max(args.open_days, args.days))).isoformat()
+    backend = JsonLinesBackend(None, storage)
+    for name, count in backend.compact(archive_before, open_before).items():
+        print(f"Archived {count} {name} created before {archive_before}")
+    backend.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,9 +1,26 @@
+import hashlib
 import json
+import logging
 import os
+from abc import ABC, abstractmethod
+import threading
+import time
 from pathlib import Path
-from typing import Dict, List, Any, Optional
+from typing import Callable, Dict, Iterable, Iterator, List, Any, Optional, Tuple
 import uuid
 from datetime import datetime
+from analytics import order_analytics
+from archive import Archive
+from json_codec import loads
+from kitchen import kitchen_queue
+from log_storage import JsonLinesLog
+from menu_index import MenuIndex
+from order_events import order_events
+from order_records import ACTIVE_STATUSES, CompactOrder, active_orders
+from pricing import apply_quote, price_orders, quote_orders
+from metrics import STORAGE_BYTES_READ, STORAGE_PARSE_SECONDS
+
+logger = logging.getLogger(__name__)
 
 class FileStorage:
     def __init__(self, data_dir: str = "data"):
@@ -18,128 +35,774 @@ class FileStorage:
         file_path = self._get_file_path(filename)
         try:
             if file_path.exists():
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    return json.load(f)
+                with open(file_path, 'rb') as f:
+                    raw = f.read()
+                STORAGE_BYTES_READ.inc(filename, amount=len(raw))
+                with STORAGE_PARSE_SECONDS.time(filename):
+                    return loads(raw)
             return []
-        except (json.JSONDecodeError, FileNotFoundError):
+        except (ValueError, FileNotFoundError):
             return []
-    
-    def write_json_file(self, filename: str, data: Any) -> bool:
-        """Write data as JSON to a file"""
-        file_path = self._get_file_path(filename)
+
+class DocumentCache:
+    """In-memory cache of parsed JSON files, reloaded when a file's mtime/size/inode changes
+
+    Cached documents are shared between callers and must be treated as read-only.
+    The file is stat'ed at most once per check_interval seconds, so steady-state
+    reads are served from memory without touching the disk.
+    """
+
+    def __init__(self, storage: FileStorage, check_interval: float = 1.0):
+        self.storage = storage
+        self.check_interval = check_interval
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _signature(self, filename: str) -> Optional[Tuple[int, int, int]]:
         try:
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
-            return True
-        except Exception as e:
-            print(f"Error writing to {filename}: {e}")
+            st = os.stat(self.storage._get_file_path(filename))
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+    def _load(self, filename: str, signature: Optional[Tuple[int, int, int]]) -> Dict[str, Any]:
+        previous = self._entries.get(filename)
+        data = self.storage.read_json_file(filename)
+        # Content hash, identical across worker processes serving the same file
+        canonical = json.dumps(data, sort_keys=True, separators=(",", ":")).encode('utf-8')
+        entry = {
+            "data": data,
+            "signature": signature,
+            "checked_at": time.monotonic(),
+            "version": previous["version"] + 1 if previous else 1,
+            "digest": hashlib.sha256(canonical).hexdigest()[:32],
+            "last_modified": signature[0] / 1e9 if signature else time.time(),
+        }
+        self._entries[filename] = entry
+        return entry
+
+    def _entry(self, filename: str) -> Dict[str, Any]:
+        entry = self._entries.get(filename)
+        if entry is not None and time.monotonic() - entry["checked_at"] < self.check_interval:
+            self.hits += 1
+            return entry
+        with self._lock:
+            entry = self._entries.get(filename)
+            signature = self._signature(filename)
+            if entry is not None and entry["signature"] == signature:
+                entry["checked_at"] = time.monotonic()
+                self.hits += 1
+                return entry
+            self.misses += 1
+            return self._load(filename, signature)
+
+    def get(self, filename: str) -> Any:
+        """Get the parsed contents of a file, reloading it if it changed on disk"""
+        return self._entry(filename)["data"]
+
+    def snapshot(self, filename: str) -> Dict[str, Any]:
+        """Get the parsed contents of a file with the content digest and modification
+        time of that same load, for HTTP cache validation"""
+        entry = self._entry(filename)
+        return {
+            "data": entry["data"],
+            "version": entry["version"],
+            "digest": entry["digest"],
+            "last_modified": entry["last_modified"],
+        }
+
+    def version(self, filename: str) -> int:
+        """Get a counter that increases every time the file is (re)loaded"""
+        return self._entry(filename)["version"]
+
+    def reload(self, filename: Optional[str] = None) -> None:
+        """Force a reload of one file, or of every cached file"""
+        with self._lock:
+            filenames = [filename] if filename else list(self._entries)
+            for name in filenames:
+                self._load(name, self._signature(name))
+
+    def stats(self) -> Dict[str, Any]:
+        """Get hit/miss counters and the currently cached files"""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "files": {name: entry["version"] for name, entry in self._entries.items()},
+        }
+
+# Storage instance; DATA_DIR may point elsewhere, e.g. at a seeded benchmark directory
+storage = FileStorage(os.environ.get("DATA_DIR", "data"))
+
+# Parsed menu and restaurant info, kept in memory between requests
+CACHE_CHECK_INTERVAL = float(os.environ.get("CACHE_CHECK_INTERVAL", "1.0"))
+document_cache = DocumentCache(storage, check_interval=CACHE_CHECK_INTERVAL)
+
+def _digits(value: Any) -> str:
+    return "".join(ch for ch in str(value or "") if ch.isdigit())
+
+def created_at_filter(created_from: Optional[str] = None,
+                      created_to: Optional[str] = None) -> Callable[[Dict], bool]:
+    """Build a predicate matching records created within [created_from, created_to]
+
+    created_at values are ISO 8601 strings, so plain string comparison orders them.
+    """
+    def predicate(record: Dict) -> bool:
+        created_at = record.get("created_at", "")
+        if created_from and created_at < created_from:
             return False
-    
-    def append_to_json_array(self, filename: str, new_item: Dict) -> bool:
-        """Append a new item to a JSON array file"""
-        current_data = self.read_json_file(filename)
-        if not isinstance(current_data, list):
-            current_data = []
-        current_data.append(new_item)
-        return self.write_json_file(filename, current_data)
+        if created_to and created_at > created_to:
+            return False
+        return True
+    return predicate
+
+def order_filter(status: Optional[str] = None, order_type: Optional[str] = None,
+                 created_from: Optional[str] = None, created_to: Optional[str] = None,
+                 phone: Optional[str] = None) -> Callable[[Dict], bool]:
+    """Build a predicate matching orders against the admin listing filters"""
+    in_range = created_at_filter(created_from, created_to)
+    phone_digits = _digits(phone)
+
+    def predicate(order: Dict) -> bool:
+        if status and order.get("status") != status:
+            return False
+        if order_type and order.get("order_type") != order_type:
+            return False
+        if phone_digits and _digits(order.get("customer_info", {}).get("phone")) != phone_digits:
+            return False
+        return in_range(order)
+    return predicate
+
+def paginate_log(log: JsonLinesLog, predicate: Callable[[Dict], bool],
+                 cursor: Optional[str] = None, limit: int = 100) -> Tuple[List[Dict], Optional[str]]:
+    """Read one page of matching records from a log
+
+    The cursor is the byte offset to resume scanning from; None is returned
+    as the next cursor once the end of the log has been reached.
+    """
+    offset = 0
+    if cursor:
+        if not cursor.isdigit() or int(cursor) > log.size():
+            raise ValueError(f"Invalid cursor: {cursor}")
+        offset = int(cursor)
+    page = []
+    for next_offset, record in log.scan(offset):
+        if predicate(record):
+            page.append(record)
+            if len(page) >= limit:
+                return page, str(next_offset)
+    return page, None
+
+def paginate_archived(archive: Archive, log: JsonLinesLog, predicate: Callable[[Dict], bool],
+                      cursor: Optional[str] = None, limit: int = 100, created_from: Optional[str] = None,
+                      created_to: Optional[str] = None) -> Tuple[List[Dict], Optional[str]]:
+    """Read one page of matching records from an archive followed by its live log
+
+    Archive cursors look like "<day>:<position>" and log cursors are byte
+    offsets, so a listing moves from the archive on to the log. Archived
+    records still present in the log, after an interrupted compaction, are
+    only returned from the log.
+    """
+    page = []
+    if not (cursor and cursor.isdigit()):
+        live_keys = log.keys()
+        for next_cursor, record in archive.scan(created_from, created_to, cursor):
+            if predicate(record) and str(record.get(archive.key)) not in live_keys:
+                page.append(record)
+                if len(page) >= limit:
+                    return page, next_cursor
+        cursor = None
+    records, next_cursor = paginate_log(log, predicate, cursor, limit - len(page))
+    return page + records, next_cursor
+
+def iter_archived(archive: Archive, log: JsonLinesLog, predicate: Callable[[Dict], bool],
+                  created_from: Optional[str] = None, created_to: Optional[str] = None,
+                  live_records: Optional[Iterable[Dict]] = None) -> Iterator[Dict]:
+    """Iterate over the matching records in an archive and then in its live log
+
+    live_records, e.g. from log.snapshot(), replaces reading the whole log.
+    """
+    live_keys = log.keys()
+    for _, record in archive.scan(created_from, created_to):
+        if predicate(record) and str(record.get(archive.key)) not in live_keys:
+            yield record
+    for record in (live_records if live_records is not None else log):
+        if predicate(record):
+            yield record
+
+class StorageBackend(ABC):
+    """Persistence interface the services depend on
+
+    Menu and restaurant info are read-mostly documents served from a
+    DocumentCache over the data files; backends only have to provide order
+    and contact message storage, but may override the document methods too.
+    """
+
+    DOCUMENT_FILES = {"menu": "menu_items.txt", "restaurant_info": "restaurant_info.txt"}
+
+    def __init__(self, documents: DocumentCache):
+        self.documents = documents
+
+    def get_document(self, name: str) -> Any:
+        """Get a parsed document ("menu" or "restaurant_info")"""
+        return self.documents.get(self.DOCUMENT_FILES[name])
+
+    def get_document_snapshot(self, name: str) -> Dict[str, Any]:
+        """Get a document with its version, content digest and modification time"""
+        return self.documents.snapshot(self.DOCUMENT_FILES[name])
+
+    def reload_documents(self) -> None:
+        """Drop cached documents so they are read again from the source"""
+        self.documents.reload()
+
+    def document_stats(self) -> Dict[str, Any]:
+        """Get document cache hit/miss counters"""
+        return self.documents.stats()
+
+    @abstractmethod
+    def add_order(self, order: Dict) -> bool:
+        """Persist a new order"""
+
+    @abstractmethod
+    def add_orders(self, orders: List[Dict]) -> bool:
+        """Persist several new orders in one write"""
+
+    @abstractmethod
+    def get_order(self, order_id: str) -> Optional[Dict]:
+        """Get an order by ID"""
+
+    @abstractmethod
+    def update_order_status(self, order_id: str, expected: str, status: str) -> Optional[Dict]:
+        """Move an order from the expected status to a new one, returning the updated order
+
+        Returns None for unknown orders and raises OrderStatusConflict if the
+        order is no longer in the expected status or has been archived.
+        """
+
+    @abstractmethod
+    def list_orders(self, cursor: Optional[str] = None, limit: int = 100,
+                    **filters) -> Tuple[List[Dict], Optional[str]]:
+        """Get one page of orders matching the filters accepted by order_filter"""
+
+    @abstractmethod
+    def iter_orders(self, **filters) -> Iterator[Dict]:
+        """Iterate over every order matching the filters accepted by order_filter"""
+
+    @abstractmethod
+    def add_message(self, message: Dict) -> bool:
+        """Persist a new contact message"""
+
+    @abstractmethod
+    def list_messages(self, cursor: Optional[str] = None, limit: int = 100,
+                      created_from: Optional[str] = None,
+                      created_to: Optional[str] = None) -> Tuple[List[Dict], Optional[str]]:
+        """Get one page of contact messages created within the given range"""
+
+    @abstractmethod
+    def iter_messages(self, created_from: Optional[str] = None,
+                      created_to: Optional[str] = None) -> Iterator[Dict]:
+        """Iterate over contact messages created within the given range"""
+
+    def order_position(self) -> Any:
+        """Current position in the feed of stored orders, or None if the backend has no such feed"""
+        return None
+
+    def order_changes(self, position: Any) -> Optional[Tuple[List[Dict], Any]]:
+        """Every order version stored after position, oldest first, and the position after them
+
+        Returns None once position is no longer valid, e.g. after compaction;
+        callers then load the orders again.
+        """
+        return None
+
+    def order_snapshot(self) -> Tuple[Iterable[Dict], Any]:
+        """Every order, and the feed position the orders are current up to"""
+        return self.iter_orders(), self.order_position()
+
+    def compact(self, archive_before: str, open_before: Optional[str] = None) -> Dict[str, int]:
+        """Move records created before archive_before out of the live data, returning counts per kind
+
+        Orders that are not completed yet are only moved once created before
+        open_before (by default archive_before). Backends that keep records in
+        an indexed database have nothing to compact.
+        """
+        return {}
+
+    def close(self) -> None:
+        """Release connections or file handles held by the backend"""
+
+class JsonLinesBackend(StorageBackend):
+    """Orders and contact messages in append-only JSON Lines logs in the data directory"""
+
+    def __init__(self, documents: DocumentCache, storage: FileStorage,
+                 fsync: str = "always", fsync_interval: float = 1.0):
+        super().__init__(documents)
+        # The legacy JSON array files are migrated into the logs on first use
+        self.order_log = JsonLinesLog(
+            storage._get_file_path("orders.jsonl"),
+            legacy_path=storage._get_file_path("orders.txt"),
+            fsync=fsync,
+            fsync_interval=fsync_interval,
+            index_key="id",
+        )
+        self.contact_log = JsonLinesLog(
+            storage._get_file_path("contact_messages.jsonl"),
+            legacy_path=storage._get_file_path("contact_messages.txt"),
+            fsync=fsync,
+            fsync_interval=fsync_interval,
+            index_key="id",
+        )
+        # Old records are moved into compressed daily segments by compact()
+        self.order_archive = Archive(storage._get_file_path("archive") / "orders")
+        self.contact_archive = Archive(storage._get_file_path("archive") / "contact_messages")
+
+    def add_order(self, order: Dict) -> bool:
+        return self.order_log.append(order)
+
+    def add_orders(self, orders: List[Dict]) -> bool:
+        return self.order_log.append_many(orders)
+
+    def get_order(self, order_id: str) -> Optional[Dict]:
+        order = self.order_log.get(order_id)
+        return order if order is not None else self.order_archive.get(order_id)
+
+    def update_order_status(self, order_id: str, expected: str, status: str) -> Optional[Dict]:
+        def change(order: Dict) -> Dict:
+            check_expected_status(order, expected)
+            return with_status(order, status)
+        updated = self.order_log.update(order_id, change)
+        if updated is None and self.order_archive.get(order_id) is not None:
+            raise OrderStatusConflict("Order is archived; its status can no longer change")
+        return updated
+
+    def list_orders(self, cursor: Optional[str] = None, limit: int = 100,
+                    **filters) -> Tuple[List[Dict], Optional[str]]:
+        return paginate_archived(self.order_archive, self.order_log, order_filter(**filters), cursor, limit,
+                                 filters.get("created_from"), filters.get("created_to"))
+
+    def iter_orders(self, **filters) -> Iterator[Dict]:
+        return iter_archived(self.order_archive, self.order_log, order_filter(**filters),
+                             filters.get("created_from"), filters.get("created_to"))
+
+    def order_position(self) -> Any:
+        return self.order_log.position()
+
+    def order_changes(self, position: Any) -> Optional[Tuple[List[Dict], Any]]:
+        # Appended order versions only; reading them back costs nothing like a scan of the log
+        return self.order_log.read_since(position)
+
+    def order_snapshot(self) -> Tuple[Iterable[Dict], Any]:
+        live_records, position = self.order_log.snapshot()
+        return iter_archived(self.order_archive, self.order_log, lambda order: True,
+                             live_records=live_records), position
+
+    def add_message(self, message: Dict) -> bool:
+        return self.contact_log.append(message)
+
+    def list_messages(self, cursor: Optional[str] = None, limit: int = 100,
+                      created_from: Optional[str] = None,
+                      created_to: Optional[str] = None) -> Tuple[List[Dict], Optional[str]]:
+        return paginate_archived(self.contact_archive, self.contact_log, created_at_filter(created_from, created_to),
+                                 cursor, limit, created_from, created_to)
+
+    def iter_messages(self, created_from: Optional[str] = None,
+                      created_to: Optional[str] = None) -> Iterator[Dict]:
+        return iter_archived(self.contact_archive, self.contact_log, created_at_filter(created_from, created_to),
+                             created_from, created_to)
+
+    def compact(self, archive_before: str, open_before: Optional[str] = None) -> Dict[str, int]:
+        # Orders still being worked on stay in the live log, so their status can change, until
+        # they are older than open_before; by then they were abandoned rather than in progress
+        open_before = min(open_before or archive_before, archive_before)
+
+        def old_order(order: Dict) -> bool:
+            cutoff = open_before if order.get("status") in ACTIVE_STATUSES else archive_before
+            return order.get("created_at", "") < cutoff
+
+        def old_message(message: Dict) -> bool:
+            return message.get("created_at", "") < archive_before
+
+        return {
+            "orders": self.order_log.compact(old_order, self.order_archive.add),
+            "contact_messages": self.contact_log.compact(old_message, self.contact_archive.add),
+        }
+
+STORAGE_BACKEND = os.environ.get("STORAGE_BACKEND", "file")
+STORAGE_FSYNC = os.environ.get("STORAGE_FSYNC", "always")
+STORAGE_FSYNC_INTERVAL = float(os.environ.get("STORAGE_FSYNC_INTERVAL", "1.0"))
+SQLITE_PATH = os.environ.get("SQLITE_PATH", str(storage._get_file_path("chickza.db")))
+
+def create_storage_backend(name: str) -> StorageBackend:
+    """Create the storage backend selected by STORAGE_BACKEND ("file" or "sqlite")
+
+    The "mongo" backend is async-only and is served by the services in
+    mongo_storage instead of the ones below.
+    """
+    if name == "file":
+        return JsonLinesBackend(document_cache, storage, fsync=STORAGE_FSYNC,
+                                fsync_interval=STORAGE_FSYNC_INTERVAL)
+    if name == "sqlite":
+        from sqlite_storage import SQLiteBackend
+        return SQLiteBackend(document_cache, SQLITE_PATH, synchronous="FULL" if STORAGE_FSYNC == "always" else "NORMAL")
+    raise ValueError(f"Unknown storage backend '{name}'")
+
+_backend: Optional[StorageBackend] = None
+_backend_lock = threading.Lock()
+
+def get_backend() -> StorageBackend:
+    """Get the backend used by all services, creating it on first use"""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = create_storage_backend(STORAGE_BACKEND)
+    return _backend
+
+def close_backend() -> None:
+    """Close the backend if it was ever created"""
+    global _backend
+    with _backend_lock:
+        if _backend is not None:
+            _backend.close()
+            _backend = None
+
+ORDER_STATUSES = ("pending", "preparing", "ready", "completed")
+
+class OrderStatusConflict(ValueError):
+    """Raised when an order cannot move to the requested status from the one it is in"""
+
+def check_status_transition(current: str, status: str):
+    """Allow only a move to the next status in ORDER_STATUSES"""
+    if status not in ORDER_STATUSES:
+        raise ValueError(f"Unknown order status '{status}', expected one of {ORDER_STATUSES}")
+    position = ORDER_STATUSES.index(current) if current in ORDER_STATUSES else len(ORDER_STATUSES)
+    if ORDER_STATUSES[position + 1:position + 2] != (status,):
+        raise OrderStatusConflict(f"Cannot move order from {current} to {status}")
+
+def check_expected_status(order: Dict, expected: str):
+    """Guard a status update against a concurrent one that got there first"""
+    if order.get("status") != expected:
+        raise OrderStatusConflict(f"Order status changed to {order.get('status')}")
+
+def with_status(order: Dict, status: str) -> Dict:
+    """Copy an order record with a new status"""
+    return dict(order, status=status, updated_at=datetime.utcnow().isoformat())
+
+def build_order(order_data: Dict) -> Dict:
+    """Build a new pending order record from an order request"""
+    return {
+        "id": f"order_{uuid.uuid4().hex[:8]}",
+        "items": order_data.get("items", []),
+        "customer_info": order_data.get("customer_info", {}),
+        "order_type": order_data.get("order_type", "pickup"),
+        "status": "pending",
+        "subtotal": order_data.get("subtotal", 0),
+        "tax": order_data.get("tax", 0),
+        "delivery_fee": order_data.get("delivery_fee", 0),
+        "total": order_data.get("total", 0),
+        "created_at": datetime.utcnow().isoformat()
+    }
+
+def build_order_batch(orders_data: List[Dict], quotes: List[Dict],
+                      atomic: bool = False) -> Tuple[List[Dict], List[Dict]]:
+    """Build records for the cleanly priced orders in a batch, plus one result per order request
+
+    With atomic=True no records are built unless every order priced cleanly.
+    """
+    any_rejected = any(quote["errors"] for quote in quotes)
+    new_orders, results = [], []
+    for order_data, quote in zip(orders_data, quotes):
+        if quote["errors"]:
+            results.append({"status": "rejected", "errors": quote["errors"]})
+        elif atomic and any_rejected:
+            results.append({"status": "skipped", "errors": ["another order in the batch was rejected"]})
+        else:
+            new_order = build_order(apply_quote(order_data, quote))
+            new_orders.append(new_order)
+            results.append({"status": "created", "id": new_order["id"]})
+    return new_orders, results
+
+def batch_write_failed(results: List[Dict]) -> List[Dict]:
+    """Mark the orders a batch meant to create as failed after the storage write did not go through"""
+    return [
+        {"status": "failed", "errors": ["storage write failed"]} if result["status"] == "created" else result
+        for result in results
+    ]
+
+def orders_created(orders: List[Dict]):
+    """Bring the in-process views of orders up to date after new orders were stored
+
+    The orders are committed by now, so a failure here is logged instead of
+    failing the request (a client retry would store them a second time).
+    """
+    try:
+        active_orders.apply(orders)
+        order_analytics.add_orders(orders)
+    except Exception as e:
+        logger.exception(f"Error updating the in-process order views: {e}")
+
+def sync_active_orders():
+    """Bring the working set of active orders up to date with orders stored by any worker process"""
+    backend = get_backend()
+    active_orders.sync(lambda created_from: backend.iter_orders(created_from=created_from),
+                       backend.order_position, backend.order_changes)
+
+def order_updated(order: Dict):
+    """Bring the in-process views of orders up to date and notify subscribers after an order changed"""
+    try:
+        active_orders.apply([order])
+    except Exception as e:
+        logger.exception(f"Error updating the in-process order views: {e}")
+    order_events.publish(order)
 
-# Storage instance
-storage = FileStorage()
+def build_contact_message(message_data: Dict) -> Dict:
+    """Build a new contact message record from a contact form submission"""
+    return {
+        "id": f"msg_{uuid.uuid4().hex[:8]}",
+        "name": message_data.get("name", ""),
+        "email": message_data.get("email", ""),
+        "phone": message_data.get("phone", ""),
+        "subject": message_data.get("subject", ""),
+        "message": message_data.get("message", ""),
+        "created_at": datetime.utcnow().isoformat()
+    }
+
+def contact_result(message_id: Optional[str]) -> Dict:
+    """Build the contact form response for a stored (message_id) or failed (None) submission"""
+    if message_id:
+        return {
+            "success": True,
+            "message": "Thank you for contacting us! We'll get back to you within 24 hours.",
+            "message_id": message_id
+        }
+    return {
+        "success": False,
+        "message": "Failed to submit message. Please try again."
+    }
 
 class MenuService:
+    _index: Optional[MenuIndex] = None
+
+    @staticmethod
+    def get_menu_index() -> MenuIndex:
+        """Get the lookup index for the current menu, rebuilding it if the menu changed"""
+        snapshot = get_backend().get_document_snapshot("menu")
+        menu_data, version = snapshot["data"], snapshot["version"]
+        index = MenuService._index
+        if index is None or index.version != version:
+            index = MenuIndex(menu_data, version)
+            MenuService._index = index
+        return index
+
+    @staticmethod
+    def get_menu_snapshot() -> Dict[str, Any]:
+        """Get the menu together with its content digest and modification time"""
+        return get_backend().get_document_snapshot("menu")
+
     @staticmethod
     def get_all_menu_items() -> Dict[str, List[Dict]]:
         """Get all menu items"""
-        return storage.read_json_file("menu_items.txt")
+        return get_backend().get_document("menu")
     
     @staticmethod
     def get_menu_by_category(category: str) -> List[Dict]:
         """Get menu items by category"""
-        menu_data = storage.read_json_file("menu_items.txt")
-        if isinstance(menu_data, dict) and category in menu_data:
-            return menu_data[category]
-        return []
+        return MenuService.get_menu_index().get_category(category)
     
     @staticmethod
     def get_item_by_id(item_id: int) -> Optional[Dict]:
         """Get a specific menu item by ID"""
-        menu_data = storage.read_json_file("menu_items.txt")
-        if isinstance(menu_data, dict):
-            for category_items in menu_data.values():
-                for item in category_items:
-                    if item.get('id') == item_id:
-                        return item
-        return None
+        return MenuService.get_menu_index().get_item(item_id)
+
+    @staticmethod
+    def get_items_by_ids(item_ids: List[int]) -> Dict[int, Optional[Dict]]:
+        """Get several menu items by ID, e.g. to validate a cart"""
+        return MenuService.get_menu_index().get_items(item_ids)
+
+    @staticmethod
+    def get_popular_items() -> List[Dict]:
+        """Get menu items flagged as popular"""
+        return MenuService.get_menu_index().popular
+
+    @staticmethod
+    def search_items(text: Optional[str] = None, min_price: Optional[float] = None, max_price: Optional[float] = None,
+                     popular: Optional[bool] = None, category: Optional[str] = None) -> List[Dict]:
+        """Search menu items by name/description words, price range, popular flag and category"""
+        return MenuService.get_menu_index().search(text, min_price, max_price, popular, category)
 
 class OrderService:
     @staticmethod
     def create_order(order_data: Dict) -> Dict:
-        """Create a new order"""
-        order_id = f"order_{uuid.uuid4().hex[:8]}"
-        new_order = {
-            "id": order_id,
-            "items": order_data.get("items", []),
-            "customer_info": order_data.get("customer_info", {}),
-            "order_type": order_data.get("order_type", "pickup"),
-            "status": "pending",
-            "subtotal": order_data.get("subtotal", 0),
-            "tax": order_data.get("tax", 0),
-            "delivery_fee": order_data.get("delivery_fee", 0),
-            "total": order_data.get("total", 0),
-            "created_at": datetime.utcnow().isoformat()
-        }
-        
-        if storage.append_to_json_array("orders.txt", new_order):
+        """Create a new order, priced against the current menu"""
+        order_data = price_orders(MenuService.get_menu_index(), [order_data])[0]
+        new_order = build_order(order_data)
+        if get_backend().add_order(new_order):
+            orders_created([new_order])
             return new_order
         return {}
+
+    @staticmethod
+    def create_orders(orders_data: List[Dict]) -> List[Dict]:
+        """Create several orders with a single storage write, priced together in one batch"""
+        orders_data = price_orders(MenuService.get_menu_index(), orders_data)
+        new_orders = [build_order(order_data) for order_data in orders_data]
+        if get_backend().add_orders(new_orders):
+            orders_created(new_orders)
+            return new_orders
+        return []
+
+    @staticmethod
+    def import_orders(orders_data: List[Dict], atomic: bool = False) -> List[Dict]:
+        """Price a batch of orders together and store the accepted ones in one write
+
+        Returns one result per order request instead of failing the whole batch
+        on the first bad order, unless atomic is set.
+        """
+        quotes = quote_orders(MenuService.get_menu_index(), orders_data)
+        new_orders, results = build_order_batch(orders_data, quotes, atomic)
+        if new_orders and not get_backend().add_orders(new_orders):
+            return batch_write_failed(results)
+        orders_created(new_orders)
+        return results
     
     @staticmethod
     def get_order_by_id(order_id: str) -> Optional[Dict]:
         """Get order by ID"""
-        orders = storage.read_json_file("orders.txt")
-        for order in orders:
-            if order.get("id") == order_id:
-                return order
-        return None
+        return get_backend().get_order(order_id)
+
+    @staticmethod
+    def update_order_status(order_id: str, status: str) -> Optional[Dict]:
+        """Move an order to its next status and notify subscribers, or return None if it does not exist"""
+        order = get_backend().get_order(order_id)
+        if order is None:
+            return None
+        check_status_transition(order.get("status"), status)
+        updated = get_backend().update_order_status(order_id, order["status"], status)
+        if updated is not None:
+            order_updated(updated)
+        return updated
+
+    @staticmethod
+    def get_active_orders(status: Optional[str] = None) -> List[CompactOrder]:
+        """Get recent orders that are not completed yet, oldest first, from the in-memory working set"""
+        if status is not None and status not in ACTIVE_STATUSES:
+            raise ValueError(f"Active orders have one of the statuses {ACTIVE_STATUSES}")
+        sync_active_orders()
+        return active_orders.list(status)
     
     @staticmethod
     def get_all_orders() -> List[Dict]:
         """Get all orders"""
-        return storage.read_json_file("orders.txt")
+        return list(get_backend().iter_orders())
+
+    @staticmethod
+    def list_orders(cursor: Optional[str] = None, limit: int = 100, **filters) -> Dict:
+        """Get one page of orders matching the filters accepted by order_filter"""
+        orders, next_cursor = get_backend().list_orders(cursor, limit, **filters)
+        return {"orders": orders, "next_cursor": next_cursor}
+
+    @staticmethod
+    def iter_orders(**filters) -> Iterator[Dict]:
+        """Stream every order matching the filters accepted by order_filter"""
+        return get_backend().iter_orders(**filters)
 
 class RestaurantService:
     @staticmethod
     def get_restaurant_info() -> Dict:
         """Get restaurant information"""
-        return storage.read_json_file("restaurant_info.txt")
+        return get_backend().get_document("restaurant_info")
+
+    @staticmethod
+    def get_restaurant_info_snapshot() -> Dict[str, Any]:
+        """Get restaurant information together with its content digest and modification time"""
+        return get_backend().get_document_snapshot("restaurant_info")
 
 class ContactService:
     @staticmethod
     def submit_contact_message(message_data: Dict) -> Dict:
         """Submit a contact message"""
-        message_id = f"msg_{uuid.uuid4().hex[:8]}"
-        new_message = {
-            "id": message_id,
-            "name": message_data.get("name", ""),
-            "email": message_data.get("email", ""),
-            "phone": message_data.get("phone", ""),
-            "subject": message_data.get("subject", ""),
-            "message": message_data.get("message", ""),
-            "created_at": datetime.utcnow().isoformat()
-        }
-        
-        if storage.append_to_json_array("contact_messages.txt", new_message):
-            return {
-                "success": True,
-                "message": "Thank you for contacting us! We'll get back to you within 24 hours.",
-                "message_id": message_id
-            }
-        return {
-            "success": False,
-            "message": "Failed to submit message. Please try again."
-        }
+        new_message = build_contact_message(message_data)
+        stored = get_backend().add_message(new_message)
+        return contact_result(new_message["id"] if stored else None)
     
     @staticmethod
     def get_all_messages() -> List[Dict]:
         """Get all contact messages (for admin purposes)"""
-        return storage.read_json_file("contact_messages.txt")
\ No newline at end of file
+        return list(get_backend().iter_messages())
+
+    @staticmethod
+    def list_messages(cursor: Optional[str] = None, limit: int = 100,
+                      created_from: Optional[str] = None, created_to: Optional[str] = None) -> Dict:
+        """Get one page of contact messages (for admin purposes)"""
+        messages, next_cursor = get_backend().list_messages(cursor, limit, created_from, created_to)
+        return {"messages": messages, "next_cursor": next_cursor}
+
+    @staticmethod
+    def iter_messages(created_from: Optional[str] = None, created_to: Optional[str] = None) -> Iterator[Dict]:
+        """Stream contact messages created within the given range (for admin purposes)"""
+        return get_backend().iter_messages(created_from, created_to)
+
+def check_day(day: Optional[str]) -> str:
+    """Validate a "YYYY-MM-DD" analytics day, defaulting to today (UTC)"""
+    if day is None:
+        return datetime.utcnow().strftime("%Y-%m-%d")
+    try:
+        datetime.strptime(day, "%Y-%m-%d")
+    except ValueError:
+        raise ValueError(f"Invalid day '{day}', expected YYYY-MM-DD")
+    return day
+
+class AnalyticsService:
+    @staticmethod
+    def _aggregates():
+        backend = get_backend()
+        order_analytics.sync(backend.order_snapshot, backend.order_changes)
+        return order_analytics
+
+    @staticmethod
+    def get_daily(days: int = 7, until: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Get revenue, order counts and the pickup/delivery split for each of the last days days"""
+        return AnalyticsService._aggregates().daily(days, check_day(until))
+
+    @staticmethod
+    def get_hourly(day: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Get revenue, order counts and the pickup/delivery split for each hour of a day"""
+        return AnalyticsService._aggregates().hourly(check_day(day))
+
+    @staticmethod
+    def get_top_items(day: Optional[str] = None, limit: int = 10) -> List[Dict[str, Any]]:
+        """Get the best selling items of a day"""
+        return AnalyticsService._aggregates().top_items(check_day(day), limit)
+
+class KitchenService:
+    @staticmethod
+    def _queue():
+        # The queue follows the active orders working set
+        kitchen_queue.set_menu(MenuService.get_menu_index())
+        sync_active_orders()
+        return kitchen_queue
+
+    @staticmethod
+    def get_queue() -> List[Dict[str, Any]]:
+        """Get the pending and preparing orders in the order the kitchen should work on them"""
+        return KitchenService._queue().queue()
+
+    @staticmethod
+    def get_order_eta(order_id: str) -> Optional[Dict[str, Any]]:
+        """Get an order's place in the kitchen queue and estimated ready time, or None if it is not queued"""
+        return KitchenService._queue().eta(order_id)
+
+class CacheService:
+    @staticmethod
+    def get_stats() -> Dict[str, Any]:
+        """Get menu/restaurant info cache counters (for admin purposes)"""
+        return get_backend().document_stats()
+
+    @staticmethod
+    def reload() -> Dict[str, Any]:
+        """Reload menu and restaurant info from their source (for admin purposes)"""
+        get_backend().reload_documents()
+        return get_backend().document_stats()
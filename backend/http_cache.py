@@ -0,0 +1,46 @@
+import os
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Dict, Optional
+
+from fastapi import Request, Response
+
+HTTP_CACHE_MAX_AGE = int(os.environ.get("HTTP_CACHE_MAX_AGE", "60"))
+
+def make_etag(digest: str, variant: Optional[str] = None) -> str:
+    """Build a strong ETag from a content digest, optionally for a derived representation"""
+    return f'"{digest}-{variant}"' if variant else f'"{digest}"'
+
+def cache_headers(etag: str, last_modified: float) -> Dict[str, str]:
+    """Validator and freshness headers for a cacheable response"""
+    return {
+        "ETag": etag,
+        "Last-Modified": formatdate(int(last_modified), usegmt=True),
+        "Cache-Control": f"public, max-age={HTTP_CACHE_MAX_AGE}",
+    }
+
+def is_not_modified(request: Request, etag: str, last_modified: float) -> bool:
+    """Evaluate If-None-Match / If-Modified-Since against the current representation"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # If-None-Match takes precedence; comparison is weak, so W/ prefixes are ignored
+        tags = [tag.strip() for tag in if_none_match.split(",")]
+        tags = [tag[2:] if tag.startswith("W/") else tag for tag in tags]
+        return "*" in tags or etag in tags
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+        return int(last_modified) <= since
+    return False
+
+def conditional_response(request: Request, response: Response, etag: str,
+                         last_modified: float) -> Optional[Response]:
+    """Attach cache headers to response, or return a 304 if the client copy is current"""
+    headers = cache_headers(etag, last_modified)
+    if is_not_modified(request, etag, last_modified):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
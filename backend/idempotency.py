@@ -0,0 +1,159 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import nullcontext
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from file_lock import atomic_write, file_lock
+from json_codec import dumps_lines, loads
+
+# Seconds a key keeps returning the order it created
+IDEMPOTENCY_TTL = float(os.environ.get("IDEMPOTENCY_TTL", "86400"))
+# Most keys remembered at once; the oldest are forgotten first
+IDEMPOTENCY_MAX_KEYS = int(os.environ.get("IDEMPOTENCY_MAX_KEYS", "100000"))
+# Seconds a key stays claimed by a request that never finishes, e.g. a crashed worker
+IDEMPOTENCY_CLAIM_TTL = float(os.environ.get("IDEMPOTENCY_CLAIM_TTL", "60"))
+# Keep the keys in a file in the data directory so every worker process sees them
+IDEMPOTENCY_PERSIST = os.environ.get("IDEMPOTENCY_PERSIST", "false").lower() in ("1", "true", "yes")
+
+class IdempotencyKeyInProgress(ValueError):
+    """Raised when a request with the same key has not finished yet"""
+
+class IdempotencyKeyMismatch(ValueError):
+    """Raised when a key is reused for a different request"""
+
+def request_fingerprint(data: Any) -> str:
+    """Hash of a request body, to tell a retry from a different request under the same key"""
+    canonical = json.dumps(data, sort_keys=True, separators=(",", ":")).encode('utf-8')
+    return hashlib.sha256(canonical).hexdigest()
+
+class IdempotencyStore:
+    """Bounded Idempotency-Key -> order id map whose entries expire after ttl seconds
+
+    begin() claims a key for a new request or returns the order id a
+    previous request with that key created; complete() records that id and
+    release() gives up a claim after a failure. With a path, every change
+    is appended to that file under a file lock and each process replays the
+    appends of the others before answering, so keys are shared by all
+    uvicorn workers. The file is rewritten with only the live entries once
+    most of its lines are stale.
+    """
+
+    def __init__(self, ttl: float = IDEMPOTENCY_TTL, max_keys: int = IDEMPOTENCY_MAX_KEYS,
+                 path: Optional[Path] = None, claim_ttl: float = IDEMPOTENCY_CLAIM_TTL):
+        self.ttl = ttl
+        self.max_keys = max_keys
+        self.claim_ttl = claim_ttl
+        self.path = Path(path) if path is not None else None
+        self._lock = threading.Lock()
+        # key -> (fingerprint, order id or None while claimed, expiry as a Unix time)
+        self._entries: "OrderedDict[str, Tuple[str, Optional[str], float]]" = OrderedDict()
+        self._read = 0
+        self._lines = 0
+        self._inode: Optional[int] = None
+
+    def _locked(self):
+        return file_lock(self.path) if self.path is not None else nullcontext()
+
+    def _apply(self, key: str, fingerprint: str, order_id: Optional[str], expires: float, now: float):
+        self._entries.pop(key, None)
+        if expires > now:
+            self._entries[key] = (fingerprint, order_id, expires)
+        while self._entries:
+            oldest_key, (_, _, oldest_expires) = next(iter(self._entries.items()))
+            if len(self._entries) <= self.max_keys and oldest_expires > now:
+                break
+            del self._entries[oldest_key]
+
+    def _catch_up(self, now: float):
+        """Replay entries appended to the file by any process since the last call"""
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
+            self._entries.clear()
+            self._read = self._lines = 0
+            self._inode = None
+            return
+        if stat.st_ino != self._inode or stat.st_size < self._read:
+            # Rewritten by another process; start over
+            self._entries.clear()
+            self._read = self._lines = 0
+            self._inode = stat.st_ino
+        if stat.st_size == self._read:
+            return
+        with open(self.path, 'rb') as f:
+            f.seek(self._read)
+            data = f.read()
+        complete = data.rfind(b"\n") + 1
+        for line in data[:complete].splitlines():
+            try:
+                entry = loads(line)
+            except ValueError:
+                continue
+            self._apply(entry["k"], entry.get("f", ""), entry.get("o"), entry.get("e", 0), now)
+            self._lines += 1
+        self._read += complete
+
+    def _record(self, key: str, fingerprint: str, order_id: Optional[str], expires: float, now: float):
+        self._apply(key, fingerprint, order_id, expires, now)
+        if self.path is None:
+            return
+        entries: List[Dict] = [{"k": key, "f": fingerprint, "o": order_id, "e": expires}]
+        if self._lines > 2 * len(self._entries) + 1000:
+            entries = [{"k": k, "f": f, "o": o, "e": e} for k, (f, o, e) in self._entries.items()]
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            atomic_write(self.path, dumps_lines(entries), fsync=False)
+            stat = self.path.stat()
+            self._inode, self._read, self._lines = stat.st_ino, stat.st_size, len(entries)
+            return
+        payload = dumps_lines(entries)
+        with open(self.path, 'ab') as f:
+            f.write(payload)
+        if self._inode is None:
+            self._inode = self.path.stat().st_ino
+        self._read += len(payload)
+        self._lines += 1
+
+    def begin(self, key: str, fingerprint: str) -> Optional[str]:
+        """Claim key for a new request, or return the id of the order already created with it
+
+        Raises IdempotencyKeyInProgress while another request holds the key
+        and IdempotencyKeyMismatch if the key was used for a different body.
+        """
+        with self._lock, self._locked():
+            now = time.time()
+            if self.path is not None:
+                self._catch_up(now)
+            entry = self._entries.get(key)
+            if entry is not None and entry[2] > now:
+                stored_fingerprint, order_id, _ = entry
+                if stored_fingerprint != fingerprint:
+                    raise IdempotencyKeyMismatch(key)
+                if order_id is None:
+                    raise IdempotencyKeyInProgress(key)
+                return order_id
+            self._record(key, fingerprint, None, now + self.claim_ttl, now)
+            return None
+
+    def complete(self, key: str, fingerprint: str, order_id: str):
+        """Remember the order created by the request that claimed key"""
+        with self._lock, self._locked():
+            now = time.time()
+            if self.path is not None:
+                self._catch_up(now)
+            self._record(key, fingerprint, order_id, now + self.ttl, now)
+
+    def release(self, key: str):
+        """Drop the claim on key after its request failed, so a retry can run again"""
+        with self._lock, self._locked():
+            now = time.time()
+            if self.path is not None:
+                self._catch_up(now)
+            self._record(key, "", None, 0, now)
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,73 @@
+import json
+import os
+from importlib.util import find_spec
+from typing import Any, Iterable, Union
+
+# orjson and msgspec are optional; only the selected codec is imported
+FAST_CODECS = tuple(name for name in ("orjson", "msgspec") if find_spec(name) is not None)
+
+# "stdlib" uses the json module everywhere; "fast" uses orjson, or msgspec,
+# when installed and falls back to stdlib otherwise; "orjson" and "msgspec"
+# pick one explicitly
+JSON_CODEC = os.environ.get("JSON_CODEC", "stdlib").lower()
+
+def _select_codec(name: str) -> str:
+    if name not in ("stdlib", "fast", "orjson", "msgspec"):
+        raise ValueError(f"Unknown JSON codec '{name}'")
+    if name in ("orjson", "msgspec") and name not in FAST_CODECS:
+        raise ValueError(f"JSON_CODEC is '{name}' but {name} is not installed")
+    if name == "fast":
+        return FAST_CODECS[0] if FAST_CODECS else "stdlib"
+    return name
+
+# The codec actually in use
+CODEC = _select_codec(JSON_CODEC)
+
+# Every codec provides dumps(obj) -> compact UTF-8 bytes, dumps_lines(records)
+# -> JSON Lines bytes and loads(bytes or str), raising ValueError on bad input
+if CODEC == "orjson":
+    import orjson
+
+    # Dict keys that are not strings (e.g. item ids) are written as strings, like json.dumps does
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+    def dumps(obj: Any) -> bytes:
+        return orjson.dumps(obj, option=_ORJSON_OPTIONS)
+
+    def dumps_lines(records: Iterable[Any]) -> bytes:
+        options = _ORJSON_OPTIONS | orjson.OPT_APPEND_NEWLINE
+        return b"".join([orjson.dumps(record, option=options) for record in records])
+
+    def loads(data: Union[bytes, str]) -> Any:
+        # orjson.JSONDecodeError is a json.JSONDecodeError, so a ValueError
+        return orjson.loads(data)
+
+elif CODEC == "msgspec":
+    import msgspec
+
+    _encoder = msgspec.json.Encoder()
+    _decoder = msgspec.json.Decoder()
+
+    def dumps(obj: Any) -> bytes:
+        return _encoder.encode(obj)
+
+    def dumps_lines(records: Iterable[Any]) -> bytes:
+        return b"".join([_encoder.encode(record) + b"\n" for record in records])
+
+    def loads(data: Union[bytes, str]) -> Any:
+        try:
+            return _decoder.decode(data)
+        except msgspec.DecodeError as e:
+            raise ValueError(str(e)) from e
+
+else:
+    def dumps(obj: Any) -> bytes:
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode('utf-8')
+
+    def dumps_lines(records: Iterable[Any]) -> bytes:
+        return "".join(
+            json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n" for record in records
+        ).encode('utf-8')
+
+    def loads(data: Union[bytes, str]) -> Any:
+        return json.loads(data)
@@ -0,0 +1,238 @@
+import heapq
+import os
+import sys
+import threading
+import time
+from bisect import bisect_left, insort
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from menu_index import MenuIndex
+from order_records import active_orders
+
+# Orders the kitchen works on at the same time
+KITCHEN_STATIONS = int(os.environ.get("KITCHEN_STATIONS", "2"))
+# Minutes added to an order's prep time for every unit after the first
+KITCHEN_EXTRA_ITEM_MINUTES = float(os.environ.get("KITCHEN_EXTRA_ITEM_MINUTES", "1"))
+# Prep minutes for menu items that do not set prep_minutes, by category
+DEFAULT_PREP_MINUTES = {"pizza": 15, "chicken": 12}
+FALLBACK_PREP_MINUTES = 10
+# Seconds a computed schedule is reused while no order changes
+SCHEDULE_MAX_AGE = 1.0
+# Orders estimated to be ready at most this many seconds after their promised time are not late
+LATE_AFTER_SECONDS = 60
+
+QUEUED_STATUSES = ("pending", "preparing")
+EPOCH = datetime(1970, 1, 1)
+
+def _seconds(timestamp: Optional[str]) -> Optional[float]:
+    """Seconds since the epoch of a naive UTC ISO 8601 timestamp"""
+    return (datetime.fromisoformat(timestamp) - EPOCH).total_seconds() if timestamp else None
+
+def _isoformat(seconds: Optional[float]) -> Optional[str]:
+    return (EPOCH + timedelta(seconds=seconds)).isoformat() if seconds is not None else None
+
+class Ticket:
+    """What the kitchen needs to know about one queued order"""
+
+    __slots__ = ("id", "status", "order_type", "items", "lines", "created", "started", "prep", "promised")
+
+    def __init__(self, order: Dict):
+        self.id = order["id"]
+        self.status = sys.intern(order.get("status", "pending"))
+        self.order_type = sys.intern(order.get("order_type", "pickup"))
+        self.items = tuple((sys.intern(item.get("name", "")), int(item.get("quantity", 0)))
+                           for item in order.get("items") or ())
+        # (item id, category, quantity), to work out the prep time from the menu
+        self.lines = tuple((item.get("id"), item.get("category"), int(item.get("quantity", 0)))
+                           for item in order.get("items") or ())
+        self.created = _seconds(order.get("created_at")) or time.time()
+        # A preparing order was started when its status last changed
+        self.started = (_seconds(order.get("updated_at")) or self.created) if self.status == "preparing" else None
+        self.prep = 0.0
+        self.promised = self.created
+
+    def set_prep(self, prep: float):
+        self.prep = prep
+        # The order is promised for when it would be ready with the kitchen to itself
+        self.promised = self.created + prep
+
+    @property
+    def key(self) -> Tuple[float, float, str]:
+        return self.promised, self.created, self.id
+
+    def to_dict(self, position: int, ready: float) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "status": self.status,
+            "order_type": self.order_type,
+            "items": [{"name": name, "quantity": quantity} for name, quantity in self.items],
+            "position": position,
+            "prep_minutes": round(self.prep / 60, 1),
+            "created_at": _isoformat(self.created),
+            "started_at": _isoformat(self.started),
+            "promised_at": _isoformat(self.promised),
+            "estimated_ready_at": _isoformat(ready),
+            "late": ready > self.promised + LATE_AFTER_SECONDS,
+        }
+
+class Schedule:
+    """Ready times of the queue in kitchen order, worked out only as far as a read needs"""
+
+    __slots__ = ("computed_at", "stations", "entries", "next_pending")
+
+    def __init__(self, now: float, preparing: List[Ticket], stations: int):
+        self.computed_at = now
+        ready = sorted(((max(now, ticket.started + ticket.prep), ticket) for ticket in preparing),
+                       key=lambda entry: entry[0])
+        # Stations free up as the orders being prepared finish
+        self.stations = [at for at, _ in ready] + [now] * max(stations - len(ready), 0)
+        heapq.heapify(self.stations)
+        self.entries: List[Tuple[Ticket, float]] = [(ticket, at) for at, ticket in ready]
+        self.next_pending = 0
+
+    def extend(self, pending: List[Tuple[float, float, str]], tickets: Dict[str, Ticket], until: int):
+        """Schedule the pending orders up to index until"""
+        stations, entries = self.stations, self.entries
+        while self.next_pending < until:
+            ticket = tickets[pending[self.next_pending][2]]
+            ready = heapq.heappop(stations) + ticket.prep
+            heapq.heappush(stations, ready)
+            entries.append((ticket, ready))
+            self.next_pending += 1
+
+class KitchenQueue:
+    """Pending and preparing orders ordered by promised time, with estimated ready times
+
+    The queue follows the ActiveOrders working set, which hands it every
+    load, change and removal, so it never reads storage itself. Pending
+    orders are kept in a list sorted by promised time (created_at plus prep
+    time), updated in place as orders come and go. Prep time is the
+    longest item's prep_minutes from the menu plus
+    KITCHEN_EXTRA_ITEM_MINUTES per extra unit. Ready times come from
+    handing the pending orders, earliest promise first, to KITCHEN_STATIONS
+    stations behind the orders already being prepared. That schedule is
+    shared by every read until the queue changes, and is only worked out
+    as far as the position a read asks about.
+    """
+
+    def __init__(self, stations: int = KITCHEN_STATIONS):
+        self.stations = max(1, stations)
+        self._lock = threading.Lock()
+        self._tickets: Dict[str, Ticket] = {}
+        # (promised, created, order id) of the pending orders, sorted
+        self._pending: List[Tuple[float, float, str]] = []
+        self._preparing: Dict[str, Ticket] = {}
+        self._prep_minutes: Dict[Any, float] = {}
+        self._menu_version: Optional[int] = None
+        self._schedule: Optional[Schedule] = None
+
+    def set_menu(self, index: MenuIndex):
+        """Take per-item prep times from the menu; queued orders keep the prep time they were given
+
+        Orders queued before any menu was set get their prep time now.
+        """
+        if index.version == self._menu_version:
+            return
+        with self._lock:
+            self._prep_minutes = {item_id: float(item["prep_minutes"]) for item_id, item in index.by_id.items()
+                                  if isinstance(item.get("prep_minutes"), (int, float))}
+            first_menu, self._menu_version = self._menu_version is None, index.version
+            if first_menu and self._tickets:
+                tickets = list(self._tickets.values())
+                self._tickets, self._pending, self._preparing = {}, [], {}
+                for ticket in tickets:
+                    self._add_locked(ticket)
+                self._schedule = None
+
+    def prep_seconds(self, lines: Iterable[Tuple[Any, Any, int]]) -> float:
+        """Estimated time to prepare an order's (item id, category, quantity) lines, in seconds"""
+        longest, units = 0.0, 0
+        for item_id, category, quantity in lines:
+            minutes = self._prep_minutes.get(item_id)
+            if minutes is None:
+                minutes = DEFAULT_PREP_MINUTES.get(category, FALLBACK_PREP_MINUTES)
+            longest = max(longest, minutes)
+            units += quantity
+        return (longest + KITCHEN_EXTRA_ITEM_MINUTES * max(units - 1, 0)) * 60
+
+    def _add_locked(self, ticket: Ticket):
+        ticket.set_prep(self.prep_seconds(ticket.lines))
+        self._tickets[ticket.id] = ticket
+        if ticket.status == "preparing":
+            self._preparing[ticket.id] = ticket
+        else:
+            insort(self._pending, ticket.key)
+
+    def _remove_locked(self, order_id: str):
+        ticket = self._tickets.pop(order_id, None)
+        if ticket is None:
+            return
+        if self._preparing.pop(order_id, None) is None:
+            key = ticket.key
+            position = bisect_left(self._pending, key)
+            if position < len(self._pending) and self._pending[position] == key:
+                del self._pending[position]
+
+    def load(self, orders: Iterable[Dict]):
+        """Replace the queue with the pending and preparing orders among orders"""
+        with self._lock:
+            self._tickets, self._pending, self._preparing = {}, [], {}
+            for order in orders:
+                if order.get("status") in QUEUED_STATUSES:
+                    self._add_locked(Ticket(order))
+            self._schedule = None
+
+    def apply(self, orders: Iterable[Dict]):
+        """Queue new orders and move changed ones, dropping those that are ready or completed"""
+        with self._lock:
+            for order in orders:
+                self._remove_locked(order["id"])
+                if order.get("status") in QUEUED_STATUSES:
+                    self._add_locked(Ticket(order))
+            self._schedule = None
+
+    def remove(self, order_ids: Iterable[str]):
+        """Drop orders, e.g. ones that aged out of the active orders window"""
+        with self._lock:
+            for order_id in order_ids:
+                self._remove_locked(order_id)
+            self._schedule = None
+
+    def _scheduled_locked(self, until: Optional[int] = None) -> Schedule:
+        """The schedule with at least the first until pending orders (all of them by default) worked out"""
+        now = time.time()
+        schedule = self._schedule
+        if schedule is None or now - schedule.computed_at >= SCHEDULE_MAX_AGE:
+            schedule = self._schedule = Schedule(now, list(self._preparing.values()), self.stations)
+        schedule.extend(self._pending, self._tickets, len(self._pending) if until is None else until)
+        return schedule
+
+    def queue(self) -> List[Dict[str, Any]]:
+        """Every queued order in the order the kitchen should work on them"""
+        with self._lock:
+            entries = list(self._scheduled_locked().entries)
+        return [ticket.to_dict(position, ready) for position, (ticket, ready) in enumerate(entries, 1)]
+
+    def eta(self, order_id: str) -> Optional[Dict[str, Any]]:
+        """Queue position and estimated ready time of one order, or None if it is not queued"""
+        with self._lock:
+            ticket = self._tickets.get(order_id)
+            if ticket is None:
+                return None
+            if ticket.status == "preparing":
+                entries = self._scheduled_locked(0).entries
+                index = next(i for i, (entry, _) in enumerate(entries) if entry is ticket)
+            else:
+                # Preparing orders come first, then the pending ones in promised order
+                pending_index = bisect_left(self._pending, ticket.key)
+                entries = self._scheduled_locked(pending_index + 1).entries
+                index = len(self._preparing) + pending_index
+            ready = entries[index][1]
+        return ticket.to_dict(index + 1, ready)
+
+    def __len__(self) -> int:
+        return len(self._tickets)
+
+kitchen_queue = KitchenQueue()
+active_orders.subscribe(kitchen_queue)
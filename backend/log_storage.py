@@ -0,0 +1,505 @@
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterator, KeysView, List, Optional, Tuple
+
+from file_lock import atomic_write, file_lock
+from json_codec import dumps_lines, loads
+from metrics import STORAGE_BYTES_READ, STORAGE_BYTES_WRITTEN, STORAGE_SERIALIZE_SECONDS, STORAGE_WRITE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+FSYNC_POLICIES = ("always", "group", "interval", "never")
+
+class JsonLinesLog:
+    """Append-only log file storing one JSON record per line
+
+    Appends are serialized across threads and worker processes with a file
+    lock. The fsync policy controls durability: "always" syncs every append,
+    "group" lets concurrent appenders share a single fsync, "interval" syncs
+    at most every fsync_interval seconds and "never" leaves it to the OS.
+    """
+
+    def __init__(self, file_path: Path, legacy_path: Optional[Path] = None,
+                 fsync: str = "always", fsync_interval: float = 1.0,
+                 index_key: Optional[str] = None):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"fsync policy must be one of {FSYNC_POLICIES}, got '{fsync}'")
+        self.file_path = Path(file_path)
+        self.legacy_path = Path(legacy_path) if legacy_path else None
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+        self.index = OffsetIndex(self.file_path, index_key) if index_key else None
+        self._lock = threading.Lock()
+        self._last_fsync = 0.0
+        self._migrated = False
+        # Group commit bookkeeping: appends written vs. appends known durable
+        self._commit_cond = threading.Condition()
+        self._written = 0
+        self._synced = 0
+        self._syncing = False
+
+    def _ensure_migrated(self):
+        """Import the legacy JSON array file the first time the log is touched"""
+        if self._migrated:
+            return
+        with self._lock:
+            if not self._migrated:
+                if self.legacy_path is not None and not self.file_path.exists():
+                    # Another process may be migrating or already appending; check again under its lock
+                    with file_lock(self.file_path):
+                        if not self.file_path.exists():
+                            migrate_json_array(self.legacy_path, self.file_path)
+                self._migrated = True
+
+    def _should_fsync(self) -> bool:
+        if self.fsync == "always":
+            return True
+        if self.fsync == "interval":
+            now = time.monotonic()
+            if now - self._last_fsync >= self.fsync_interval:
+                self._last_fsync = now
+                return True
+        return False
+
+    def _group_commit(self, ticket: int):
+        """Wait until append number ticket is on disk, syncing on behalf of others if needed"""
+        with self._commit_cond:
+            while self._synced < ticket:
+                if self._syncing:
+                    self._commit_cond.wait()
+                    continue
+                self._syncing = True
+                target = self._written
+                self._commit_cond.release()
+                try:
+                    fd = os.open(self.file_path, os.O_RDONLY)
+                    try:
+                        os.fsync(fd)
+                    finally:
+                        os.close(fd)
+                finally:
+                    self._commit_cond.acquire()
+                    self._syncing = False
+                    self._commit_cond.notify_all()
+                self._synced = max(self._synced, target)
+
+    def append(self, record: Dict) -> bool:
+        """Append a single record to the end of the log"""
+        return self.append_many([record])
+
+    def append_many(self, records: List[Dict]) -> bool:
+        """Append several records with a single write and at most one fsync"""
+        self._ensure_migrated()
+        payload = self._serialize(records)
+        try:
+            with self._lock:
+                with STORAGE_WRITE_SECONDS.time(self.file_path.name), file_lock(self.file_path):
+                    self._write(payload)
+                ticket = self._written_locked(payload)
+            if self.fsync == "group":
+                self._group_commit(ticket)
+            return True
+        except OSError as e:
+            logger.exception(f"Error appending to {self.file_path.name}: {e}")
+            return False
+
+    def update(self, key: str, change: Callable[[Dict], Dict]) -> Optional[Dict]:
+        """Append a new version of the record stored under key, computed by change from the current one
+
+        The read and the append happen under the log's write lock, so updates
+        from any thread or worker process are serialized. The new version
+        supersedes the old one in get() and scan(). Returns None for unknown
+        keys; exceptions raised by change abort the update.
+        """
+        if self.index is None:
+            raise ValueError(f"{self.file_path.name} is not indexed")
+        self._ensure_migrated()
+        with self._lock:
+            with STORAGE_WRITE_SECONDS.time(self.file_path.name), file_lock(self.file_path):
+                current = self.index.get(key)
+                if current is None:
+                    return None
+                record = change(current)
+                payload = self._serialize([record])
+                self._write(payload)
+            ticket = self._written_locked(payload)
+        if self.fsync == "group":
+            self._group_commit(ticket)
+        return record
+
+    def _serialize(self, records: List[Dict]) -> bytes:
+        with STORAGE_SERIALIZE_SECONDS.time(self.file_path.name):
+            return dumps_lines(records)
+
+    def _write(self, payload: bytes):
+        """Append payload to the log file; the caller holds the thread and file locks
+
+        A torn final line left by an interrupted append is closed off with a
+        newline first, so the new records start on a line of their own
+        instead of being glued onto it (readers skip the torn line).
+        """
+        with open(self.file_path, 'a+b') as f:
+            if f.seek(0, os.SEEK_END) > 0:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    payload = b"\n" + payload
+            f.write(payload)
+            f.flush()
+            if self.fsync != "group" and self._should_fsync():
+                os.fsync(f.fileno())
+
+    def _written_locked(self, payload: bytes) -> int:
+        """Account for a finished write under the thread lock, returning its group commit ticket"""
+        STORAGE_BYTES_WRITTEN.inc(self.file_path.name, amount=len(payload))
+        if self.index is not None:
+            self.index.catch_up()
+        self._written += 1
+        return self._written
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Fetch a single record by its index key, reading only that record from disk"""
+        if self.index is None:
+            raise ValueError(f"{self.file_path.name} is not indexed")
+        self._ensure_migrated()
+        with self._lock:
+            return self.index.get(key)
+
+    def keys(self) -> KeysView:
+        """Keys of the records currently in the log"""
+        if self.index is None:
+            raise ValueError(f"{self.file_path.name} is not indexed")
+        self._ensure_migrated()
+        with self._lock:
+            self.index.catch_up()
+            return self.index.offsets.keys()
+
+    def position(self) -> Tuple[Optional[int], int]:
+        """Where the log ends now, as (inode, offset), for reading what is appended later with read_since()"""
+        if self.index is None:
+            raise ValueError(f"{self.file_path.name} is not indexed")
+        self._ensure_migrated()
+        with self._lock:
+            self.index.catch_up()
+            return self.index.inode, self.index.indexed_end
+
+    def read_since(self, position: Tuple[Optional[int], int]) -> Optional[Tuple[List[Dict], Tuple[Optional[int], int]]]:
+        """Every record version appended after position, oldest first, and the position after them
+
+        Returns None if the log was replaced, e.g. by compaction, since
+        position was taken; offsets from the old file mean nothing then.
+        """
+        inode, offset = position
+        current = self.position()
+        if current[0] != inode or current[1] < offset:
+            return None
+        if current[1] == offset:
+            return [], current
+        return [record for _, record in self._read(offset, None, current[1])], current
+
+    def snapshot(self) -> Tuple[Iterator[Dict], Tuple[Optional[int], int]]:
+        """Iterate over the current records as of now, and the position they are current up to"""
+        if self.index is None:
+            raise ValueError(f"{self.file_path.name} is not indexed")
+        self._ensure_migrated()
+        with self._lock:
+            self.index.catch_up()
+            latest, end, inode = self.index.offsets, self.index.indexed_end, self.index.inode
+        records = (record for _, record in self._read(0, latest, end)) if end else iter(())
+        return records, (inode, end)
+
+    def rebuild_index(self) -> int:
+        """Rebuild the offset index from the log file, returning the number of keys"""
+        if self.index is None:
+            raise ValueError(f"{self.file_path.name} is not indexed")
+        self._ensure_migrated()
+        with self._lock:
+            self.index.rebuild()
+            return len(self.index.offsets)
+
+    def scan(self, offset: int = 0) -> Iterator[Tuple[int, Dict]]:
+        """Iterate over records starting at a byte offset, yielding (next_offset, record)
+
+        next_offset is where the following record starts, so it can be handed
+        back to scan() later to resume from that point. On an indexed log only
+        the current version of each record is yielded, and records appended
+        after the scan started are left for the next scan.
+        """
+        self._ensure_migrated()
+        if not self.file_path.exists():
+            return
+        latest, end = None, None
+        if self.index is not None:
+            with self._lock:
+                self.index.catch_up()
+                latest, end = self.index.offsets, self.index.indexed_end
+        yield from self._read(offset, latest, end)
+
+    def _read(self, offset: int, latest: Optional[Dict[str, int]], end: Optional[int]) -> Iterator[Tuple[int, Dict]]:
+        """Yield (next_offset, record) from offset up to end, skipping versions superseded in latest"""
+        start = offset
+        try:
+            with open(self.file_path, 'rb') as f:
+                f.seek(offset)
+                for line in f:
+                    if not line.endswith(b"\n") or (end is not None and offset >= end):
+                        # A torn final line from an interrupted append is skipped
+                        break
+                    record_offset = offset
+                    offset += len(line)
+                    try:
+                        record = loads(line)
+                    except ValueError:
+                        continue
+                    if latest is not None and isinstance(record, dict):
+                        # Skip versions superseded before the scan started
+                        current = latest.get(str(record.get(self.index.key)), record_offset)
+                        if current != record_offset and current < end:
+                            continue
+                    yield offset, record
+        finally:
+            STORAGE_BYTES_READ.inc(self.file_path.name, amount=offset - start)
+
+    def compact(self, remove: Callable[[Dict], bool], sink: Callable[[List[Dict]], None]) -> int:
+        """Move the records matching remove out of the log, returning how many were moved
+
+        Runs under the write lock: the current versions matching remove are
+        handed to sink (e.g. an archive) first, then the log is atomically
+        replaced by the remaining records, which also drops superseded
+        versions. If sink raises, the log is left untouched.
+        """
+        self._ensure_migrated()
+        if not self.file_path.exists():
+            return 0
+        with self._lock:
+            with STORAGE_WRITE_SECONDS.time(self.file_path.name), file_lock(self.file_path):
+                latest, end = None, None
+                if self.index is not None:
+                    self.index.catch_up()
+                    latest, end = self.index.offsets, self.index.indexed_end
+                kept, removed = [], []
+                for _, record in self._read(0, latest, end):
+                    (removed if remove(record) else kept).append(record)
+                if not removed:
+                    return 0
+                sink(removed)
+                payload = self._serialize(kept)
+                if self.index is not None:
+                    # Never leave an index pointing into the replaced log if we crash below
+                    self.index.discard()
+                atomic_write(self.file_path, payload)
+                STORAGE_BYTES_WRITTEN.inc(self.file_path.name, amount=len(payload))
+                if self.index is not None:
+                    self.index.rebuild()
+        return len(removed)
+
+    def size(self) -> int:
+        """Get the current size of the log file in bytes"""
+        self._ensure_migrated()
+        try:
+            return self.file_path.stat().st_size
+        except FileNotFoundError:
+            return 0
+
+    def __iter__(self) -> Iterator[Dict]:
+        """Iterate over all (current) records in the log, oldest first"""
+        for _, record in self.scan():
+            yield record
+
+class OffsetIndex:
+    """Persistent key -> byte offset index over a JSON Lines log
+
+    The index lives next to the log as "<log>.idx" with one "key<TAB>offset"
+    line per record. It is only a cache: records appended by other processes
+    are picked up by scanning the unindexed tail of the log, and the whole
+    index is rebuilt from the log if it is missing, found to be stale, or
+    the log file has been replaced (e.g. by compaction in another process).
+    Callers are responsible for serializing access within a process; the
+    index file itself is only read and written under file_lock(index_path).
+    """
+
+    def __init__(self, log_path: Path, key: str):
+        self.log_path = Path(log_path)
+        self.index_path = self.log_path.with_name(self.log_path.name + ".idx")
+        self.key = key
+        self.offsets: Dict[str, int] = {}
+        self.indexed_end = 0
+        self.inode: Optional[int] = None
+        # (inode, size) of the index file as last read or written here
+        self.index_signature: Optional[Tuple[int, int]] = None
+        self._loaded = False
+
+    def _log_inode(self) -> Optional[int]:
+        try:
+            return os.stat(self.log_path).st_ino
+        except FileNotFoundError:
+            return None
+
+    def _index_signature(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self.index_path)
+            return stat.st_ino, stat.st_size
+        except FileNotFoundError:
+            return None
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        self.inode = self._log_inode()
+        if not self.index_path.exists() or not self._load():
+            self.rebuild()
+        else:
+            self.catch_up()
+
+    def _load(self) -> bool:
+        """Load the index file, returning False if it does not match the log"""
+        offsets: Dict[str, int] = {}
+        with file_lock(self.index_path), open(self.index_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                key, sep, offset = line.rstrip("\n").rpartition("\t")
+                if not sep or not offset.isdigit():
+                    return False
+                offsets[key] = int(offset)
+            stat = os.fstat(f.fileno())
+            self.index_signature = stat.st_ino, stat.st_size
+        last_offset = max(offsets.values(), default=None)
+        indexed_end = 0
+        if last_offset is not None:
+            record_line = self._read_line(last_offset)
+            if not record_line.endswith(b"\n"):
+                return False
+            indexed_end = last_offset + len(record_line)
+        self.offsets = offsets
+        self.indexed_end = indexed_end
+        return True
+
+    def _read_line(self, offset: int) -> bytes:
+        try:
+            with open(self.log_path, 'rb') as f:
+                f.seek(offset)
+                line = f.readline()
+            STORAGE_BYTES_READ.inc(self.log_path.name, amount=len(line))
+            return line
+        except FileNotFoundError:
+            return b""
+
+    def _scan(self, start: int) -> List[Tuple[str, int]]:
+        """Collect (key, offset) pairs for every complete line from start to EOF"""
+        entries = []
+        if not self.log_path.exists():
+            return entries
+        with open(self.log_path, 'rb') as f:
+            f.seek(start)
+            offset = start
+            for line in f:
+                if not line.endswith(b"\n"):
+                    # Partially written record; index it once it is complete
+                    break
+                try:
+                    record = loads(line)
+                except ValueError:
+                    record = None
+                if isinstance(record, dict) and self.key in record:
+                    entries.append((str(record[self.key]), offset))
+                offset += len(line)
+            self.indexed_end = offset
+        return entries
+
+    def catch_up(self):
+        """Index records appended since the last scan, by this or any other process"""
+        if not self._loaded:
+            self._ensure_loaded()
+            return
+        if self._log_inode() != self.inode:
+            self.rebuild()
+            return
+        entries = self._scan(self.indexed_end)
+        if not entries:
+            return
+        for key, offset in entries:
+            self.offsets[key] = offset
+        self._write(entries)
+
+    def rebuild(self):
+        """Rebuild the index file from scratch by scanning the whole log"""
+        self._loaded = True
+        self.inode = self._log_inode()
+        self.indexed_end = 0
+        entries = self._scan(0)
+        self.offsets = dict(entries)
+        self._write()
+
+    def _write(self, entries: Optional[List[Tuple[str, int]]] = None):
+        """Append entries to the index file, or write out every offset if entries is None
+
+        Appending is only safe while the file is exactly as this instance last
+        left it. If another process rebuilt or extended it meanwhile, the file
+        may be missing records this instance indexed before, so it is written
+        out again from the offsets held here, which cover the log up to
+        indexed_end.
+        """
+        with file_lock(self.index_path):
+            if entries is not None and self._index_signature() == self.index_signature:
+                with open(self.index_path, 'a', encoding='utf-8') as f:
+                    f.write("".join(f"{key}\t{offset}\n" for key, offset in entries))
+            else:
+                ordered = sorted(self.offsets.items(), key=lambda item: item[1])
+                data = "".join(f"{key}\t{offset}\n" for key, offset in ordered).encode('utf-8')
+                atomic_write(self.index_path, data, fsync=False)
+            self.index_signature = self._index_signature()
+
+    def discard(self):
+        """Delete the index file, so it is rebuilt from the log on next use"""
+        try:
+            self.index_path.unlink()
+        except FileNotFoundError:
+            pass
+
+    def _lookup(self, key: str) -> Optional[Dict]:
+        offset = self.offsets.get(key)
+        if offset is None:
+            return None
+        try:
+            record = loads(self._read_line(offset))
+        except ValueError:
+            record = None
+        if isinstance(record, dict) and str(record.get(self.key)) == key:
+            return record
+        raise LookupError(key)
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Seek to and decode the record stored under key"""
+        self._ensure_loaded()
+        try:
+            # Pick up new records and newer versions of existing ones
+            self.catch_up()
+            return self._lookup(key)
+        except LookupError:
+            # The log was rewritten underneath the index
+            self.rebuild()
+            try:
+                return self._lookup(key)
+            except LookupError:
+                return None
+
+def migrate_json_array(source_path: Path, log_path: Path) -> int:
+    """Convert a JSON array file into a JSON Lines log, returning the record count
+
+    The caller holds file_lock(log_path), so no other process appends meanwhile.
+    """
+    source_path, log_path = Path(source_path), Path(log_path)
+    if not source_path.exists():
+        return 0
+    try:
+        with open(source_path, 'rb') as f:
+            records = loads(f.read())
+    except ValueError:
+        records = []
+    if not isinstance(records, list):
+        records = []
+
+    atomic_write(log_path, dumps_lines(records))
+    return len(records)
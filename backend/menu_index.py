@@ -0,0 +1,115 @@
+import re
+from bisect import bisect_left, bisect_right
+from typing import AbstractSet, Any, Dict, FrozenSet, List, Optional
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+def tokenize(text: Any) -> List[str]:
+    """Lowercase alphanumeric words of a piece of text"""
+    return TOKEN_PATTERN.findall(str(text).lower()) if text else []
+
+class MenuIndex:
+    """Lookup tables over a parsed menu document, built once per menu version
+
+    An index is never mutated after construction; when the menu changes a new
+    index is built and swapped in, so readers always see a consistent snapshot.
+    Search works on item positions in menu order: an inverted index maps each
+    word of a name or description to the items containing it, and positions
+    sorted by price turn a price range into two bisections.
+    """
+
+    def __init__(self, menu_data: Any, version: int = 0):
+        self.version = version
+        self.menu: Dict[str, List[Dict]] = menu_data if isinstance(menu_data, dict) else {}
+        self.by_id: Dict[int, Dict] = {}
+        self.by_category: Dict[str, List[Dict]] = {}
+        self.popular: List[Dict] = []
+        self.items: List[Dict] = []
+        postings: Dict[str, set] = {}
+        category_positions: Dict[str, set] = {}
+        priced = []
+
+        for category, items in self.menu.items():
+            self.by_category[category] = items
+            for item in items:
+                self.by_id[item.get('id')] = item
+                if item.get('popular'):
+                    self.popular.append(item)
+                position = len(self.items)
+                self.items.append(item)
+                category_positions.setdefault(category, set()).add(position)
+                for token in tokenize(item.get('name')) + tokenize(item.get('description')):
+                    postings.setdefault(token, set()).add(position)
+                price = item.get('price')
+                if isinstance(price, (int, float)) and not isinstance(price, bool):
+                    priced.append((price, position))
+
+        # word -> positions of the items containing it, with the words sorted for prefix lookups
+        self._postings: Dict[str, FrozenSet[int]] = {token: frozenset(p) for token, p in postings.items()}
+        self._vocabulary: List[str] = sorted(self._postings)
+        self._category_positions = {category: frozenset(p) for category, p in category_positions.items()}
+        self._popular_positions = frozenset(i for i, item in enumerate(self.items) if item.get('popular'))
+        self._not_popular_positions = frozenset(range(len(self.items))) - self._popular_positions
+        priced.sort()
+        self._prices: List[float] = [price for price, _ in priced]
+        self._by_price: List[int] = [position for _, position in priced]
+
+    def get_item(self, item_id: int) -> Optional[Dict]:
+        """Get a menu item by ID"""
+        return self.by_id.get(item_id)
+
+    def get_category(self, category: str) -> List[Dict]:
+        """Get the items in a category, or an empty list for unknown categories"""
+        return self.by_category.get(category, [])
+
+    def get_items(self, item_ids: List[int]) -> Dict[int, Optional[Dict]]:
+        """Resolve several item IDs at once, mapping unknown IDs to None"""
+        by_id = self.by_id
+        return {item_id: by_id.get(item_id) for item_id in item_ids}
+
+    def _matching(self, prefix: str) -> AbstractSet[int]:
+        """Positions of the items with a word starting with prefix"""
+        vocabulary = self._vocabulary
+        start = bisect_left(vocabulary, prefix)
+        end = start
+        while end < len(vocabulary) and vocabulary[end].startswith(prefix):
+            end += 1
+        if end - start == 1:
+            return self._postings[vocabulary[start]]
+        return frozenset().union(*(self._postings[token] for token in vocabulary[start:end]))
+
+    def search(self, text: Optional[str] = None, min_price: Optional[float] = None,
+               max_price: Optional[float] = None, popular: Optional[bool] = None,
+               category: Optional[str] = None) -> List[Dict]:
+        """Items matching every given filter, in menu order
+
+        Each word of text must start a word of the item's name or
+        description, so partially typed queries already match. Text with
+        no words at all (only punctuation) matches nothing; empty or blank
+        text is no filter.
+        """
+        words = set(tokenize(text))
+        if not words and text and text.strip():
+            return []
+        filters: List[AbstractSet[int]] = []
+        if category is not None:
+            filters.append(self._category_positions.get(category, frozenset()))
+        if popular is not None:
+            filters.append(self._popular_positions if popular else self._not_popular_positions)
+        if min_price is not None or max_price is not None:
+            start = bisect_left(self._prices, min_price) if min_price is not None else 0
+            end = bisect_right(self._prices, max_price) if max_price is not None else len(self._prices)
+            filters.append(frozenset(self._by_price[start:end]))
+        for token in words:
+            filters.append(self._matching(token))
+        if not filters:
+            return list(self.items)
+        # Intersect the smallest sets first so the work shrinks as fast as possible
+        filters.sort(key=len)
+        positions = set(filters[0])
+        for other in filters[1:]:
+            if not positions:
+                break
+            positions.intersection_update(other)
+        items = self.items
+        return [items[position] for position in sorted(positions)]
@@ -0,0 +1,181 @@
+import bisect
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Tuple
+
+# Latency buckets in seconds, from sub-millisecond cache hits up to slow disk writes
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+LabelValues = Tuple[str, ...]
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names: Tuple[str, ...], values: LabelValues, extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+class Counter:
+    """Monotonically increasing value per label set"""
+
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values: str, amount: float = 1.0):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = list(self._values.items())
+        for label_values, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labels, label_values)} {value:g}")
+        return lines
+
+class Histogram:
+    """Cumulative bucketed distribution per label set"""
+
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self.buckets = buckets
+        # label values -> [per-bucket counts (+Inf last), sum, count]
+        self._series: Dict[LabelValues, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def time(self, *label_values: str) -> "_Timer":
+        """Context manager observing the elapsed time of its block"""
+        return _Timer(self, label_values)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = [(values, (list(s[0]), s[1], s[2])) for values, s in self._series.items()]
+        for label_values, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                labels = _format_labels(self.labels, label_values, 'le="' + le + '"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, label_values)} {total:.6f}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, label_values)} {count}")
+        return lines
+
+class _Timer:
+    __slots__ = ("histogram", "label_values", "start")
+
+    def __init__(self, histogram: Histogram, label_values: LabelValues):
+        self.histogram = histogram
+        self.label_values = label_values
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start, *self.label_values)
+        return False
+
+class Registry:
+    def __init__(self):
+        self._metrics: List = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, help_text: str, labels: Tuple[str, ...] = ()) -> Counter:
+        return self.register(Counter(name, help_text, labels))
+
+    def histogram(self, name: str, help_text: str, labels: Tuple[str, ...] = (),
+                  buckets: Tuple[float, ...] = LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help_text, labels, buckets))
+
+    def render(self, extra_lines: Iterable[str] = ()) -> str:
+        """Render every metric in the Prometheus text exposition format"""
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        lines.extend(extra_lines)
+        return "\n".join(lines) + "\n"
+
+def gauge_lines(name: str, help_text: str, samples: Dict[str, float], label: str = "") -> List[str]:
+    """Render a gauge computed at scrape time, e.g. from cache statistics"""
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} gauge"]
+    for label_value, value in samples.items():
+        labels = f'{{{label}="{_escape(label_value)}"}}' if label else ""
+        lines.append(f"{name}{labels} {value:g}")
+    return lines
+
+registry = Registry()
+
+HTTP_REQUESTS = registry.counter(
+    "chickza_http_requests_total", "HTTP requests handled", ("method", "route", "status"))
+HTTP_LATENCY = registry.histogram(
+    "chickza_http_request_duration_seconds", "HTTP request latency", ("method", "route"))
+STORAGE_BYTES_READ = registry.counter(
+    "chickza_storage_bytes_read_total", "Bytes read from data files", ("file",))
+STORAGE_BYTES_WRITTEN = registry.counter(
+    "chickza_storage_bytes_written_total", "Bytes written to data files", ("file",))
+STORAGE_PARSE_SECONDS = registry.histogram(
+    "chickza_storage_parse_seconds", "Time spent parsing JSON data files", ("file",))
+STORAGE_SERIALIZE_SECONDS = registry.histogram(
+    "chickza_storage_serialize_seconds", "Time spent serializing records to JSON", ("file",))
+STORAGE_WRITE_SECONDS = registry.histogram(
+    "chickza_storage_write_seconds", "Time spent writing and syncing data files", ("file",))
+ADMISSION_REJECTED = registry.counter(
+    "chickza_admission_rejected_total", "Write requests turned away by rate limits or load shedding", ("path", "reason"))
+MODEL_VALIDATION_SECONDS = registry.histogram(
+    "chickza_model_validation_seconds", "Time spent building pydantic response models", ("model",))
+
+class MetricsMiddleware:
+    """ASGI middleware recording request counts and latency per route template
+
+    Routes are labelled by their path template (/api/orders/{order_id}), not
+    the concrete path, so label cardinality stays bounded.
+    """
+
+    def __init__(self, app: Callable):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            route_label = getattr(route, "path", None) or "unmatched"
+            method = scope.get("method", "")
+            HTTP_LATENCY.observe(time.perf_counter() - start, method, route_label)
+            HTTP_REQUESTS.inc(method, route_label, str(status))
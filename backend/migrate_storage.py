@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+One-shot migration of the legacy JSON array files (orders.txt,
+contact_messages.txt) into the append-only JSON Lines logs, and optionally
+from the logs into a SQLite database for STORAGE_BACKEND=sqlite.
+"""
+
+import argparse
+import sys
+from itertools import chain
+from pathlib import Path
+
+from archive import Archive
+from file_lock import file_lock
+from log_storage import JsonLinesLog, migrate_json_array
+
+DATA_DIR = Path(__file__).parent / "data"
+MIGRATIONS = [
+    ("orders.txt", "orders.jsonl"),
+    ("contact_messages.txt", "contact_messages.jsonl"),
+]
+BATCH_SIZE = 1000
+
+def copy_to_sqlite(data_dir: Path, db_path: str):
+    """Copy every order and contact message from the archives and JSON Lines logs into SQLite"""
+    from sqlite_storage import SQLiteBackend
+
+    db = SQLiteBackend(None, db_path)
+    targets = [("orders", db.add_orders), ("contact_messages", db.add_messages)]
+    for name, insert in targets:
+        log_name = f"{name}.jsonl"
+        log = JsonLinesLog(data_dir / log_name, index_key="id")
+        live_keys = log.keys()
+        archived = (record for _, record in Archive(data_dir / "archive" / name).scan()
+                    if str(record.get("id")) not in live_keys)
+        batch, count = [], 0
+        # Indexed, so only the current version of each updated record is copied
+        for record in chain(archived, log):
+            batch.append(record)
+            if len(batch) >= BATCH_SIZE:
+                count += len(batch) if insert(batch) else 0
+                batch = []
+        if batch:
+            count += len(batch) if insert(batch) else 0
+        print(f"Copied {count} {name} records to {db_path}")
+    db.close()
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Migrate JSON array files to JSON Lines logs")
+    parser.add_argument("--data-dir", default=str(DATA_DIR), help="Directory holding the data files")
+    parser.add_argument("--force", action="store_true", help="Overwrite logs that already exist")
+    parser.add_argument("--sqlite", metavar="DB_PATH", help="Also copy the logs into this SQLite database")
+    args = parser.parse_args()
+
+    data_dir = Path(args.data_dir)
+    for source_name, log_name in MIGRATIONS:
+        source_path, log_path = data_dir / source_name, data_dir / log_name
+        # Under the log's lock, so a running server cannot append while it is being written
+        with file_lock(log_path):
+            if log_path.exists() and not args.force:
+                print(f"Skipping {source_name}: {log_name} already exists (use --force to overwrite)")
+                continue
+            count = migrate_json_array(source_path, log_path)
+        print(f"Migrated {count} records from {source_name} to {log_name}")
+    if args.sqlite:
+        copy_to_sqlite(data_dir, args.sqlite)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
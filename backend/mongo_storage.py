@@ -0,0 +1,515 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING, IndexModel, ReturnDocument
+from pymongo.errors import PyMongoError
+
+from analytics import order_analytics
+from async_storage import run_in_storage_pool
+from file_storage import (CACHE_CHECK_INTERVAL, OrderStatusConflict, _digits, batch_write_failed,
+                          build_contact_message, build_order, build_order_batch, check_day, check_status_transition,
+                          contact_result, order_updated, orders_created, storage, with_status)
+from kitchen import kitchen_queue
+from menu_index import MenuIndex
+from order_records import ACTIVE_STATUSES, CompactOrder, active_orders
+from pricing import price_orders, quote_orders
+
+logger = logging.getLogger(__name__)
+
+MONGO_URL = os.environ.get("MONGO_URL", "mongodb://localhost:27017")
+DB_NAME = os.environ.get("DB_NAME", "chickza")
+MONGO_MAX_POOL_SIZE = int(os.environ.get("MONGO_MAX_POOL_SIZE", "100"))
+MONGO_MIN_POOL_SIZE = int(os.environ.get("MONGO_MIN_POOL_SIZE", "0"))
+
+# Fields stored alongside records for querying but never returned to clients
+HIDDEN_FIELDS = {"_id": 0, "phone_digits": 0}
+
+def _order_query(status: Optional[str] = None, order_type: Optional[str] = None,
+                 created_from: Optional[str] = None, created_to: Optional[str] = None,
+                 phone: Optional[str] = None) -> Dict[str, Any]:
+    query: Dict[str, Any] = {}
+    if status:
+        query["status"] = status
+    if order_type:
+        query["order_type"] = order_type
+    if created_from or created_to:
+        query["created_at"] = {}
+        if created_from:
+            query["created_at"]["$gte"] = created_from
+        if created_to:
+            query["created_at"]["$lte"] = created_to
+    phone_digits = _digits(phone)
+    if phone_digits:
+        query["phone_digits"] = phone_digits
+    return query
+
+def _visible(document: Dict) -> Dict:
+    """Drop the HIDDEN_FIELDS from a document fetched without a projection"""
+    return {field: value for field, value in document.items() if field not in HIDDEN_FIELDS}
+
+def _order_document(order: Dict) -> Dict:
+    # Copy so insert_one/insert_many do not add an ObjectId to the caller's dict
+    document = dict(order)
+    document["phone_digits"] = _digits(order.get("customer_info", {}).get("phone"))
+    return document
+
+class MongoBackend:
+    """Async storage for orders, contact messages, menu and restaurant info in MongoDB
+
+    Takes any motor-compatible database, so tests can pass an in-memory
+    stand-in such as mongomock_motor's AsyncMongoMockClient()["test"].
+    Menu and restaurant info are cached in-process and re-read from MongoDB
+    at most once per check_interval seconds.
+    """
+
+    def __init__(self, database: Any, client: Any = None, check_interval: float = 1.0):
+        self.db = database
+        self.client = client
+        self.check_interval = check_interval
+        self._documents: Dict[str, Dict[str, Any]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    async def ensure_indexes(self) -> None:
+        """Create the indexes the order, message and menu queries rely on"""
+        await self.db.orders.create_indexes([
+            IndexModel([("id", ASCENDING)], unique=True),
+            IndexModel([("created_at", ASCENDING)]),
+            IndexModel([("status", ASCENDING), ("created_at", ASCENDING)]),
+            IndexModel([("phone_digits", ASCENDING)]),
+        ])
+        await self.db.contact_messages.create_indexes([
+            IndexModel([("id", ASCENDING)], unique=True),
+            IndexModel([("created_at", ASCENDING)]),
+        ])
+        await self.db.menu_items.create_indexes([IndexModel([("id", ASCENDING)], unique=True)])
+
+    async def seed_documents(self) -> None:
+        """Load the menu and restaurant info from the data files into empty collections"""
+        if await self.db.menu_items.count_documents({}) == 0:
+            menu_data = storage.read_json_file("menu_items.txt")
+            items = [dict(item) for category in menu_data.values() for item in category] \
+                if isinstance(menu_data, dict) else []
+            if items:
+                await self.db.menu_items.insert_many(items)
+        if await self.db.restaurant_info.count_documents({}) == 0:
+            info = storage.read_json_file("restaurant_info.txt")
+            if isinstance(info, dict) and info:
+                await self.db.restaurant_info.insert_one(dict(info))
+
+    async def _load_document(self, name: str) -> Any:
+        if name == "menu":
+            menu: Dict[str, List[Dict]] = {}
+            async for item in self.db.menu_items.find({}, HIDDEN_FIELDS).sort("id", ASCENDING):
+                menu.setdefault(item.get("category", ""), []).append(item)
+            return menu
+        if name == "restaurant_info":
+            return await self.db.restaurant_info.find_one({}, HIDDEN_FIELDS) or {}
+        raise KeyError(name)
+
+    async def get_document_snapshot(self, name: str) -> Dict[str, Any]:
+        """Get a document with its version, content digest and modification time"""
+        entry = self._documents.get(name)
+        now = time.monotonic()
+        if entry is not None and now - entry["checked_at"] < self.check_interval:
+            self.hits += 1
+            return entry
+        data = await self._load_document(name)
+        canonical = json.dumps(data, sort_keys=True, separators=(",", ":")).encode('utf-8')
+        digest = hashlib.sha256(canonical).hexdigest()[:32]
+        if entry is not None and entry["digest"] == digest:
+            entry["checked_at"] = now
+            self.hits += 1
+            return entry
+        self.misses += 1
+        entry = {
+            "data": data,
+            "version": entry["version"] + 1 if entry else 1,
+            "digest": digest,
+            "last_modified": time.time(),
+            "checked_at": now,
+        }
+        self._documents[name] = entry
+        return entry
+
+    async def get_document(self, name: str) -> Any:
+        return (await self.get_document_snapshot(name))["data"]
+
+    def reload_documents(self) -> None:
+        # Mark entries stale rather than dropping them so versions keep increasing
+        for entry in self._documents.values():
+            entry["checked_at"] = float("-inf")
+
+    def document_stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "files": {name: entry["version"] for name, entry in self._documents.items()},
+        }
+
+    async def _insert(self, collection: Any, documents: List[Dict]) -> bool:
+        try:
+            if len(documents) == 1:
+                await collection.insert_one(documents[0])
+            else:
+                await collection.insert_many(documents, ordered=True)
+            return True
+        except PyMongoError as e:
+            logger.exception(f"Error writing to {collection.name}: {e}")
+            return False
+
+    async def _page(self, collection: Any, query: Dict[str, Any], cursor: Optional[str],
+                    limit: int) -> Tuple[List[Dict], Optional[str]]:
+        if cursor:
+            try:
+                query = {**query, "_id": {"$gt": ObjectId(cursor)}}
+            except (InvalidId, TypeError):
+                raise ValueError(f"Invalid cursor: {cursor}")
+        projection = {"phone_digits": 0}
+        documents = await collection.find(query, projection).sort("_id", ASCENDING).to_list(limit)
+        next_cursor = str(documents[-1]["_id"]) if len(documents) >= limit else None
+        for document in documents:
+            document.pop("_id", None)
+        return documents, next_cursor
+
+    async def _iter(self, collection: Any, query: Dict[str, Any]) -> AsyncIterator[Dict]:
+        async for document in collection.find(query, HIDDEN_FIELDS).sort("_id", ASCENDING):
+            yield document
+
+    async def add_order(self, order: Dict) -> bool:
+        return await self._insert(self.db.orders, [_order_document(order)])
+
+    async def add_orders(self, orders: List[Dict]) -> bool:
+        return await self._insert(self.db.orders, [_order_document(order) for order in orders])
+
+    async def get_order(self, order_id: str) -> Optional[Dict]:
+        return await self.db.orders.find_one({"id": order_id}, HIDDEN_FIELDS)
+
+    async def update_order_status(self, order_id: str, expected: str, status: str) -> Optional[Dict]:
+        """Move an order from the expected status to a new one with a single conditional update"""
+        changes = with_status({}, status)
+        # No projection here: mongomock re-reads the updated document by _id and
+        # finds nothing once _id is excluded; hidden fields are dropped afterwards
+        updated = await self.db.orders.find_one_and_update(
+            {"id": order_id, "status": expected}, {"$set": changes}, return_document=ReturnDocument.AFTER,
+        )
+        if updated is None:
+            current = await self.get_order(order_id)
+            if current is not None:
+                raise OrderStatusConflict(f"Order status changed to {current.get('status')}")
+            return None
+        return _visible(updated)
+
+    async def list_orders(self, cursor: Optional[str] = None, limit: int = 100,
+                          **filters) -> Tuple[List[Dict], Optional[str]]:
+        return await self._page(self.db.orders, _order_query(**filters), cursor, limit)
+
+    def iter_orders(self, **filters) -> AsyncIterator[Dict]:
+        return self._iter(self.db.orders, _order_query(**filters))
+
+    async def add_message(self, message: Dict) -> bool:
+        return await self._insert(self.db.contact_messages, [dict(message)])
+
+    async def list_messages(self, cursor: Optional[str] = None, limit: int = 100,
+                            created_from: Optional[str] = None,
+                            created_to: Optional[str] = None) -> Tuple[List[Dict], Optional[str]]:
+        query = _order_query(created_from=created_from, created_to=created_to)
+        return await self._page(self.db.contact_messages, query, cursor, limit)
+
+    def iter_messages(self, created_from: Optional[str] = None,
+                      created_to: Optional[str] = None) -> AsyncIterator[Dict]:
+        query = _order_query(created_from=created_from, created_to=created_to)
+        return self._iter(self.db.contact_messages, query)
+
+    def close(self) -> None:
+        if self.client is not None:
+            self.client.close()
+
+_backend: Optional[MongoBackend] = None
+
+async def init_mongo(database: Any = None) -> MongoBackend:
+    """Create the shared, pooled MongoDB backend; called once from the app startup event"""
+    global _backend
+    client = None
+    if database is None:
+        client = AsyncIOMotorClient(MONGO_URL, maxPoolSize=MONGO_MAX_POOL_SIZE, minPoolSize=MONGO_MIN_POOL_SIZE)
+        database = client[DB_NAME]
+    backend = MongoBackend(database, client=client, check_interval=CACHE_CHECK_INTERVAL)
+    await backend.ensure_indexes()
+    await backend.seed_documents()
+    _backend = backend
+    return backend
+
+def close_mongo() -> None:
+    """Close the shared MongoDB client"""
+    global _backend
+    if _backend is not None:
+        _backend.close()
+        _backend = None
+
+def get_mongo_backend() -> MongoBackend:
+    if _backend is None:
+        raise RuntimeError("MongoDB backend is not initialized; call init_mongo() first")
+    return _backend
+
+async def sync_active_orders():
+    """Reload the working set of active orders if it is due; the window query uses the created_at index"""
+    if active_orders.needs_reload():
+        recent = get_mongo_backend().iter_orders(created_from=active_orders.window_start())
+        active_orders.load([order async for order in recent])
+
+class MongoMenuService:
+    _index: Optional[MenuIndex] = None
+
+    @staticmethod
+    async def get_menu_index() -> MenuIndex:
+        """Get the lookup index for the current menu, rebuilding it if the menu changed"""
+        snapshot = await get_mongo_backend().get_document_snapshot("menu")
+        index = MongoMenuService._index
+        if index is None or index.version != snapshot["version"]:
+            index = MenuIndex(snapshot["data"], snapshot["version"])
+            MongoMenuService._index = index
+        return index
+
+    @staticmethod
+    async def get_menu_snapshot() -> Dict[str, Any]:
+        """Get the menu together with its content digest and modification time"""
+        return await get_mongo_backend().get_document_snapshot("menu")
+
+    @staticmethod
+    async def get_all_menu_items() -> Dict[str, List[Dict]]:
+        """Get all menu items"""
+        return await get_mongo_backend().get_document("menu")
+
+    @staticmethod
+    async def get_menu_by_category(category: str) -> List[Dict]:
+        """Get menu items by category"""
+        return (await MongoMenuService.get_menu_index()).get_category(category)
+
+    @staticmethod
+    async def get_item_by_id(item_id: int) -> Optional[Dict]:
+        """Get a specific menu item by ID"""
+        return (await MongoMenuService.get_menu_index()).get_item(item_id)
+
+    @staticmethod
+    async def get_items_by_ids(item_ids: List[int]) -> Dict[int, Optional[Dict]]:
+        """Get several menu items by ID, e.g. to validate a cart"""
+        return (await MongoMenuService.get_menu_index()).get_items(item_ids)
+
+    @staticmethod
+    async def get_popular_items() -> List[Dict]:
+        """Get menu items flagged as popular"""
+        return (await MongoMenuService.get_menu_index()).popular
+
+    @staticmethod
+    async def search_items(text: Optional[str] = None, min_price: Optional[float] = None,
+                           max_price: Optional[float] = None, popular: Optional[bool] = None,
+                           category: Optional[str] = None) -> List[Dict]:
+        """Search menu items by name/description words, price range, popular flag and category"""
+        return (await MongoMenuService.get_menu_index()).search(text, min_price, max_price, popular, category)
+
+# Batches can hold up to MAX_BATCH_ORDERS orders, so they are priced and built
+# in the storage thread pool; a single order prices in microseconds on the loop
+def _price_and_build(index: MenuIndex, orders_data: List[Dict]) -> List[Dict]:
+    return [build_order(order_data) for order_data in price_orders(index, orders_data)]
+
+def _quote_and_build(index: MenuIndex, orders_data: List[Dict], atomic: bool) -> Tuple[List[Dict], List[Dict]]:
+    return build_order_batch(orders_data, quote_orders(index, orders_data), atomic)
+
+class MongoOrderService:
+    @staticmethod
+    async def create_order(order_data: Dict) -> Dict:
+        """Create a new order, priced against the current menu"""
+        order_data = price_orders(await MongoMenuService.get_menu_index(), [order_data])[0]
+        new_order = build_order(order_data)
+        if await get_mongo_backend().add_order(new_order):
+            orders_created([new_order])
+            return new_order
+        return {}
+
+    @staticmethod
+    async def create_orders(orders_data: List[Dict]) -> List[Dict]:
+        """Create several orders with a single bulk insert, priced together in one batch"""
+        index = await MongoMenuService.get_menu_index()
+        new_orders = await run_in_storage_pool(_price_and_build, index, orders_data)
+        if await get_mongo_backend().add_orders(new_orders):
+            await run_in_storage_pool(orders_created, new_orders)
+            return new_orders
+        return []
+
+    @staticmethod
+    async def import_orders(orders_data: List[Dict], atomic: bool = False) -> List[Dict]:
+        """Price a batch of orders together and store the accepted ones in one bulk insert"""
+        index = await MongoMenuService.get_menu_index()
+        new_orders, results = await run_in_storage_pool(_quote_and_build, index, orders_data, atomic)
+        if new_orders and not await get_mongo_backend().add_orders(new_orders):
+            return batch_write_failed(results)
+        await run_in_storage_pool(orders_created, new_orders)
+        return results
+
+    @staticmethod
+    async def get_order_by_id(order_id: str) -> Optional[Dict]:
+        """Get order by ID"""
+        return await get_mongo_backend().get_order(order_id)
+
+    @staticmethod
+    async def update_order_status(order_id: str, status: str) -> Optional[Dict]:
+        """Move an order to its next status and notify subscribers, or return None if it does not exist"""
+        order = await get_mongo_backend().get_order(order_id)
+        if order is None:
+            return None
+        check_status_transition(order.get("status"), status)
+        updated = await get_mongo_backend().update_order_status(order_id, order["status"], status)
+        if updated is not None:
+            order_updated(updated)
+        return updated
+
+    @staticmethod
+    async def get_active_orders(status: Optional[str] = None) -> List[CompactOrder]:
+        """Get recent orders that are not completed yet, oldest first, from the in-memory working set"""
+        if status is not None and status not in ACTIVE_STATUSES:
+            raise ValueError(f"Active orders have one of the statuses {ACTIVE_STATUSES}")
+        await sync_active_orders()
+        return active_orders.list(status)
+
+    @staticmethod
+    async def get_all_orders() -> List[Dict]:
+        """Get all orders"""
+        return [order async for order in get_mongo_backend().iter_orders()]
+
+    @staticmethod
+    async def list_orders(cursor: Optional[str] = None, limit: int = 100, **filters) -> Dict:
+        """Get one page of orders matching the filters accepted by order_filter"""
+        orders, next_cursor = await get_mongo_backend().list_orders(cursor, limit, **filters)
+        return {"orders": orders, "next_cursor": next_cursor}
+
+    @staticmethod
+    async def iter_orders(**filters) -> AsyncIterator[Dict]:
+        """Stream every order matching the filters accepted by order_filter"""
+        return get_mongo_backend().iter_orders(**filters)
+
+class MongoRestaurantService:
+    @staticmethod
+    async def get_restaurant_info() -> Dict:
+        """Get restaurant information"""
+        return await get_mongo_backend().get_document("restaurant_info")
+
+    @staticmethod
+    async def get_restaurant_info_snapshot() -> Dict[str, Any]:
+        """Get restaurant information together with its content digest and modification time"""
+        return await get_mongo_backend().get_document_snapshot("restaurant_info")
+
+class MongoContactService:
+    @staticmethod
+    async def submit_contact_message(message_data: Dict) -> Dict:
+        """Submit a contact message"""
+        new_message = build_contact_message(message_data)
+        stored = await get_mongo_backend().add_message(new_message)
+        return contact_result(new_message["id"] if stored else None)
+
+    @staticmethod
+    async def get_all_messages() -> List[Dict]:
+        """Get all contact messages (for admin purposes)"""
+        return [message async for message in get_mongo_backend().iter_messages()]
+
+    @staticmethod
+    async def list_messages(cursor: Optional[str] = None, limit: int = 100,
+                            created_from: Optional[str] = None, created_to: Optional[str] = None) -> Dict:
+        """Get one page of contact messages (for admin purposes)"""
+        messages, next_cursor = await get_mongo_backend().list_messages(cursor, limit, created_from, created_to)
+        return {"messages": messages, "next_cursor": next_cursor}
+
+    @staticmethod
+    async def iter_messages(created_from: Optional[str] = None, created_to: Optional[str] = None) -> AsyncIterator[Dict]:
+        """Stream contact messages created within the given range (for admin purposes)"""
+        return get_mongo_backend().iter_messages(created_from, created_to)
+
+async def _rebuild_analytics():
+    """Recompute the order analytics, with the pandas work in the storage thread pool"""
+    orders = [order async for order in get_mongo_backend().iter_orders()]
+    await run_in_storage_pool(order_analytics.rebuild, orders)
+
+async def _rebuild_analytics_in_background():
+    try:
+        await _rebuild_analytics()
+    except Exception as e:
+        logger.exception(f"Error rebuilding order analytics: {e}")
+    finally:
+        order_analytics.end_rebuild()
+
+class MongoAnalyticsService:
+    _first_build: Optional[asyncio.Lock] = None
+    _rebuild_task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    async def _aggregates():
+        if not order_analytics.built:
+            # Only the very first read waits for a build
+            if MongoAnalyticsService._first_build is None:
+                MongoAnalyticsService._first_build = asyncio.Lock()
+            async with MongoAnalyticsService._first_build:
+                if not order_analytics.built:
+                    await _rebuild_analytics()
+        elif order_analytics.needs_rebuild() and order_analytics.begin_rebuild():
+            # Later rebuilds run in the background while reads use the previous aggregates
+            MongoAnalyticsService._rebuild_task = asyncio.get_running_loop().create_task(
+                _rebuild_analytics_in_background())
+        return order_analytics
+
+    @staticmethod
+    async def get_daily(days: int = 7, until: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Get revenue, order counts and the pickup/delivery split for each of the last days days"""
+        return (await MongoAnalyticsService._aggregates()).daily(days, check_day(until))
+
+    @staticmethod
+    async def get_hourly(day: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Get revenue, order counts and the pickup/delivery split for each hour of a day"""
+        return (await MongoAnalyticsService._aggregates()).hourly(check_day(day))
+
+    @staticmethod
+    async def get_top_items(day: Optional[str] = None, limit: int = 10) -> List[Dict[str, Any]]:
+        """Get the best selling items of a day"""
+        return (await MongoAnalyticsService._aggregates()).top_items(check_day(day), limit)
+
+class MongoKitchenService:
+    @staticmethod
+    async def _queue():
+        # The queue follows the active orders working set
+        kitchen_queue.set_menu(await MongoMenuService.get_menu_index())
+        await sync_active_orders()
+        return kitchen_queue
+
+    @staticmethod
+    async def get_queue() -> List[Dict[str, Any]]:
+        """Get the pending and preparing orders in the order the kitchen should work on them"""
+        return (await MongoKitchenService._queue()).queue()
+
+    @staticmethod
+    async def get_order_eta(order_id: str) -> Optional[Dict[str, Any]]:
+        """Get an order's place in the kitchen queue and estimated ready time, or None if it is not queued"""
+        return (await MongoKitchenService._queue()).eta(order_id)
+
+class MongoCacheService:
+    @staticmethod
+    async def get_stats() -> Dict[str, Any]:
+        """Get menu/restaurant info cache counters (for admin purposes)"""
+        return get_mongo_backend().document_stats()
+
+    @staticmethod
+    async def reload() -> Dict[str, Any]:
+        """Reload menu and restaurant info from MongoDB (for admin purposes)"""
+        backend = get_mongo_backend()
+        backend.reload_documents()
+        await backend.get_document_snapshot("menu")
+        await backend.get_document_snapshot("restaurant_info")
+        return backend.document_stats()
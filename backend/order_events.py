@@ -0,0 +1,77 @@
+import asyncio
+import threading
+from typing import Dict, Optional, Set
+
+# Events buffered per subscriber; a subscriber that falls further behind
+# loses the oldest ones, which is fine as only the latest status matters
+SUBSCRIBER_QUEUE_SIZE = 16
+
+class Subscription:
+    """Queue of order events for one subscriber, bound to the event loop it was created on"""
+
+    def __init__(self, bus: "OrderEventBus", order_id: Optional[str]):
+        self.bus = bus
+        self.order_id = order_id
+        self.loop = asyncio.get_running_loop()
+        self.queue: asyncio.Queue = asyncio.Queue(SUBSCRIBER_QUEUE_SIZE)
+
+    def _deliver(self, order: Dict):
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(order)
+
+    async def get(self, timeout: Optional[float] = None) -> Dict:
+        """Wait for the next event, raising asyncio.TimeoutError after timeout seconds"""
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+    def close(self):
+        """Stop receiving events"""
+        self.bus.unsubscribe(self)
+
+class OrderEventBus:
+    """In-process publish/subscribe of order changes, keyed by order id
+
+    Subscribers wait on an asyncio queue each, so a waiting client costs no
+    storage reads at all. publish() may be called from any thread, including
+    the storage pool. Only changes made by this process are delivered; with
+    several workers, subscribers should also re-check storage now and then.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers: Dict[Optional[str], Set[Subscription]] = {}
+
+    def subscribe(self, order_id: Optional[str] = None) -> Subscription:
+        """Subscribe to changes of one order, or of every order if order_id is None
+
+        Must be called from the event loop that will consume the events.
+        """
+        subscription = Subscription(self, order_id)
+        with self._lock:
+            self._subscribers.setdefault(order_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.order_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.order_id]
+
+    def publish(self, order: Dict):
+        """Hand an updated order to everyone subscribed to it"""
+        with self._lock:
+            targets = list(self._subscribers.get(order.get("id"), ())) + list(self._subscribers.get(None, ()))
+        for subscription in targets:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription._deliver, order)
+            except RuntimeError:
+                # The subscriber's event loop has already been closed
+                self.unsubscribe(subscription)
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+order_events = OrderEventBus()
@@ -0,0 +1,293 @@
+import logging
+import os
+import sys
+import threading
+import time
+from array import array
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATUSES = ("pending", "preparing", "ready")
+# Orders created longer ago than this are not part of the working set
+ACTIVE_ORDERS_WINDOW_HOURS = float(os.environ.get("ACTIVE_ORDERS_WINDOW_HOURS", "24"))
+# Seconds between reloads of the working set from storage backends without a
+# change feed, which pick up orders created or updated by other worker processes
+ACTIVE_ORDERS_RELOAD_INTERVAL = float(os.environ.get("ACTIVE_ORDERS_RELOAD_INTERVAL", "30"))
+# Seconds between reads of the orders other worker processes appended to the order log
+ACTIVE_ORDERS_CATCH_UP_INTERVAL = float(os.environ.get("ACTIVE_ORDERS_CATCH_UP_INTERVAL", "1"))
+
+EPOCH = datetime(1970, 1, 1)
+MICROSECOND = timedelta(microseconds=1)
+# Position of the order-level numbers in CompactOrder.numbers; item lines follow
+CREATED, UPDATED, SUBTOTAL, TAX, DELIVERY_FEE, TOTAL, LINES = range(7)
+LINE_WIDTH = 3
+
+def _intern(value: Any) -> str:
+    return sys.intern(value) if isinstance(value, str) else sys.intern(str(value or ""))
+
+def _cents(amount: Any) -> int:
+    return int(round(float(amount or 0) * 100))
+
+def _micros(timestamp: Optional[str]) -> int:
+    """Encode an ISO 8601 timestamp as exact microseconds since the epoch, or -1 if missing"""
+    if not timestamp:
+        return -1
+    return (datetime.fromisoformat(timestamp) - EPOCH) // MICROSECOND
+
+def _isoformat(micros: int) -> Optional[str]:
+    return (EPOCH + micros * MICROSECOND).isoformat() if micros >= 0 else None
+
+class ItemCatalog:
+    """Interns order item descriptions to small integer codes
+
+    An item's (id, name, description, image, category) is the same for
+    every order placed against one menu version, so each order line only
+    stores the code of its description next to its quantity and price.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._codes: Dict[Tuple, int] = {}
+        self.entries: List[Tuple] = []
+
+    def code(self, item: Dict) -> int:
+        """Get the code for an item's description, adding it to the catalog if needed"""
+        key = (item.get("id"), _intern(item.get("name")), _intern(item.get("description")),
+               _intern(item.get("image")), _intern(item.get("category")))
+        code = self._codes.get(key)
+        if code is None:
+            with self._lock:
+                code = self._codes.get(key)
+                if code is None:
+                    code = self._codes[key] = len(self.entries)
+                    self.entries.append(key)
+        return code
+
+item_catalog = ItemCatalog()
+
+class CompactOrder:
+    """Slotted, array-backed form of an order record
+
+    Timestamps, totals and item lines (catalog code, quantity, price in
+    cents) are packed into one array of 64-bit integers, and repeated
+    strings such as statuses, item names and categories are interned.
+    to_dict() converts back to the stored order shape at the API boundary.
+    """
+
+    __slots__ = ("id", "status", "order_type", "customer", "numbers")
+
+    def __init__(self, order_id: str, status: str, order_type: str, customer: Tuple[str, ...], numbers: array):
+        self.id = order_id
+        self.status = status
+        self.order_type = order_type
+        self.customer = customer
+        self.numbers = numbers
+
+    @classmethod
+    def from_dict(cls, order: Dict, catalog: ItemCatalog = item_catalog) -> "CompactOrder":
+        customer = order.get("customer_info") or {}
+        numbers = array("q", (
+            _micros(order.get("created_at")), _micros(order.get("updated_at")),
+            _cents(order.get("subtotal")), _cents(order.get("tax")),
+            _cents(order.get("delivery_fee")), _cents(order.get("total")),
+        ))
+        for item in order.get("items") or ():
+            numbers.extend((catalog.code(item), int(item.get("quantity", 0)), _cents(item.get("price"))))
+        return cls(
+            order["id"], _intern(order.get("status", "pending")), _intern(order.get("order_type", "pickup")),
+            (customer.get("name", ""), customer.get("phone", ""),
+             _intern(customer.get("email") or ""), customer.get("address") or ""),
+            numbers,
+        )
+
+    @property
+    def created_at(self) -> Optional[str]:
+        return _isoformat(self.numbers[CREATED])
+
+    def to_dict(self, catalog: ItemCatalog = item_catalog) -> Dict[str, Any]:
+        """Expand into the order record shape used by storage and OrderResponse"""
+        numbers, entries = self.numbers, catalog.entries
+        items = []
+        for line in range(LINES, len(numbers), LINE_WIDTH):
+            item_id, name, description, image, category = entries[numbers[line]]
+            items.append({"id": item_id, "name": name, "description": description,
+                          "price": numbers[line + 2] / 100, "image": image,
+                          "category": category, "quantity": numbers[line + 1]})
+        name, phone, email, address = self.customer
+        order = {
+            "id": self.id,
+            "items": items,
+            "customer_info": {"name": name, "phone": phone, "email": email, "address": address},
+            "order_type": self.order_type,
+            "status": self.status,
+            "subtotal": numbers[SUBTOTAL] / 100,
+            "tax": numbers[TAX] / 100,
+            "delivery_fee": numbers[DELIVERY_FEE] / 100,
+            "total": numbers[TOTAL] / 100,
+            "created_at": _isoformat(numbers[CREATED]),
+        }
+        if numbers[UPDATED] >= 0:
+            order["updated_at"] = _isoformat(numbers[UPDATED])
+        return order
+
+def _compact(order: Dict) -> Optional[CompactOrder]:
+    """Convert an order to a CompactOrder, or log and return None if it does not fit one
+
+    Orders are already stored when they get here, so one with amounts too
+    large for 64-bit integers is left out of the in-memory views rather
+    than failing the request that stored it.
+    """
+    try:
+        return CompactOrder.from_dict(order)
+    except (OverflowError, ValueError, TypeError) as e:
+        logger.error(f"Leaving order {order.get('id')} out of the active orders: {e}")
+        return None
+
+class ActiveOrders:
+    """Working set of recent orders that are not completed yet, e.g. for the kitchen view
+
+    Orders are held as CompactOrder records. The set is loaded from storage
+    on first use and the order services apply this process's own changes to
+    it; subscribers such as the kitchen queue are handed the same loads,
+    changes and removals. sync() picks up the changes of other worker
+    processes: from a backend with a change feed only the orders stored
+    since the last sync are read, otherwise the set is reloaded every
+    reload_interval seconds.
+    """
+
+    def __init__(self, window_hours: float = ACTIVE_ORDERS_WINDOW_HOURS,
+                 reload_interval: float = ACTIVE_ORDERS_RELOAD_INTERVAL,
+                 catch_up_interval: float = ACTIVE_ORDERS_CATCH_UP_INTERVAL):
+        self.window = timedelta(hours=window_hours)
+        self.reload_interval = reload_interval
+        self.catch_up_interval = catch_up_interval
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._orders: Dict[str, CompactOrder] = {}
+        self._loaded_at: Optional[float] = None
+        self._synced_at: Optional[float] = None
+        self._position: Any = None
+        self._listeners: List[Any] = []
+
+    def subscribe(self, listener: Any):
+        """Also hand every load(orders), apply(orders) and remove(order_ids) to listener"""
+        self._listeners.append(listener)
+
+    def window_start(self) -> str:
+        """Earliest created_at included in the working set"""
+        return (datetime.utcnow() - self.window).isoformat()
+
+    def needs_reload(self) -> bool:
+        loaded_at = self._loaded_at
+        return loaded_at is None or time.monotonic() - loaded_at >= self.reload_interval
+
+    def _due(self) -> bool:
+        synced_at = self._synced_at
+        if synced_at is None:
+            return True
+        interval = self.catch_up_interval if self._position is not None else self.reload_interval
+        return time.monotonic() - synced_at >= interval
+
+    def load(self, orders: Iterable[Dict]):
+        """Replace the working set with the active orders among orders"""
+        loaded: Dict[str, CompactOrder] = {}
+        kept = []
+        for order in orders:
+            compact = _compact(order) if order.get("status") in ACTIVE_STATUSES else None
+            if compact is not None:
+                loaded[order["id"]] = compact
+                kept.append(order)
+        orders = kept
+        with self._lock:
+            self._orders = loaded
+            self._loaded_at = time.monotonic()
+            for listener in self._listeners:
+                listener.load(orders)
+
+    def sync(self, load_orders: Callable[[str], Iterable[Dict]], position: Callable[[], Any],
+             changes: Callable[[Any], Optional[Tuple[List[Dict], Any]]]):
+        """Bring the working set up to date with the orders in storage
+
+        The first call loads load_orders(window_start); the feed position()
+        is taken before that, so nothing stored meanwhile is missed. Later
+        calls apply changes(position), the orders stored since, at most
+        every catch_up_interval seconds. Without a feed (position() is None)
+        or once changes() returns None, the set is loaded again instead.
+        """
+        if not self._due():
+            return
+        with self._sync_lock:
+            if not self._due():
+                return
+            if self._position is not None:
+                result = changes(self._position)
+                if result is not None:
+                    orders, self._position = result
+                    self.apply(orders)
+                    if self.needs_reload():
+                        self._prune()
+                    self._synced_at = time.monotonic()
+                    return
+            start = position()
+            self.load(load_orders(self.window_start()))
+            self._position = start
+            self._synced_at = time.monotonic()
+
+    def _prune(self):
+        """Drop orders that have aged out of the window"""
+        cutoff = _micros(self.window_start())
+        with self._lock:
+            expired = [order_id for order_id, order in self._orders.items() if order.numbers[CREATED] < cutoff]
+            for order_id in expired:
+                del self._orders[order_id]
+            self._loaded_at = time.monotonic()
+            for listener in self._listeners:
+                listener.remove(expired)
+
+    def apply(self, orders: Iterable[Dict]):
+        """Add new or updated orders, dropping those that are no longer active"""
+        if self._loaded_at is None:
+            # Not loaded yet; the first load reads these from storage anyway
+            return
+        cutoff = self.window_start()
+        current, expired = [], []
+        for order in orders:
+            (current if (order.get("created_at") or "") >= cutoff else expired).append(order)
+        with self._lock:
+            applied = []
+            for order in current:
+                compact = _compact(order) if order.get("status") in ACTIVE_STATUSES else None
+                if compact is not None:
+                    self._orders[order["id"]] = compact
+                    applied.append(order)
+                else:
+                    self._orders.pop(order["id"], None)
+                    if order.get("status") in ACTIVE_STATUSES:
+                        # Left out as it does not fit; drop any earlier version too
+                        expired.append(order)
+                    else:
+                        applied.append(order)
+            for order in expired:
+                self._orders.pop(order["id"], None)
+            # Under the lock, so subscribers see changes in the same order
+            for listener in self._listeners:
+                listener.apply(applied)
+                listener.remove([order["id"] for order in expired])
+
+    def list(self, status: Optional[str] = None) -> List[CompactOrder]:
+        """Get the active orders, oldest first, optionally only those in one status"""
+        cutoff = _micros(self.window_start())
+        with self._lock:
+            orders = list(self._orders.values())
+        return sorted(
+            (order for order in orders
+             if order.numbers[CREATED] >= cutoff and (status is None or order.status == status)),
+            key=lambda order: order.numbers[CREATED],
+        )
+
+    def __len__(self) -> int:
+        return len(self._orders)
+
+active_orders = ActiveOrders()
@@ -0,0 +1,103 @@
+import gzip
+import json
+import os
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from fastapi import Request, Response
+from fastapi.responses import JSONResponse
+
+from http_cache import cache_headers, is_not_modified, make_etag
+from json_codec import CODEC, dumps
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+PRERENDERED_RESPONSES = os.environ.get("PRERENDERED_RESPONSES", "true").lower() in ("1", "true", "yes")
+
+# Bodies smaller than this are not worth compressing
+COMPRESS_MIN_SIZE = 512
+
+class CodecJSONResponse(JSONResponse):
+    """JSONResponse rendered with the JSON_CODEC codec"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+# The app's default response class
+JSON_RESPONSE_CLASS = JSONResponse if CODEC == "stdlib" else CodecJSONResponse
+
+def render_json(content: Any) -> bytes:
+    """Serialize content exactly as the app's default response class would"""
+    if CODEC != "stdlib":
+        return dumps(content)
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+class RenderedBody:
+    """A JSON body rendered once, with its compressed variants"""
+
+    __slots__ = ("digest", "identity", "gzip", "br")
+
+    def __init__(self, digest: str, body: bytes):
+        self.digest = digest
+        self.identity = body
+        self.gzip = None
+        self.br = None
+        if len(body) >= COMPRESS_MIN_SIZE:
+            self.gzip = gzip.compress(body, compresslevel=9, mtime=0)
+            if brotli is not None:
+                self.br = brotli.compress(body)
+
+    def select(self, accept_encoding: str) -> Tuple[bytes, Optional[str]]:
+        """Pick the smallest variant the client accepts, returning (body, content-encoding)"""
+        accepted = set()
+        for part in accept_encoding.lower().split(","):
+            coding, _, params = part.strip().partition(";")
+            if params.strip().replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+                continue
+            accepted.add(coding.strip())
+        if self.br is not None and ("br" in accepted or "*" in accepted):
+            return self.br, "br"
+        if self.gzip is not None and ("gzip" in accepted or "*" in accepted):
+            return self.gzip, "gzip"
+        return self.identity, None
+
+class RenderCache:
+    """Keeps the latest rendered body per resource, re-rendering when its content digest changes"""
+
+    def __init__(self):
+        self._bodies: Dict[str, RenderedBody] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str, digest: str, render: Callable[[], bytes]) -> RenderedBody:
+        rendered = self._bodies.get(key)
+        if rendered is not None and rendered.digest == digest:
+            return rendered
+        with self._lock:
+            rendered = self._bodies.get(key)
+            if rendered is None or rendered.digest != digest:
+                rendered = RenderedBody(digest, render())
+                self._bodies[key] = rendered
+            return rendered
+
+    def clear(self):
+        with self._lock:
+            self._bodies.clear()
+
+render_cache = RenderCache()
+
+def prerendered_response(request: Request, rendered: RenderedBody, last_modified: float,
+                         variant: Optional[str] = None) -> Response:
+    """Serve a pre-rendered body with content negotiation and conditional request handling"""
+    body, encoding = rendered.select(request.headers.get("accept-encoding", ""))
+    etag_variant = "-".join(part for part in (variant, encoding) if part)
+    etag = make_etag(rendered.digest, etag_variant or None)
+    headers = cache_headers(etag, last_modified)
+    headers["Vary"] = "Accept-Encoding"
+    if is_not_modified(request, etag, last_modified):
+        return Response(status_code=304, headers=headers)
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -0,0 +1,262 @@
+import math
+import os
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+from menu_index import MenuIndex
+
+if TYPE_CHECKING:
+    import numpy as np
+
+TAX_RATE = float(os.environ.get("TAX_RATE", "0.0875"))
+DELIVERY_FEE = float(os.environ.get("DELIVERY_FEE", "3.99"))
+# Largest difference, in cents, tolerated between a client-supplied amount and
+# the server-side price; the frontend rounds tax and total independently
+PRICE_TOLERANCE_CENTS = int(os.environ.get("PRICE_TOLERANCE_CENTS", "1"))
+# Batches with fewer orders than this are priced one order at a time in plain
+# Python, which beats numpy's per-call overhead on small carts
+PRICING_VECTORIZE_MIN_ORDERS = int(os.environ.get("PRICING_VECTORIZE_MIN_ORDERS", "16"))
+
+# Largest quantity accepted for one cart line; it also keeps line totals far
+# from the int64 limit of the vectorized path
+MAX_ITEM_QUANTITY = int(os.environ.get("MAX_ITEM_QUANTITY", "1000"))
+
+INT64_MIN, INT64_MAX = -2 ** 63, 2 ** 63 - 1
+
+ORDER_ITEM_FIELDS = ("id", "name", "description", "price", "image", "category")
+TOTAL_FIELDS = ("subtotal", "tax", "delivery_fee", "total")
+
+class PricingError(ValueError):
+    """Raised when orders reference unknown items or their totals do not match the menu"""
+
+    def __init__(self, errors: List[str]):
+        super().__init__("; ".join(errors))
+        self.errors = errors
+
+def to_cents(amount: Any) -> int:
+    """Convert a dollar amount to integer cents"""
+    return int(round(float(amount) * 100))
+
+class PriceTable:
+    """Menu prices in integer cents, for pricing single orders and whole batches
+
+    cents maps each menu item id to its price. Small batches are priced one
+    order at a time against it in plain Python; batches of at least
+    vectorize_min orders are priced in one numpy pass, looking ids up with
+    searchsorted over the sorted menu ids. The sorted arrays, and numpy
+    itself, are only loaded the first time a large batch is priced, keeping
+    numpy out of worker startup and single order requests. A table is built
+    once per menu index and never changes its prices, like the index.
+    """
+
+    def __init__(self, index: MenuIndex, tax_rate: float = TAX_RATE, delivery_fee: float = DELIVERY_FEE,
+                 tolerance_cents: int = PRICE_TOLERANCE_CENTS, vectorize_min: int = PRICING_VECTORIZE_MIN_ORDERS,
+                 max_quantity: int = MAX_ITEM_QUANTITY):
+        self.index = index
+        self.tax_rate = tax_rate
+        self.delivery_fee = to_cents(delivery_fee)
+        self.tolerance = tolerance_cents
+        self.vectorize_min = vectorize_min
+        self.max_quantity = max_quantity
+        self.cents: Dict[int, int] = {}
+        # Order item copies are stamped from these instead of trusting the cart
+        self.items: Dict[int, Dict] = {}
+        for item_id, menu_item in index.by_id.items():
+            if isinstance(item_id, int) and 0 <= item_id <= INT64_MAX:
+                self.cents[item_id] = to_cents(menu_item.get("price", 0))
+                self.items[item_id] = {field: menu_item.get(field) for field in ORDER_ITEM_FIELDS}
+        self._sorted: Optional[Tuple["np.ndarray", "np.ndarray"]] = None
+
+    def quote(self, orders: List[Dict]) -> List[Dict]:
+        """Price every order, in one vectorized pass for large batches
+
+        Returns one quote per order with the recomputed items and totals and
+        a list of errors: unknown items, bad quantities, and any item price or
+        total that differs from the server-side amount. Totals the client did
+        not supply are priced but not checked.
+        """
+        if len(orders) < self.vectorize_min:
+            return [self._quote_one(order) for order in orders]
+        return self._quote_batch(orders)
+
+    def _quote_one(self, order: Dict) -> Dict:
+        lines = order.get("items") or ()
+        errors: List[str] = [] if lines else ["order has no items"]
+        items: List[Dict] = []
+        subtotal = 0
+        for item in lines:
+            item_id = item.get("id")
+            resolved = _as_int(item_id, -1)
+            quantity = _as_int(item.get("quantity"), 0)
+            unit = self.cents.get(resolved)
+            if unit is None:
+                errors.append(f"unknown menu item {item_id}")
+                continue
+            if not 0 < quantity <= self.max_quantity:
+                errors.append(f"invalid quantity for item {item_id}")
+                continue
+            if self._differs(item.get("price"), unit):
+                errors.append(f"price of item {item_id} is {unit / 100:.2f}")
+            subtotal += unit * quantity
+            items.append(dict(self.items[resolved], quantity=quantity))
+
+        tax = math.floor(subtotal * self.tax_rate + 0.5)
+        delivery_fee = self.delivery_fee if order.get("order_type") == "delivery" else 0
+        computed = {"subtotal": subtotal, "tax": tax, "delivery_fee": delivery_fee,
+                    "total": subtotal + tax + delivery_fee}
+        # Totals are only worth reporting once every cart line prices cleanly
+        if not errors:
+            errors = [f"{field} should be {computed[field] / 100:.2f}"
+                      for field in TOTAL_FIELDS if self._differs(order.get(field), computed[field])]
+        quote: Dict[str, Any] = {field: computed[field] / 100 for field in TOTAL_FIELDS}
+        quote["items"] = items if not errors else []
+        quote["errors"] = errors
+        return quote
+
+    def _differs(self, claimed: Any, cents: int) -> bool:
+        """Whether a client-supplied amount is off from cents by more than the tolerance; missing ones never are"""
+        amount = _as_float(claimed) * 100
+        if math.isnan(amount):
+            return False
+        return math.isinf(amount) or abs(round(amount) - cents) > self.tolerance
+
+    def _sorted_prices(self) -> Tuple["np.ndarray", "np.ndarray"]:
+        """Menu ids in ascending order and their prices, ending in an INT64_MAX sentinel priced -1"""
+        if self._sorted is None:
+            import numpy as np
+            item_ids = sorted(self.cents)
+            self._sorted = (np.asarray(item_ids + [INT64_MAX], dtype=np.int64),
+                            np.asarray([self.cents[item_id] for item_id in item_ids] + [-1], dtype=np.int64))
+        return self._sorted
+
+    def _quote_batch(self, orders: List[Dict]) -> List[Dict]:
+        import numpy as np
+        menu_ids, menu_cents = self._sorted_prices()
+        count = len(orders)
+        bounds: List[range] = []
+        owners: List[int] = []
+        item_ids: List[Any] = []
+        quantities: List[Any] = []
+        claimed_prices: List[Any] = []
+        for position, order in enumerate(orders):
+            start = len(owners)
+            for item in order.get("items") or ():
+                owners.append(position)
+                item_ids.append(item.get("id"))
+                quantities.append(item.get("quantity"))
+                claimed_prices.append(item.get("price"))
+            bounds.append(range(start, len(owners)))
+
+        owner = np.asarray(owners, dtype=np.int64)
+        ids = _int_array(item_ids, -1)
+        quantity = _int_array(quantities, 0)
+        # Ids past the last menu id land on the sentinel, which never matches a valid id
+        slot = np.searchsorted(menu_ids, ids)
+        unit = np.where(menu_ids[slot] == ids, menu_cents[slot], -1)
+        known = unit >= 0
+        valid = known & (quantity > 0) & (quantity <= self.max_quantity)
+        claimed = np.rint(_float_array(claimed_prices) * 100)
+        price_mismatch = valid & ~np.isnan(claimed) & (np.abs(claimed - unit) > self.tolerance)
+
+        lines = np.where(valid, unit * quantity, 0)
+        subtotal = np.bincount(owner, weights=lines, minlength=count).astype(np.int64)
+        tax = np.floor(subtotal * self.tax_rate + 0.5).astype(np.int64)
+        is_delivery = np.asarray([order.get("order_type") == "delivery" for order in orders], dtype=bool)
+        delivery_fee = np.where(is_delivery, self.delivery_fee, 0)
+        total = subtotal + tax + delivery_fee
+        computed = {"subtotal": subtotal, "tax": tax, "delivery_fee": delivery_fee, "total": total}
+
+        errors: List[List[str]] = [[] if bounds[position] else ["order has no items"] for position in range(count)]
+        for line in np.flatnonzero(~valid | price_mismatch):
+            position, item_id = owners[line], item_ids[line]
+            if not known[line]:
+                errors[position].append(f"unknown menu item {item_id}")
+            elif not 0 < quantity[line] <= self.max_quantity:
+                errors[position].append(f"invalid quantity for item {item_id}")
+            else:
+                errors[position].append(f"price of item {item_id} is {unit[line] / 100:.2f}")
+        # Totals are only worth reporting once every cart line prices cleanly
+        clean = np.asarray([not order_errors for order_errors in errors], dtype=bool)
+        for field in TOTAL_FIELDS:
+            claimed_total = np.rint(_float_array([order.get(field) for order in orders]) * 100)
+            mismatch = clean & ~np.isnan(claimed_total) & (np.abs(claimed_total - computed[field]) > self.tolerance)
+            for position in np.flatnonzero(mismatch):
+                errors[position].append(f"{field} should be {computed[field][position] / 100:.2f}")
+
+        templates, resolved, counts = self.items, ids.tolist(), quantity.tolist()
+        columns = [(computed[field] / 100).tolist() for field in TOTAL_FIELDS]
+        quotes = []
+        for position, amounts in enumerate(zip(*columns)):
+            quote = dict(zip(TOTAL_FIELDS, amounts))
+            quote["items"] = [
+                dict(templates[resolved[line]], quantity=counts[line]) for line in bounds[position]
+            ] if not errors[position] else []
+            quote["errors"] = errors[position]
+            quotes.append(quote)
+        return quotes
+
+def _int_array(values: List[Any], default: int) -> "np.ndarray":
+    """Convert values to an int64 array, substituting default for anything that is not a number"""
+    import numpy as np
+    try:
+        return np.asarray(values, dtype=np.int64)
+    except (TypeError, ValueError, OverflowError):
+        return np.asarray([_as_int(value, default) for value in values], dtype=np.int64)
+
+def _float_array(values: List[Any]) -> "np.ndarray":
+    """Convert values to a float64 array, with None and non-numbers as NaN"""
+    import numpy as np
+    try:
+        return np.asarray(values, dtype=np.float64)
+    except (TypeError, ValueError):
+        return np.asarray([_as_float(value) for value in values], dtype=np.float64)
+
+def _as_int(value: Any, default: int) -> int:
+    """Convert value to an int, substituting default for non-numbers and numbers outside the int64 range"""
+    try:
+        number = int(value)
+    except (TypeError, ValueError, OverflowError):
+        return default
+    return number if INT64_MIN <= number <= INT64_MAX else default
+
+def _as_float(value: Any) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return float("nan")
+
+_table: Optional[PriceTable] = None
+
+def get_price_table(index: MenuIndex) -> PriceTable:
+    """Get the price table for a menu index, building it the first time the index is seen"""
+    global _table
+    table = _table
+    if table is None or table.index is not index:
+        table = PriceTable(index)
+        _table = table
+    return table
+
+def quote_orders(index: MenuIndex, orders_data: List[Dict]) -> List[Dict]:
+    """Price orders against a menu index without rejecting any, see PriceTable.quote"""
+    return get_price_table(index).quote(orders_data)
+
+def apply_quote(order_data: Dict, quote: Dict) -> Dict:
+    """Copy an order request with its items and totals replaced by the server-side quote"""
+    order = dict(order_data)
+    order["items"] = quote["items"]
+    order.update((field, quote[field]) for field in TOTAL_FIELDS)
+    return order
+
+def price_orders(index: MenuIndex, orders_data: List[Dict]) -> List[Dict]:
+    """Replace the client's items and totals with server-side prices, raising PricingError on mismatches
+
+    Item copies are rebuilt from the menu so only the id and quantity of each
+    cart line are taken from the client.
+    """
+    quotes = quote_orders(index, orders_data)
+    errors = []
+    for position, quote in enumerate(quotes):
+        prefix = f"order {position}: " if len(quotes) > 1 else ""
+        errors.extend(prefix + error for error in quote["errors"])
+    if errors:
+        raise PricingError(errors)
+    return [apply_quote(order_data, quote) for order_data, quote in zip(orders_data, quotes)]
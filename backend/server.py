@@ -1,24 +1,79 @@
-from fastapi import FastAPI, APIRouter, HTTPException
+from fastapi import FastAPI, APIRouter, Header, HTTPException, Query, Request, Response
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
+import asyncio
 import os
+import json
 import logging
 from pathlib import Path
-from pydantic import BaseModel, Field
-from typing import List, Dict, Any, Optional
+from pydantic import BaseModel, Field, ValidationError
+from typing import List, Dict, Any, Optional, Tuple
 import uuid
 from datetime import datetime
-from file_storage import MenuService, OrderService, RestaurantService, ContactService
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
+# Imported after load_dotenv so storage settings from .env are applied
+from file_storage import (MenuService, OrderService, RestaurantService, ContactService, CacheService,
+                          AnalyticsService, KitchenService, ORDER_STATUSES, OrderStatusConflict, STORAGE_BACKEND,
+                          close_backend, storage)
+from http_cache import conditional_response, make_etag
+from idempotency import (IDEMPOTENCY_PERSIST, IdempotencyKeyInProgress, IdempotencyKeyMismatch, IdempotencyStore,
+                         request_fingerprint)
+from json_codec import dumps_lines, loads
+from metrics import MODEL_VALIDATION_SECONDS, MetricsMiddleware, gauge_lines, registry
+from order_events import order_events
+from pricing import PricingError, get_price_table
+from prerender import JSON_RESPONSE_CLASS, PRERENDERED_RESPONSES, prerendered_response, render_cache, render_json
+from admission import RATE_LIMIT_ENABLED, RATE_LIMIT_STORE, AdmissionMiddleware, create_buckets
+from async_storage import AsyncService, iterate_chunks, run_in_storage_pool, shutdown_executor
+
 # Create the main app without a prefix
-app = FastAPI(title="Chickza Restaurant API", description="API for Chickza Restaurant")
+app = FastAPI(title="Chickza Restaurant API", description="API for Chickza Restaurant",
+              default_response_class=JSON_RESPONSE_CLASS)
 
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
 
+# Largest number of orders accepted by one POST /api/orders/batch
+MAX_BATCH_ORDERS = int(os.environ.get("MAX_BATCH_ORDERS", "10000"))
+# Largest POST /api/orders/batch body in bytes, enforced while it is read, before any parsing
+MAX_BATCH_BYTES = int(os.environ.get("MAX_BATCH_BYTES", str(MAX_BATCH_ORDERS * 4096)))
+# Load and pre-render the menu and restaurant info before serving the first request
+WARM_CACHES_ON_STARTUP = os.environ.get("WARM_CACHES_ON_STARTUP", "true").lower() in ("1", "true", "yes")
+# Seconds between keep-alives on an order event stream, each of which also
+# re-reads the order to catch changes made by other worker processes
+ORDER_EVENTS_RECHECK_INTERVAL = float(os.environ.get("ORDER_EVENTS_RECHECK_INTERVAL", "15"))
+
+if STORAGE_BACKEND == "mongo":
+    # Natively async services over the pooled motor client created on startup
+    import mongo_storage
+    from mongo_storage import (
+        MongoMenuService as menu_service,
+        MongoOrderService as order_service,
+        MongoRestaurantService as restaurant_service,
+        MongoContactService as contact_service,
+        MongoCacheService as cache_service,
+        MongoAnalyticsService as analytics_service,
+        MongoKitchenService as kitchen_service,
+    )
+else:
+    # Services whose blocking file I/O runs in the storage thread pool
+    menu_service = AsyncService(MenuService)
+    order_service = AsyncService(OrderService)
+    restaurant_service = AsyncService(RestaurantService)
+    contact_service = AsyncService(ContactService)
+    cache_service = AsyncService(CacheService)
+    analytics_service = AsyncService(AnalyticsService)
+    kitchen_service = AsyncService(KitchenService)
+
+# Idempotency-Key -> order id, in a file shared by all workers if IDEMPOTENCY_PERSIST is set
+idempotency_keys = AsyncService(IdempotencyStore(
+    path=storage._get_file_path("idempotency_keys.jsonl") if IDEMPOTENCY_PERSIST else None
+))
+
 # Define Models
 class MenuItem(BaseModel):
     id: int
@@ -69,6 +124,9 @@ class OrderResponse(BaseModel):
     total: float
     created_at: str
 
+class OrderStatusRequest(BaseModel):
+    status: str
+
 class ContactRequest(BaseModel):
     name: str
     email: str
@@ -81,29 +139,102 @@ class ContactResponse(BaseModel):
     message: str
     message_id: Optional[str] = None
 
+async def ndjson_stream(records):
+    """Encode an iterator of records as newline-delimited JSON without holding them all in memory"""
+    async for chunk in iterate_chunks(records):
+        yield dumps_lines(chunk)
+
+def rendered_menu(snapshot: Dict[str, Any]):
+    return render_cache.get("menu", snapshot["digest"], lambda: render_json(MenuResponse(**snapshot["data"]).dict()))
+
+def rendered_category(snapshot: Dict[str, Any], category: str):
+    menu_data = snapshot["data"]
+    items = menu_data.get(category, []) if isinstance(menu_data, dict) else []
+    return render_cache.get(f"menu/{category}", snapshot["digest"],
+                            lambda: render_json({"category": category, "items": items}))
+
+def rendered_restaurant_info(snapshot: Dict[str, Any]):
+    return render_cache.get("restaurant-info", snapshot["digest"], lambda: render_json(snapshot["data"]))
+
+async def warm_caches():
+    """Load the menu and restaurant info, build the menu index and price table and pre-render responses"""
+    menu = await menu_service.get_menu_snapshot()
+    info = await restaurant_service.get_restaurant_info_snapshot()
+    get_price_table(await menu_service.get_menu_index())
+    if PRERENDERED_RESPONSES:
+        rendered_menu(menu)
+        for category in ("pizza", "chicken"):
+            rendered_category(menu, category)
+        rendered_restaurant_info(info)
+
+async def warm_kitchen_queue():
+    """Seed the active orders working set and the kitchen queue that follows it"""
+    try:
+        await kitchen_service.get_queue()
+    except Exception as e:
+        logger.error(f"Error warming the kitchen queue: {e}")
+
 # Menu Routes
 @api_router.get("/")
 async def root():
     return {"message": "Welcome to Chickza Restaurant API"}
 
 @api_router.get("/menu", response_model=MenuResponse)
-async def get_menu():
+async def get_menu(request: Request, response: Response):
     """Get all menu items"""
     try:
-        menu_data = MenuService.get_all_menu_items()
-        return MenuResponse(**menu_data)
+        snapshot = await menu_service.get_menu_snapshot()
+        if PRERENDERED_RESPONSES:
+            return prerendered_response(request, rendered_menu(snapshot), snapshot["last_modified"])
+        not_modified = conditional_response(
+            request, response, make_etag(snapshot["digest"]), snapshot["last_modified"]
+        )
+        if not_modified:
+            return not_modified
+        with MODEL_VALIDATION_SECONDS.time("MenuResponse"):
+            return MenuResponse(**snapshot["data"])
     except Exception as e:
         logger.error(f"Error getting menu: {e}")
         raise HTTPException(status_code=500, detail="Failed to retrieve menu")
 
+# Declared before /menu/{category} so "search" is not taken for a category
+@api_router.get("/menu/search")
+async def search_menu(
+    q: Optional[str] = Query(None, max_length=200),
+    min_price: Optional[float] = Query(None, ge=0),
+    max_price: Optional[float] = Query(None, ge=0),
+    popular: Optional[bool] = None,
+    category: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=1000),
+):
+    """Search menu items by words of their name or description, price range, popular flag and category"""
+    if min_price is not None and max_price is not None and min_price > max_price:
+        raise HTTPException(status_code=400, detail="min_price must not be greater than max_price")
+    try:
+        items = await menu_service.search_items(q, min_price, max_price, popular, category)
+        return {"count": len(items), "items": items[:limit]}
+    except Exception as e:
+        logger.error(f"Error searching menu: {e}")
+        raise HTTPException(status_code=500, detail="Failed to search menu")
+
 @api_router.get("/menu/{category}")
-async def get_menu_by_category(category: str):
+async def get_menu_by_category(category: str, request: Request, response: Response):
     """Get menu items by category (pizza or chicken)"""
     try:
         if category not in ["pizza", "chicken"]:
             raise HTTPException(status_code=400, detail="Category must be 'pizza' or 'chicken'")
         
-        items = MenuService.get_menu_by_category(category)
+        snapshot = await menu_service.get_menu_snapshot()
+        if PRERENDERED_RESPONSES:
+            return prerendered_response(request, rendered_category(snapshot, category), snapshot["last_modified"],
+                                        variant=category)
+        menu_data = snapshot["data"]
+        items = menu_data.get(category, []) if isinstance(menu_data, dict) else []
+        not_modified = conditional_response(
+            request, response, make_etag(snapshot["digest"], category), snapshot["last_modified"]
+        )
+        if not_modified:
+            return not_modified
         return {"category": category, "items": items}
     except HTTPException:
         raise
@@ -115,7 +246,7 @@ async def get_menu_by_category(category: str):
 async def get_menu_item(item_id: int):
     """Get a specific menu item by ID"""
     try:
-        item = MenuService.get_item_by_id(item_id)
+        item = await menu_service.get_item_by_id(item_id)
         if not item:
             raise HTTPException(status_code=404, detail="Menu item not found")
         return item
@@ -127,51 +258,297 @@ async def get_menu_item(item_id: int):
 
 # Order Routes
 @api_router.post("/orders", response_model=OrderResponse)
-async def create_order(order_request: OrderRequest):
-    """Create a new order"""
+async def create_order(order_request: OrderRequest, response: Response,
+                       idempotency_key: Optional[str] = Header(None, max_length=255)):
+    """Create a new order
+
+    A retry carrying the same Idempotency-Key header as an earlier request
+    gets the order that request created instead of a duplicate.
+    """
     try:
         order_data = order_request.dict()
-        new_order = OrderService.create_order(order_data)
+        if not idempotency_key:
+            new_order = await order_service.create_order(order_data)
+        else:
+            new_order = await create_order_once(idempotency_key, order_data, response)
         if not new_order:
             raise HTTPException(status_code=500, detail="Failed to create order")
-        return OrderResponse(**new_order)
+        with MODEL_VALIDATION_SECONDS.time("OrderResponse"):
+            return OrderResponse(**new_order)
     except HTTPException:
         raise
+    except IdempotencyKeyInProgress:
+        raise HTTPException(status_code=409, detail="A request with this Idempotency-Key is still in progress",
+                            headers={"Retry-After": "1"})
+    except IdempotencyKeyMismatch:
+        raise HTTPException(status_code=422, detail="Idempotency-Key was already used for a different order")
+    except PricingError as e:
+        raise HTTPException(status_code=400, detail={"message": "Order does not match menu prices", "errors": e.errors})
     except Exception as e:
         logger.error(f"Error creating order: {e}")
         raise HTTPException(status_code=500, detail="Failed to create order")
 
+async def create_order_once(key: str, order_data: Dict[str, Any], response: Response) -> Optional[Dict[str, Any]]:
+    """Create an order unless one was already created under key, in which case that order is returned"""
+    fingerprint = request_fingerprint(order_data)
+    order_id = await idempotency_keys.begin(key, fingerprint)
+    if order_id is not None:
+        order = await order_service.get_order_by_id(order_id)
+        if order:
+            response.headers["Idempotent-Replayed"] = "true"
+            return order
+        # The order is gone (e.g. the store outlived the data); create it afresh
+    try:
+        new_order = await order_service.create_order(order_data)
+    except Exception:
+        await idempotency_keys.release(key)
+        raise
+    if not new_order:
+        await idempotency_keys.release(key)
+        return None
+    await idempotency_keys.complete(key, fingerprint, new_order["id"])
+    return new_order
+
+async def read_batch_body(request: Request) -> bytes:
+    """Read a batch request body, answering 413 as soon as it is known to exceed MAX_BATCH_BYTES"""
+    declared = request.headers.get("content-length", "")
+    if declared.isdigit() and int(declared) > MAX_BATCH_BYTES:
+        raise HTTPException(status_code=413, detail=f"Order batches are limited to {MAX_BATCH_BYTES} bytes")
+    chunks, size = [], 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        if size > MAX_BATCH_BYTES:
+            raise HTTPException(status_code=413, detail=f"Order batches are limited to {MAX_BATCH_BYTES} bytes")
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+def parse_order_batch(body: bytes, content_type: str) -> List[Any]:
+    """Split a batch request body into raw order entries, from a JSON array or one JSON object per line
+
+    NDJSON lines that are not valid JSON are kept as None so they can be
+    reported against their line number.
+    """
+    if "ndjson" in content_type:
+        entries = []
+        for line in body.splitlines():
+            if not line.strip():
+                continue
+            try:
+                entries.append(loads(line))
+            except ValueError:
+                entries.append(None)
+        return entries
+    entries = loads(body)
+    if isinstance(entries, dict):
+        entries = entries.get("orders")
+    if not isinstance(entries, list):
+        raise ValueError("Expected a JSON array of orders")
+    return entries
+
+def validation_errors(error: ValidationError) -> List[str]:
+    """Flatten a pydantic validation error into "field: message" strings"""
+    return [f"{'.'.join(str(part) for part in e['loc']) or 'order'}: {e['msg']}" for e in error.errors()]
+
+def validate_order_batch(body: bytes, content_type: str) -> Tuple[List[Optional[Dict[str, Any]]], List[int], List[Dict]]:
+    """Parse a batch request body and validate each order in it
+
+    Returns one result slot per entry (filled in for rejected entries), the
+    positions of the valid orders and their data. Raises a 413 for too many
+    orders and a 400 for a body that is not a batch.
+    """
+    # NDJSON orders can be counted without parsing them; a JSON array is bounded by MAX_BATCH_BYTES
+    if "ndjson" in content_type and sum(1 for line in body.splitlines() if line.strip()) > MAX_BATCH_ORDERS:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BATCH_ORDERS} orders per batch")
+    try:
+        entries = parse_order_batch(body, content_type)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid order batch: {e}")
+    if len(entries) > MAX_BATCH_ORDERS:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BATCH_ORDERS} orders per batch")
+
+    results: List[Optional[Dict[str, Any]]] = [None] * len(entries)
+    positions, orders_data = [], []
+    with MODEL_VALIDATION_SECONDS.time("OrderRequest"):
+        for position, entry in enumerate(entries):
+            if not isinstance(entry, dict):
+                results[position] = {"status": "rejected", "errors": ["order must be a JSON object"]}
+                continue
+            try:
+                orders_data.append(OrderRequest(**entry).dict())
+                positions.append(position)
+            except ValidationError as e:
+                results[position] = {"status": "rejected", "errors": validation_errors(e)}
+    return results, positions, orders_data
+
+@api_router.post("/orders/batch")
+async def create_orders_batch(request: Request, atomic: bool = False):
+    """Create many orders at once from a JSON array or an NDJSON body, e.g. catering or partner imports
+
+    Every order is validated and priced, the accepted ones are written in a
+    single storage transaction and one result per order is returned in input
+    order. With atomic=true nothing is written unless every order is valid.
+    """
+    body = await read_batch_body(request)
+    # Parsing and validating up to MAX_BATCH_ORDERS orders takes a while, so it stays off the event loop
+    results, positions, orders_data = await run_in_storage_pool(
+        validate_order_batch, body, request.headers.get("content-type", ""))
+
+    try:
+        if atomic and len(orders_data) < len(results):
+            order_results = [
+                {"status": "skipped", "errors": ["another order in the batch was rejected"]} for _ in orders_data
+            ]
+        elif orders_data:
+            order_results = await order_service.import_orders(orders_data, atomic=atomic)
+        else:
+            order_results = []
+    except Exception as e:
+        logger.error(f"Error importing order batch: {e}")
+        raise HTTPException(status_code=500, detail="Failed to create orders")
+    for position, result in zip(positions, order_results):
+        results[position] = result
+
+    counts = {"created": 0, "rejected": 0, "skipped": 0, "failed": 0}
+    for position, result in enumerate(results):
+        result["index"] = position
+        counts[result["status"]] += 1
+    return {**counts, "results": results}
+
+@api_router.get("/orders/active", response_model=List[OrderResponse])
+async def get_active_orders(status: Optional[str] = None):
+    """Get recent orders that are not completed yet, oldest first, e.g. for the kitchen view"""
+    try:
+        orders = await order_service.get_active_orders(status)
+        with MODEL_VALIDATION_SECONDS.time("OrderResponse"):
+            return [OrderResponse(**order.to_dict()) for order in orders]
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error getting active orders: {e}")
+        raise HTTPException(status_code=500, detail="Failed to retrieve orders")
+
 @api_router.get("/orders/{order_id}", response_model=OrderResponse)
 async def get_order(order_id: str):
     """Get order by ID"""
     try:
-        order = OrderService.get_order_by_id(order_id)
+        order = await order_service.get_order_by_id(order_id)
+        if not order:
+            raise HTTPException(status_code=404, detail="Order not found")
+        with MODEL_VALIDATION_SECONDS.time("OrderResponse"):
+            return OrderResponse(**order)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error getting order {order_id}: {e}")
+        raise HTTPException(status_code=500, detail="Failed to retrieve order")
+
+@api_router.patch("/orders/{order_id}/status", response_model=OrderResponse)
+async def update_order_status(order_id: str, status_request: OrderStatusRequest):
+    """Move an order to its next status: pending -> preparing -> ready -> completed"""
+    try:
+        order = await order_service.update_order_status(order_id, status_request.status)
         if not order:
             raise HTTPException(status_code=404, detail="Order not found")
-        return OrderResponse(**order)
+        with MODEL_VALIDATION_SECONDS.time("OrderResponse"):
+            return OrderResponse(**order)
     except HTTPException:
         raise
+    except OrderStatusConflict as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
+        logger.error(f"Error updating order {order_id}: {e}")
+        raise HTTPException(status_code=500, detail="Failed to update order")
+
+def status_event(order: Dict[str, Any]) -> str:
+    """Format an order's status as a Server-Sent Event"""
+    data = {"id": order.get("id"), "status": order.get("status"),
+            "updated_at": order.get("updated_at") or order.get("created_at")}
+    return f"event: status\ndata: {json.dumps(data)}\n\n"
+
+async def status_stream(subscription, order: Dict[str, Any]):
+    """Send the current status, then every change until the order is completed"""
+    try:
+        yield status_event(order)
+        status = order.get("status")
+        while status != ORDER_STATUSES[-1]:
+            try:
+                order = await subscription.get(timeout=ORDER_EVENTS_RECHECK_INTERVAL)
+            except asyncio.TimeoutError:
+                order = await order_service.get_order_by_id(order["id"]) or order
+                if order.get("status") == status:
+                    yield ": keep-alive\n\n"
+                    continue
+            if order.get("status") != status:
+                status = order.get("status")
+                yield status_event(order)
+    finally:
+        subscription.close()
+
+@api_router.get("/orders/{order_id}/events")
+async def order_status_events(order_id: str):
+    """Stream an order's status changes as Server-Sent Events instead of polling GET /api/orders/{order_id}"""
+    # Subscribe before reading the order so no change can slip in between
+    subscription = order_events.subscribe(order_id)
+    try:
+        order = await order_service.get_order_by_id(order_id)
+    except Exception as e:
+        subscription.close()
         logger.error(f"Error getting order {order_id}: {e}")
         raise HTTPException(status_code=500, detail="Failed to retrieve order")
+    if not order:
+        subscription.close()
+        raise HTTPException(status_code=404, detail="Order not found")
+    return StreamingResponse(
+        status_stream(subscription, order), media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 @api_router.get("/orders")
-async def get_all_orders():
-    """Get all orders (for admin purposes)"""
+async def get_all_orders(
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    status: Optional[str] = None,
+    order_type: Optional[str] = None,
+    created_from: Optional[str] = None,
+    created_to: Optional[str] = None,
+    phone: Optional[str] = None,
+    format: str = Query("json", pattern="^(json|ndjson)$"),
+):
+    """Get orders page by page, or stream them all as NDJSON (for admin purposes)"""
+    filters = {
+        "status": status,
+        "order_type": order_type,
+        "created_from": created_from,
+        "created_to": created_to,
+        "phone": phone,
+    }
     try:
-        orders = OrderService.get_all_orders()
-        return {"orders": orders}
+        if format == "ndjson":
+            orders = await order_service.iter_orders(**filters)
+            return StreamingResponse(ndjson_stream(orders), media_type="application/x-ndjson")
+        return await order_service.list_orders(cursor=cursor, limit=limit, **filters)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error getting all orders: {e}")
         raise HTTPException(status_code=500, detail="Failed to retrieve orders")
 
 # Restaurant Info Routes
 @api_router.get("/restaurant-info")
-async def get_restaurant_info():
+async def get_restaurant_info(request: Request, response: Response):
     """Get restaurant information"""
     try:
-        info = RestaurantService.get_restaurant_info()
-        return info
+        snapshot = await restaurant_service.get_restaurant_info_snapshot()
+        if PRERENDERED_RESPONSES:
+            return prerendered_response(request, rendered_restaurant_info(snapshot), snapshot["last_modified"])
+        not_modified = conditional_response(
+            request, response, make_etag(snapshot["digest"]), snapshot["last_modified"]
+        )
+        if not_modified:
+            return not_modified
+        return snapshot["data"]
     except Exception as e:
         logger.error(f"Error getting restaurant info: {e}")
         raise HTTPException(status_code=500, detail="Failed to retrieve restaurant information")
@@ -181,25 +558,139 @@ async def get_restaurant_info():
 async def submit_contact(contact_request: ContactRequest):
     """Submit contact form"""
     try:
-        result = ContactService.submit_contact_message(contact_request.dict())
+        result = await contact_service.submit_contact_message(contact_request.dict())
         return ContactResponse(**result)
     except Exception as e:
         logger.error(f"Error submitting contact message: {e}")
         raise HTTPException(status_code=500, detail="Failed to submit contact message")
 
 @api_router.get("/contact/messages")
-async def get_contact_messages():
-    """Get all contact messages (for admin purposes)"""
+async def get_contact_messages(
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    created_from: Optional[str] = None,
+    created_to: Optional[str] = None,
+    format: str = Query("json", pattern="^(json|ndjson)$"),
+):
+    """Get contact messages page by page, or stream them all as NDJSON (for admin purposes)"""
     try:
-        messages = ContactService.get_all_messages()
-        return {"messages": messages}
+        if format == "ndjson":
+            messages = await contact_service.iter_messages(created_from=created_from, created_to=created_to)
+            return StreamingResponse(ndjson_stream(messages), media_type="application/x-ndjson")
+        return await contact_service.list_messages(
+            cursor=cursor, limit=limit, created_from=created_from, created_to=created_to
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error getting contact messages: {e}")
         raise HTTPException(status_code=500, detail="Failed to retrieve contact messages")
 
+# Admin Routes
+@api_router.get("/admin/cache")
+async def get_cache_stats():
+    """Get menu/restaurant info cache hit and miss counters (for admin purposes)"""
+    return await cache_service.get_stats()
+
+@api_router.post("/admin/cache/reload")
+async def reload_cache():
+    """Reload cached menu and restaurant info from disk (for admin purposes)"""
+    try:
+        return await cache_service.reload()
+    except Exception as e:
+        logger.error(f"Error reloading cache: {e}")
+        raise HTTPException(status_code=500, detail="Failed to reload cache")
+
+# Analytics Routes (for admin purposes)
+@api_router.get("/analytics/daily")
+async def get_daily_analytics(days: int = Query(7, ge=1, le=366), until: Optional[str] = None):
+    """Revenue, order counts and pickup/delivery split per day, for the days days up to until (UTC)"""
+    try:
+        return await analytics_service.get_daily(days, until)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error getting daily analytics: {e}")
+        raise HTTPException(status_code=500, detail="Failed to retrieve analytics")
+
+@api_router.get("/analytics/hourly")
+async def get_hourly_analytics(day: Optional[str] = None):
+    """Revenue, order counts and pickup/delivery split per hour of a day (UTC, default today)"""
+    try:
+        return await analytics_service.get_hourly(day)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error getting hourly analytics: {e}")
+        raise HTTPException(status_code=500, detail="Failed to retrieve analytics")
+
+@api_router.get("/analytics/top-items")
+async def get_top_items(day: Optional[str] = None, limit: int = Query(10, ge=1, le=100)):
+    """Best selling items of a day by quantity (UTC, default today)"""
+    try:
+        return await analytics_service.get_top_items(day, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error getting top items: {e}")
+        raise HTTPException(status_code=500, detail="Failed to retrieve analytics")
+
+# Kitchen Routes
+@api_router.get("/kitchen/queue")
+async def get_kitchen_queue():
+    """Pending and preparing orders in the order the kitchen should work on them, with estimated ready times"""
+    try:
+        return {"orders": await kitchen_service.get_queue()}
+    except Exception as e:
+        logger.error(f"Error getting kitchen queue: {e}")
+        raise HTTPException(status_code=500, detail="Failed to retrieve kitchen queue")
+
+@api_router.get("/orders/{order_id}/eta")
+async def get_order_eta(order_id: str):
+    """An order's place in the kitchen queue and estimated ready time
+
+    Orders that are ready or completed have no position or estimate.
+    """
+    try:
+        eta = await kitchen_service.get_order_eta(order_id)
+        if eta is not None:
+            return eta
+        order = await order_service.get_order_by_id(order_id)
+        if not order:
+            raise HTTPException(status_code=404, detail="Order not found")
+        return {"id": order_id, "status": order.get("status"), "position": None, "estimated_ready_at": None}
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error getting ETA for order {order_id}: {e}")
+        raise HTTPException(status_code=500, detail="Failed to retrieve order ETA")
+
+# Metrics Routes
+@api_router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Request latency, storage I/O and cache metrics in Prometheus text format"""
+    stats = await cache_service.get_stats()
+    cache_lines = gauge_lines(
+        "chickza_document_cache_requests", "Menu/restaurant info cache lookups by result",
+        {"hit": stats["hits"], "miss": stats["misses"]}, label="result",
+    ) + gauge_lines(
+        "chickza_document_cache_hit_ratio", "Fraction of menu/restaurant info lookups served from memory",
+        {"": stats["hit_rate"]},
+    ) + gauge_lines(
+        "chickza_order_event_subscribers", "Open order status event streams in this process",
+        {"": order_events.subscriber_count()},
+    )
+    return PlainTextResponse(registry.render(cache_lines), media_type="text/plain; version=0.0.4")
+
 # Include the router in the main app
 app.include_router(api_router)
 
+if RATE_LIMIT_ENABLED:
+    app.add_middleware(AdmissionMiddleware,
+                       buckets=create_buckets(RATE_LIMIT_STORE, str(storage._get_file_path("rate_limits.db"))))
+
+app.add_middleware(MetricsMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
@@ -217,4 +708,25 @@ logger = logging.getLogger(__name__)
 
 @app.on_event("startup")
 async def startup_event():
-    logger.info("Chickza Restaurant API started with file-based storage")
+    if STORAGE_BACKEND == "mongo":
+        await mongo_storage.init_mongo()
+    if WARM_CACHES_ON_STARTUP:
+        try:
+            await warm_caches()
+        except Exception as e:
+            # The caches also fill on first use, so a failure here is not fatal
+            logger.error(f"Error warming caches: {e}")
+        # Seeding reads the recent order log (and builds its index if missing), which
+        # can take seconds on a large log, so requests are served meanwhile
+        app.state.warm_task = asyncio.get_running_loop().create_task(warm_kitchen_queue())
+    logger.info(f"Chickza Restaurant API started with {STORAGE_BACKEND} storage")
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    warm_task = getattr(app.state, "warm_task", None)
+    if warm_task is not None:
+        warm_task.cancel()
+    if STORAGE_BACKEND == "mongo":
+        mongo_storage.close_mongo()
+    shutdown_executor()
+    close_backend()
@@ -0,0 +1,208 @@
+import logging
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from file_storage import DocumentCache, StorageBackend, _digits, check_expected_status, with_status
+from json_codec import dumps, loads
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS orders (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    id TEXT NOT NULL UNIQUE,
+    status TEXT NOT NULL,
+    order_type TEXT NOT NULL,
+    phone_digits TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_orders_created_at ON orders (created_at);
+CREATE INDEX IF NOT EXISTS idx_orders_status ON orders (status, created_at);
+CREATE INDEX IF NOT EXISTS idx_orders_phone ON orders (phone_digits);
+
+CREATE TABLE IF NOT EXISTS contact_messages (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    id TEXT NOT NULL UNIQUE,
+    created_at TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_contact_messages_created_at ON contact_messages (created_at);
+"""
+
+# Rows fetched per query when iterating over a whole table
+ITER_BATCH_SIZE = 500
+
+def _dumps(record: Dict) -> str:
+    return dumps(record).decode('utf-8')
+
+def _order_row(order: Dict) -> Tuple:
+    return (
+        order["id"],
+        order.get("status", "pending"),
+        order.get("order_type", "pickup"),
+        _digits(order.get("customer_info", {}).get("phone")),
+        order.get("created_at", ""),
+        _dumps(order),
+    )
+
+def _order_where(status: Optional[str] = None, order_type: Optional[str] = None,
+                 created_from: Optional[str] = None, created_to: Optional[str] = None,
+                 phone: Optional[str] = None) -> Tuple[List[str], List[Any]]:
+    clauses, params = [], []
+    if status:
+        clauses.append("status = ?")
+        params.append(status)
+    if order_type:
+        clauses.append("order_type = ?")
+        params.append(order_type)
+    if created_from:
+        clauses.append("created_at >= ?")
+        params.append(created_from)
+    if created_to:
+        clauses.append("created_at <= ?")
+        params.append(created_to)
+    phone_digits = _digits(phone)
+    if phone_digits:
+        clauses.append("phone_digits = ?")
+        params.append(phone_digits)
+    return clauses, params
+
+def _created_where(created_from: Optional[str] = None,
+                   created_to: Optional[str] = None) -> Tuple[List[str], List[Any]]:
+    return _order_where(created_from=created_from, created_to=created_to)
+
+class SQLiteBackend(StorageBackend):
+    """Orders and contact messages in a SQLite database running in WAL mode
+
+    Each thread gets its own connection. Listings page on the autoincrement
+    seq column, which is also used as the cursor.
+    """
+
+    def __init__(self, documents: DocumentCache, db_path: str, synchronous: str = "NORMAL"):
+        super().__init__(documents)
+        self.db_path = Path(db_path)
+        self.synchronous = synchronous
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        self._connection().executescript(SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=5.0, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(f"PRAGMA synchronous={self.synchronous}")
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    def _insert(self, sql: str, rows: List[Tuple]) -> bool:
+        conn = self._connection()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany(sql, rows)
+            conn.execute("COMMIT")
+            return True
+        except sqlite3.Error as e:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            logger.exception(f"Error writing to {self.db_path.name}: {e}")
+            return False
+
+    def _page(self, table: str, clauses: List[str], params: List[Any],
+              cursor: Optional[str], limit: int) -> Tuple[List[Dict], Optional[str]]:
+        if cursor:
+            if not cursor.isdigit():
+                raise ValueError(f"Invalid cursor: {cursor}")
+            clauses = clauses + ["seq > ?"]
+            params = params + [int(cursor)]
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = self._connection().execute(
+            f"SELECT seq, data FROM {table} {where} ORDER BY seq LIMIT ?", params + [limit]
+        ).fetchall()
+        records = [loads(data) for _, data in rows]
+        next_cursor = str(rows[-1][0]) if len(rows) >= limit else None
+        return records, next_cursor
+
+    def _iter(self, table: str, clauses: List[str], params: List[Any]) -> Iterator[Dict]:
+        # Keyset pagination in batches, so no cursor is held open across the
+        # storage pool threads that drain this iterator
+        cursor = None
+        while True:
+            records, cursor = self._page(table, clauses, params, cursor, ITER_BATCH_SIZE)
+            yield from records
+            if cursor is None:
+                return
+
+    def add_order(self, order: Dict) -> bool:
+        return self.add_orders([order])
+
+    def add_orders(self, orders: List[Dict]) -> bool:
+        return self._insert(
+            "INSERT INTO orders (id, status, order_type, phone_digits, created_at, data) VALUES (?, ?, ?, ?, ?, ?)",
+            [_order_row(order) for order in orders],
+        )
+
+    def get_order(self, order_id: str) -> Optional[Dict]:
+        row = self._connection().execute("SELECT data FROM orders WHERE id = ?", (order_id,)).fetchone()
+        return loads(row[0]) if row else None
+
+    def update_order_status(self, order_id: str, expected: str, status: str) -> Optional[Dict]:
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT data FROM orders WHERE id = ?", (order_id,)).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            order = loads(row[0])
+            check_expected_status(order, expected)
+            updated = with_status(order, status)
+            conn.execute("UPDATE orders SET status = ?, data = ? WHERE id = ?", (status, _dumps(updated), order_id))
+            conn.execute("COMMIT")
+            return updated
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def list_orders(self, cursor: Optional[str] = None, limit: int = 100,
+                    **filters) -> Tuple[List[Dict], Optional[str]]:
+        clauses, params = _order_where(**filters)
+        return self._page("orders", clauses, params, cursor, limit)
+
+    def iter_orders(self, **filters) -> Iterator[Dict]:
+        clauses, params = _order_where(**filters)
+        return self._iter("orders", clauses, params)
+
+    def add_message(self, message: Dict) -> bool:
+        return self.add_messages([message])
+
+    def add_messages(self, messages: List[Dict]) -> bool:
+        """Persist several contact messages in one transaction"""
+        return self._insert(
+            "INSERT INTO contact_messages (id, created_at, data) VALUES (?, ?, ?)",
+            [(message["id"], message.get("created_at", ""), _dumps(message)) for message in messages],
+        )
+
+    def list_messages(self, cursor: Optional[str] = None, limit: int = 100,
+                      created_from: Optional[str] = None,
+                      created_to: Optional[str] = None) -> Tuple[List[Dict], Optional[str]]:
+        clauses, params = _created_where(created_from, created_to)
+        return self._page("contact_messages", clauses, params, cursor, limit)
+
+    def iter_messages(self, created_from: Optional[str] = None,
+                      created_to: Optional[str] = None) -> Iterator[Dict]:
+        clauses, params = _created_where(created_from, created_to)
+        return self._iter("contact_messages", clauses, params)
+
+    def close(self) -> None:
+        with self._connections_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
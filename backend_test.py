@@ -206,9 +206,9 @@ class ChickzaAPITester:
             },
             "order_type": "delivery",
             "subtotal": 52.97,
-            "tax": 4.24,
+            "tax": 4.63,
             "delivery_fee": 3.99,
-            "total": 61.20
+            "total": 61.59
         }
         
         try:
@@ -60,11 +60,25 @@ export const orderAPI = {
     return response.data;
   },
 
-  // Get all orders (admin)
-  getAllOrders: async () => {
-    const response = await api.get('/orders');
+  // Get one page of orders (admin): { orders, next_cursor }; pass next_cursor
+  // back as cursor for the next page. Filters: status, order_type,
+  // created_from, created_to, phone
+  listOrders: async (params = {}) => {
+    const response = await api.get('/orders', { params });
     return response.data;
   },
+
+  // Get all orders matching the filters (admin), following every page
+  getAllOrders: async (filters = {}) => {
+    const orders = [];
+    let cursor;
+    do {
+      const page = await orderAPI.listOrders({ ...filters, limit: 1000, cursor });
+      orders.push(...page.orders);
+      cursor = page.next_cursor;
+    } while (cursor);
+    return orders;
+  },
 };
 
 export const restaurantAPI = {
@@ -82,11 +96,24 @@ export const contactAPI = {
     return response.data;
   },
 
-  // Get all contact messages (admin)
-  getAllMessages: async () => {
-    const response = await api.get('/contact/messages');
+  // Get one page of contact messages (admin): { messages, next_cursor }.
+  // Filters: created_from, created_to
+  listMessages: async (params = {}) => {
+    const response = await api.get('/contact/messages', { params });
     return response.data;
   },
+
+  // Get all contact messages in the date range (admin), following every page
+  getAllMessages: async (filters = {}) => {
+    const messages = [];
+    let cursor;
+    do {
+      const page = await contactAPI.listMessages({ ...filters, limit: 1000, cursor });
+      messages.push(...page.messages);
+      cursor = page.next_cursor;
+    } while (cursor);
+    return messages;
+  },
 };
 
 export default api;
\ No newline at end of file
@@ -0,0 +1,26 @@
+import atexit
+import os
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+
+# The backend reads its settings at import time, so point it at a scratch data
+# directory (never the real one) before any test imports it. load_dotenv does
+# not override variables that are already set.
+DATA_DIR = Path(tempfile.mkdtemp(prefix="chickza-tests-"))
+atexit.register(shutil.rmtree, DATA_DIR, ignore_errors=True)
+for name in ("menu_items.txt", "restaurant_info.txt"):
+    shutil.copy(BACKEND_DIR / "data" / name, DATA_DIR / name)
+
+os.environ.update({
+    "DATA_DIR": str(DATA_DIR),
+    "STORAGE_BACKEND": "file",
+    "STORAGE_FSYNC": "never",
+    "RATE_LIMIT_ENABLED": "false",
+    "IDEMPOTENCY_PERSIST": "false",
+    "WARM_CACHES_ON_STARTUP": "false",
+})
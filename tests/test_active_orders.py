@@ -0,0 +1,79 @@
+from datetime import datetime
+
+import pytest
+
+from file_storage import FileStorage, JsonLinesBackend, with_status
+from order_records import ActiveOrders
+
+def order(order_id: str, status: str = "pending") -> dict:
+    return {"id": order_id, "status": status, "items": [], "order_type": "pickup", "total": 5.0,
+            "customer_info": {}, "created_at": datetime.utcnow().isoformat()}
+
+class Worker:
+    """One worker process's view: its own backend over the shared data directory"""
+
+    def __init__(self, data_dir):
+        self.backend = JsonLinesBackend(None, FileStorage(str(data_dir)), fsync="never")
+        self.active = ActiveOrders(catch_up_interval=0)
+        self.loads = 0
+
+    def load_orders(self, created_from: str):
+        self.loads += 1
+        return self.backend.iter_orders(created_from=created_from)
+
+    def sync(self):
+        self.active.sync(self.load_orders, self.backend.order_position, self.backend.order_changes)
+        return sorted(compact.id for compact in self.active.list())
+
+@pytest.fixture
+def workers(tmp_path):
+    return Worker(tmp_path), Worker(tmp_path)
+
+def test_sync_follows_other_workers_without_reloading(workers):
+    first, second = workers
+    second.backend.add_order(order("a"))
+    assert first.sync() == ["a"]
+
+    second.backend.add_orders([order("b"), order("c")])
+    second.backend.update_order_status("a", "pending", "preparing")
+    assert first.sync() == ["a", "b", "c"]
+    assert first.active.list()[0].status == "preparing"
+
+    updated = second.backend.update_order_status("b", "pending", "preparing")
+    second.backend.order_log.append(with_status(updated, "completed"))
+    assert first.sync() == ["a", "c"]
+    assert first.loads == 1
+
+def test_sync_reloads_after_the_log_is_replaced(workers):
+    first, second = workers
+    second.backend.add_orders([order("a"), order("b", "completed")])
+    assert first.sync() == ["a"]
+
+    # Compaction rewrites the log, so the old offsets are meaningless
+    second.backend.compact("9999", open_before="0000")
+    second.backend.add_order(order("c"))
+    assert first.sync() == ["a", "c"]
+    assert first.loads == 2
+
+def huge(order_id: str) -> dict:
+    return dict(order(order_id), items=[{"id": 1, "name": "Pizza", "quantity": 10 ** 19, "price": 1.0}])
+
+def test_orders_that_do_not_fit_are_left_out_of_the_working_set(workers):
+    worker, other = workers
+    worker.backend.add_orders([order("a"), huge("b")])
+    assert worker.sync() == ["a"]
+    other.backend.add_orders([huge("c"), order("d")])
+    assert worker.sync() == ["a", "d"]
+    worker.active.apply([huge("e"), order("f")])
+    assert worker.sync() == ["a", "d", "f"]
+
+def test_view_errors_do_not_fail_a_stored_order(monkeypatch, caplog):
+    import file_storage
+
+    def broken(orders):
+        raise OverflowError("int too big to convert")
+
+    monkeypatch.setattr(file_storage.active_orders, "apply", broken)
+    file_storage.orders_created([order("g")])
+    file_storage.order_updated(order("g", "preparing"))
+    assert "int too big to convert" in caplog.text
@@ -0,0 +1,70 @@
+import logging
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+
+import server
+
+def order(phone: str, order_type: str = "pickup") -> dict:
+    delivery_fee = 3.99 if order_type == "delivery" else 0
+    return {
+        "items": [{"id": 1, "name": "Margherita Classic", "description": "", "price": 16.99, "image": "",
+                   "category": "pizza", "quantity": 1}],
+        "customer_info": {"name": "Ada", "phone": phone},
+        "order_type": order_type, "subtotal": 16.99, "tax": 1.49, "delivery_fee": delivery_fee,
+        "total": round(18.48 + delivery_fee, 2),
+    }
+
+@pytest.fixture(scope="module")
+def client():
+    logging.disable(logging.INFO)
+    with TestClient(server.app) as client:
+        yield client
+    logging.disable(logging.NOTSET)
+
+@pytest.fixture
+def phone():
+    # A phone number of its own keeps other tests' orders out of the listings
+    return f"555-{uuid.uuid4().int % 10 ** 7:07d}"
+
+def pages(client, path: str, key: str, **params) -> list:
+    found, cursor = [], None
+    while True:
+        page = client.get(path, params=dict(params, cursor=cursor) if cursor else params).json()
+        found.append([record["id"] for record in page[key]])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return found
+
+def test_orders_are_paged_with_a_cursor(client, phone):
+    created = [client.post("/api/orders", json=order(phone)).json()["id"] for _ in range(5)]
+    assert pages(client, "/api/orders", "orders", phone=phone, limit=2) == [created[:2], created[2:4], created[4:]]
+
+def test_order_filters_combine(client, phone):
+    orders = [client.post("/api/orders", json=order(phone, order_type)).json()
+              for order_type in ("pickup", "delivery", "delivery", "pickup")]
+    ids = [created["id"] for created in orders]
+    assert client.patch(f"/api/orders/{ids[1]}/status", json={"status": "preparing"}).status_code == 200
+
+    def listed(**filters):
+        # A status change moves an order to the end of storage order, so compare sets
+        return {o["id"] for o in client.get("/api/orders", params=dict(filters, phone=phone)).json()["orders"]}
+
+    assert listed(order_type="delivery") == set(ids[1:3])
+    assert listed(status="preparing") == {ids[1]}
+    assert listed(status="preparing", order_type="pickup") == set()
+    assert listed(created_from=orders[2]["created_at"]) == set(ids[2:])
+    assert listed(created_to=orders[1]["created_at"]) == set(ids[:2])
+
+def test_messages_are_paged_and_filtered_by_date(client):
+    for n in range(3):
+        assert client.post("/api/contact", json={"name": "Ada", "email": "ada@example.com", "phone": "",
+                                                  "subject": "Catering", "message": f"hello {n}"}).status_code == 200
+    everything = client.get("/api/contact/messages", params={"limit": 1000}).json()["messages"]
+    sent = everything[-3:]
+    since = sent[0]["created_at"]
+    assert pages(client, "/api/contact/messages", "messages", created_from=since, limit=2) == \
+        [[m["id"] for m in sent[:2]], [sent[2]["id"]]]
+    until = client.get("/api/contact/messages", params={"created_to": sent[1]["created_at"], "created_from": since})
+    assert [m["id"] for m in until.json()["messages"]] == [m["id"] for m in sent[:2]]
@@ -0,0 +1,35 @@
+import asyncio
+import threading
+
+from admission import AdmissionMiddleware, SQLiteBuckets
+
+class RecordingBuckets(SQLiteBuckets):
+    def take(self, limits):
+        self.thread = threading.current_thread().name
+        return super().take(limits)
+
+async def ok(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b""})
+
+async def post(app) -> int:
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": "POST", "path": "/api/contact", "headers": [], "client": ("10.0.0.1", 1)}
+    await app(scope, None, send)
+    return sent[0]["status"]
+
+def test_sqlite_buckets_are_checked_off_the_event_loop(tmp_path):
+    buckets = RecordingBuckets(str(tmp_path / "rate_limits.db"))
+    app = AdmissionMiddleware(ok, buckets=buckets)
+    app.per_minute["contact"] = 1
+
+    async def burst():
+        return [await post(app) for _ in range(12)]
+
+    statuses = asyncio.run(burst())
+    assert statuses.count(200) == 10 and statuses[-1] == 429
+    assert buckets.thread.startswith("storage")
@@ -0,0 +1,52 @@
+import time
+from datetime import datetime
+
+import pytest
+
+from analytics import OrderAnalytics
+from file_storage import FileStorage, JsonLinesBackend
+
+DAY = "2026-03-02"
+
+def order(order_id: str, total: float, status: str = "completed") -> dict:
+    return {"id": order_id, "status": status, "order_type": "pickup", "total": total,
+            "created_at": f"{DAY}T12:00:00", "items": [{"id": 1, "name": "Pizza", "quantity": 2, "price": total / 2}]}
+
+@pytest.fixture
+def backends(tmp_path):
+    storage = FileStorage(str(tmp_path))
+    return JsonLinesBackend(None, storage, fsync="never"), JsonLinesBackend(None, storage, fsync="never")
+
+def sync(analytics: OrderAnalytics, backend: JsonLinesBackend) -> dict:
+    analytics.sync(backend.order_snapshot, backend.order_changes)
+    return analytics.day(DAY)
+
+def test_orders_from_other_workers_are_counted_without_a_rebuild(backends):
+    reader, writer = backends
+    analytics = OrderAnalytics(rebuild_interval=0)
+    writer.add_order(order("a", 10.0, "pending"))
+    assert sync(analytics, reader)["orders"] == 1
+    built_at = analytics._built_at
+
+    writer.add_orders([order("b", 20.0), order("c", 30.0)])
+    # A status change is a new version of an order, not a new order
+    writer.update_order_status("a", "pending", "preparing")
+    totals = sync(analytics, reader)
+    assert (totals["orders"], totals["revenue"]) == (3, 60.0)
+    assert analytics.top_items(DAY)[0]["quantity"] == 6
+    assert analytics._built_at == built_at
+
+def test_rebuilds_in_the_background_after_compaction(backends):
+    reader, writer = backends
+    analytics = OrderAnalytics()
+    writer.add_orders([order("a", 10.0), order("b", 20.0)])
+    assert sync(analytics, reader)["orders"] == 2
+
+    writer.compact("9999")
+    writer.add_order(order("c", 30.0))
+    # The previous aggregates are served while the rebuild runs
+    assert sync(analytics, reader)["orders"] == 2
+    deadline = time.monotonic() + 10
+    while analytics._rebuilding and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert sync(analytics, reader)["revenue"] == 60.0
@@ -0,0 +1,45 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from file_storage import FileStorage, JsonLinesBackend
+
+NOW = datetime(2026, 6, 1, 12, 0)
+
+def order(order_id: str, days_old: float, status: str) -> dict:
+    created_at = (NOW - timedelta(days=days_old)).isoformat()
+    return {"id": order_id, "status": status, "items": [], "total": 10.0, "created_at": created_at}
+
+def cutoff(days: float) -> str:
+    return (NOW - timedelta(days=days)).isoformat()
+
+@pytest.fixture
+def backend(tmp_path):
+    return JsonLinesBackend(None, FileStorage(str(tmp_path)), fsync="never")
+
+def test_compact_moves_old_orders_into_daily_segments(backend):
+    orders = [
+        order("year_completed", 365, "completed"),
+        order("year_pending", 365, "pending"),
+        order("quarter_pending", 100, "pending"),
+        order("recent_completed", 1, "completed"),
+    ]
+    assert backend.add_orders(orders)
+
+    counts = backend.compact(cutoff(30), open_before=cutoff(180))
+
+    # The completed and the abandoned year-old orders go; the 100 day old open order is kept
+    assert counts == {"orders": 2, "contact_messages": 0}
+    day = orders[0]["created_at"][:10]
+    assert backend.order_archive.days() == [day]
+    assert {record["id"] for record in backend.order_archive.read_segment(day)} == {"year_completed", "year_pending"}
+    assert sorted(backend.order_log.keys()) == ["quarter_pending", "recent_completed"]
+    for record in orders:
+        assert backend.get_order(record["id"]) == record
+    assert sorted(record["id"] for record in backend.iter_orders()) == sorted(record["id"] for record in orders)
+
+def test_compact_keeps_recent_open_orders_live(backend):
+    assert backend.add_orders([order("quarter_pending", 100, "pending")])
+
+    assert backend.compact(cutoff(30), open_before=cutoff(180))["orders"] == 0
+    assert backend.order_log.get("quarter_pending")["status"] == "pending"
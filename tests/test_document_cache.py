@@ -0,0 +1,56 @@
+import os
+
+import pytest
+
+from file_storage import DocumentCache, FileStorage
+
+@pytest.fixture
+def menu_path(tmp_path):
+    path = tmp_path / "menu_items.txt"
+    path.write_text('{"pizzas": [1, 2]}')
+    return path
+
+@pytest.fixture
+def cache(tmp_path, menu_path):
+    return DocumentCache(FileStorage(str(tmp_path)), check_interval=0)
+
+def test_unchanged_files_are_served_from_memory(cache, menu_path):
+    first = cache.get("menu_items.txt")
+    assert cache.get("menu_items.txt") is first
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert cache.version("menu_items.txt") == 1
+
+def test_a_new_mtime_reloads_the_file(cache, menu_path):
+    cache.get("menu_items.txt")
+    stat = menu_path.stat()
+    # Same size and inode, different contents and mtime
+    menu_path.write_text('{"pizzas": [3, 4]}')
+    os.utime(menu_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert cache.get("menu_items.txt") == {"pizzas": [3, 4]}
+    assert cache.version("menu_items.txt") == 2
+
+def test_a_new_size_reloads_the_file(cache, menu_path):
+    cache.get("menu_items.txt")
+    stat = menu_path.stat()
+    menu_path.write_text('{"pizzas": [1, 2, 3]}')
+    # Keep the mtime, as a coarse-grained filesystem clock would
+    os.utime(menu_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert cache.get("menu_items.txt") == {"pizzas": [1, 2, 3]}
+
+def test_a_replaced_file_reloads_even_with_the_same_mtime_and_size(cache, tmp_path, menu_path):
+    cache.get("menu_items.txt")
+    stat = menu_path.stat()
+    replacement = tmp_path / "menu_items.txt.new"
+    replacement.write_text('{"pizzas": [5, 6]}')
+    os.utime(replacement, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    os.replace(replacement, menu_path)
+    assert menu_path.stat().st_ino != stat.st_ino
+    assert cache.get("menu_items.txt") == {"pizzas": [5, 6]}
+
+def test_files_are_not_stated_again_within_the_check_interval(tmp_path, menu_path):
+    cache = DocumentCache(FileStorage(str(tmp_path)), check_interval=3600)
+    cache.get("menu_items.txt")
+    menu_path.write_text('{"pizzas": [7]}')
+    assert cache.get("menu_items.txt") == {"pizzas": [1, 2]}
+    cache.reload("menu_items.txt")
+    assert cache.get("menu_items.txt") == {"pizzas": [7]}
@@ -0,0 +1,36 @@
+import multiprocessing
+import threading
+
+from file_lock import atomic_write, file_lock
+
+def _increment(counter_path, barrier, times):
+    barrier.wait()
+    for _ in range(times):
+        with file_lock(counter_path):
+            value = int(counter_path.read_text())
+            counter_path.write_text(str(value + 1))
+
+def test_lock_serializes_worker_processes(tmp_path):
+    counter_path = tmp_path / "counter"
+    counter_path.write_text("0")
+    context = multiprocessing.get_context("fork")
+    workers, times = 4, 200
+    barrier = context.Barrier(workers)
+    processes = [context.Process(target=_increment, args=(counter_path, barrier, times)) for _ in range(workers)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(30)
+        assert process.exitcode == 0
+    assert int(counter_path.read_text()) == workers * times
+
+def test_concurrent_atomic_writes_leave_one_whole_file(tmp_path):
+    path = tmp_path / "data.json"
+    payloads = [bytes([65 + n]) * 100000 for n in range(8)]
+    threads = [threading.Thread(target=atomic_write, args=(path, payload, False)) for payload in payloads]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert path.read_bytes() in payloads
+    assert not list(tmp_path.glob("*.tmp"))
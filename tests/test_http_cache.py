@@ -0,0 +1,67 @@
+import gzip
+import logging
+
+import pytest
+from fastapi.testclient import TestClient
+
+import server
+from prerender import RenderedBody
+
+@pytest.fixture(scope="module")
+def client():
+    logging.disable(logging.INFO)
+    with TestClient(server.app) as client:
+        yield client
+    logging.disable(logging.NOTSET)
+
+@pytest.fixture
+def rendered():
+    rendered = RenderedBody("abc", b'{"items": []}' + b" " * 1024)
+    # brotli is optional, so stand in for its output
+    rendered.br = b"brotli body"
+    return rendered
+
+def test_a_matching_etag_gets_a_304(client):
+    response = client.get("/api/menu", headers={"Accept-Encoding": "identity"})
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+    assert response.headers["vary"] == "Accept-Encoding"
+
+    not_modified = client.get("/api/menu", headers={"Accept-Encoding": "identity", "If-None-Match": etag})
+    assert not_modified.status_code == 304 and not_modified.content == b""
+    assert not_modified.headers["etag"] == etag
+    weak = client.get("/api/menu", headers={"Accept-Encoding": "identity", "If-None-Match": f'"other", W/{etag}'})
+    assert weak.status_code == 304
+    assert client.get("/api/menu", headers={"Accept-Encoding": "identity", "If-None-Match": '"other"'}).status_code == 200
+
+def test_if_modified_since_is_checked_against_last_modified(client):
+    response = client.get("/api/menu", headers={"Accept-Encoding": "identity"})
+    last_modified = response.headers["last-modified"]
+    assert client.get("/api/menu", headers={"If-Modified-Since": last_modified}).status_code == 304
+    assert client.get("/api/menu", headers={"If-Modified-Since": "Thu, 01 Jan 1970 00:00:00 GMT"}).status_code == 200
+
+def test_each_category_and_encoding_has_its_own_etag(client):
+    pizza = client.get("/api/menu/pizza", headers={"Accept-Encoding": "identity"})
+    chicken = client.get("/api/menu/chicken", headers={"Accept-Encoding": "identity"})
+    assert pizza.headers["etag"] != chicken.headers["etag"]
+    menu = client.get("/api/menu", headers={"Accept-Encoding": "identity"})
+    compressed = client.get("/api/menu", headers={"Accept-Encoding": "gzip"})
+    assert compressed.headers["content-encoding"] == "gzip"
+    assert compressed.headers["etag"] == menu.headers["etag"][:-1] + '-gzip"'
+    assert compressed.json() == menu.json()
+    # A gzip ETag does not validate the identity representation
+    stale = client.get("/api/menu", headers={"Accept-Encoding": "identity", "If-None-Match": compressed.headers["etag"]})
+    assert stale.status_code == 200
+
+def test_the_smallest_accepted_variant_is_selected(rendered):
+    assert rendered.select("gzip, deflate, br") == (b"brotli body", "br")
+    assert rendered.select("*") == (b"brotli body", "br")
+    body, encoding = rendered.select("gzip, br;q=0")
+    assert encoding == "gzip" and gzip.decompress(body) == rendered.identity
+    assert rendered.select("br;q=0, gzip;q=0.0") == (rendered.identity, None)
+    assert rendered.select("") == (rendered.identity, None)
+
+def test_small_bodies_are_not_compressed():
+    rendered = RenderedBody("abc", b"{}")
+    assert rendered.gzip is None and rendered.br is None
+    assert rendered.select("gzip, br") == (b"{}", None)
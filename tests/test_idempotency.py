@@ -0,0 +1,64 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi.testclient import TestClient
+
+import server
+from idempotency import IdempotencyKeyInProgress, IdempotencyKeyMismatch, IdempotencyStore
+
+ORDER = {
+    "items": [{"id": 1, "name": "Margherita Classic", "description": "", "price": 16.99, "image": "",
+               "category": "pizza", "quantity": 2}],
+    "customer_info": {"name": "Ada", "phone": "555-0100"},
+    "subtotal": 33.98, "tax": 2.97, "total": 36.95,
+}
+
+@pytest.fixture(scope="module")
+def client():
+    logging.disable(logging.INFO)
+    with TestClient(server.app) as client:
+        yield client
+    logging.disable(logging.NOTSET)
+
+def order_count(client) -> int:
+    return len(client.get("/api/orders", params={"limit": 1000}).json()["orders"])
+
+def test_retry_replays_the_original_order(client):
+    first = client.post("/api/orders", json=ORDER, headers={"Idempotency-Key": "replay"})
+    retry = client.post("/api/orders", json=ORDER, headers={"Idempotency-Key": "replay"})
+    assert (first.status_code, retry.status_code) == (200, 200)
+    assert retry.json()["id"] == first.json()["id"]
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert "Idempotent-Replayed" not in first.headers
+
+def test_key_reused_for_a_different_order_is_rejected(client):
+    assert client.post("/api/orders", json=ORDER, headers={"Idempotency-Key": "reused"}).status_code == 200
+    other = dict(ORDER, customer_info={"name": "Grace", "phone": "555-0101"})
+    assert client.post("/api/orders", json=other, headers={"Idempotency-Key": "reused"}).status_code == 422
+
+def test_rejected_order_does_not_use_up_its_key(client):
+    assert client.post("/api/orders", json=dict(ORDER, total=1), headers={"Idempotency-Key": "fixed"}).status_code == 400
+    assert client.post("/api/orders", json=ORDER, headers={"Idempotency-Key": "fixed"}).status_code == 200
+
+def test_concurrent_duplicates_create_one_order(client):
+    before = order_count(client)
+    with ThreadPoolExecutor(8) as pool:
+        responses = list(pool.map(
+            lambda _: client.post("/api/orders", json=ORDER, headers={"Idempotency-Key": "concurrent"}), range(16)
+        ))
+    statuses = {response.status_code for response in responses}
+    assert statuses <= {200, 409}
+    assert len({response.json()["id"] for response in responses if response.status_code == 200}) == 1
+    assert order_count(client) == before + 1
+
+def test_keys_are_shared_through_the_store_file(tmp_path):
+    path = tmp_path / "idempotency_keys.jsonl"
+    worker, other_worker = IdempotencyStore(path=path), IdempotencyStore(path=path)
+    assert worker.begin("key", "fingerprint") is None
+    with pytest.raises(IdempotencyKeyInProgress):
+        other_worker.begin("key", "fingerprint")
+    worker.complete("key", "fingerprint", "order_1")
+    assert other_worker.begin("key", "fingerprint") == "order_1"
+    with pytest.raises(IdempotencyKeyMismatch):
+        other_worker.begin("key", "another fingerprint")
@@ -0,0 +1,50 @@
+import importlib.util
+import json
+
+import pytest
+
+import json_codec
+
+RECORD = {
+    "id": "order_1",
+    "customer_info": {"name": "Zoë Ñúñez", "notes": "ring twice \"please\"\n"},
+    "items": [{"id": 1, "quantity": 2, "price": 16.99}],
+    "totals": {1: 33.98},
+    "paid": False,
+    "coupon": None,
+}
+
+def load_codec(monkeypatch, name: str):
+    """Import a private copy of json_codec with JSON_CODEC set to name"""
+    monkeypatch.setenv("JSON_CODEC", name)
+    spec = importlib.util.spec_from_file_location(f"json_codec_{name}", json_codec.__file__)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+@pytest.fixture(params=["stdlib", "orjson"])
+def codec(request, monkeypatch):
+    if request.param != "stdlib" and request.param not in json_codec.FAST_CODECS:
+        pytest.skip(f"{request.param} is not installed")
+    return load_codec(monkeypatch, request.param)
+
+def test_records_round_trip(codec):
+    expected = json.loads(json.dumps(RECORD))
+    assert codec.loads(codec.dumps(RECORD)) == expected
+    assert codec.loads(codec.dumps(RECORD).decode("utf-8")) == expected
+    lines = codec.dumps_lines([RECORD, {"id": "order_2"}])
+    assert lines.endswith(b"\n") and lines.count(b"\n") == 2
+    assert [codec.loads(line) for line in lines.splitlines()] == [expected, {"id": "order_2"}]
+
+def test_output_matches_the_stdlib_codec(codec, monkeypatch):
+    stdlib = load_codec(monkeypatch, "stdlib")
+    assert codec.dumps(RECORD) == stdlib.dumps(RECORD)
+    assert codec.dumps_lines([RECORD]) == stdlib.dumps_lines([RECORD])
+
+def test_bad_input_raises_value_error(codec):
+    with pytest.raises(ValueError):
+        codec.loads(b'{"id": "order_1"')
+
+def test_unknown_codecs_are_rejected(monkeypatch):
+    with pytest.raises(ValueError, match="Unknown JSON codec"):
+        load_codec(monkeypatch, "yaml")
@@ -0,0 +1,52 @@
+from datetime import datetime, timedelta
+
+from kitchen import KitchenQueue
+from menu_index import MenuIndex
+from order_records import ActiveOrders
+
+MENU = {"pizza": [{"id": 1, "name": "Margherita", "category": "pizza", "price": 10.0, "prep_minutes": 20}],
+        "chicken": [{"id": 2, "name": "Wings", "category": "chicken", "price": 8.0, "prep_minutes": 5}]}
+
+def order(order_id: str, item_id: int, minutes_ago: float, status: str = "pending") -> dict:
+    created_at = datetime.utcnow() - timedelta(minutes=minutes_ago)
+    category = "pizza" if item_id == 1 else "chicken"
+    return {"id": order_id, "status": status, "order_type": "pickup", "created_at": created_at.isoformat(),
+            "updated_at": created_at.isoformat(),
+            "items": [{"id": item_id, "name": category, "category": category, "quantity": 1}]}
+
+def subscribed_queue(stations: int = 1):
+    active, queue = ActiveOrders(), KitchenQueue(stations=stations)
+    active.subscribe(queue)
+    queue.set_menu(MenuIndex(MENU, 1))
+    return active, queue
+
+def test_queue_is_ordered_by_promised_time():
+    active, queue = subscribed_queue()
+    # The wings were ordered later but are promised earlier than the pizza
+    active.load([order("pizza", 1, 2), order("wings", 2, 1)])
+
+    entries = queue.queue()
+    assert [entry["id"] for entry in entries] == ["wings", "pizza"]
+    assert [entry["prep_minutes"] for entry in entries] == [5.0, 20.0]
+    for entry in entries:
+        assert queue.eta(entry["id"]) == entry
+
+def test_changes_from_active_orders_move_tickets():
+    active, queue = subscribed_queue()
+    active.load([order("pizza", 1, 2), order("wings", 2, 1), order("late", 1, 0)])
+
+    active.apply([order("pizza", 1, 2, status="preparing")])
+    assert [entry["id"] for entry in queue.queue()] == ["pizza", "wings", "late"]
+    assert queue.eta("wings")["position"] == 2
+
+    active.apply([order("pizza", 1, 2, status="ready")])
+    assert [entry["id"] for entry in queue.queue()] == ["wings", "late"]
+    assert queue.eta("pizza") is None
+    assert queue.eta("late")["position"] == 2
+
+def test_orders_queued_before_the_menu_get_its_prep_times():
+    active, queue = ActiveOrders(), KitchenQueue()
+    active.subscribe(queue)
+    active.load([order("wings", 2, 0)])
+    queue.set_menu(MenuIndex(MENU, 1))
+    assert queue.eta("wings")["prep_minutes"] == 5.0
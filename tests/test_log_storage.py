@@ -0,0 +1,167 @@
+import json
+import multiprocessing
+import os
+import threading
+import time
+
+import pytest
+
+from log_storage import JsonLinesLog
+
+def _append_after_migration(log_path, legacy_path, barrier, n):
+    log = JsonLinesLog(log_path, legacy_path=legacy_path, fsync="never", index_key="id")
+    barrier.wait()
+    log.append({"id": f"new_{n}"})
+
+@pytest.mark.parametrize("round_", range(5))
+def test_concurrent_migration_keeps_every_append(tmp_path, round_):
+    legacy_path, log_path = tmp_path / "orders.txt", tmp_path / "orders.jsonl"
+    legacy_path.write_text(json.dumps([{"id": f"old_{n}"} for n in range(200)]))
+    context = multiprocessing.get_context("fork")
+    workers = 8
+    barrier = context.Barrier(workers)
+    processes = [context.Process(target=_append_after_migration, args=(log_path, legacy_path, barrier, n))
+                 for n in range(workers)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(10)
+        assert process.exitcode == 0
+
+    ids = {record["id"] for record in JsonLinesLog(log_path, index_key="id")}
+    assert ids == {f"old_{n}" for n in range(200)} | {f"new_{n}" for n in range(workers)}
+    assert not list(tmp_path.glob("*.tmp"))
+
+def test_index_finds_the_newest_version_of_each_record(tmp_path):
+    log_path = tmp_path / "orders.jsonl"
+    log = JsonLinesLog(log_path, fsync="never", index_key="id")
+    log.append_many([{"id": "a", "status": "pending"}, {"id": "b", "status": "pending"}])
+    log.update("a", lambda record: dict(record, status="ready"))
+    assert log.get("a")["status"] == "ready"
+    assert log.get("missing") is None
+
+    # A second process picks up the index file and the records appended since it was written
+    JsonLinesLog(log_path, fsync="never", index_key="id").append({"id": "c", "status": "pending"})
+    assert log.get("c")["status"] == "pending"
+    reopened = JsonLinesLog(log_path, fsync="never", index_key="id")
+    assert reopened.get("a")["status"] == "ready"
+    assert sorted(reopened.keys()) == ["a", "b", "c"]
+
+def test_torn_final_line_is_not_indexed(tmp_path):
+    log_path = tmp_path / "orders.jsonl"
+    JsonLinesLog(log_path, fsync="never", index_key="id").append({"id": "a"})
+    with open(log_path, "ab") as f:
+        f.write(b'{"id": "b", "sta')
+    log = JsonLinesLog(log_path, fsync="never", index_key="id")
+    assert log.get("b") is None
+    assert list(log.keys()) == ["a"]
+
+def test_index_is_rebuilt_when_the_log_was_truncated_under_it(tmp_path):
+    log_path = tmp_path / "orders.jsonl"
+    JsonLinesLog(log_path, fsync="never", index_key="id").append_many([{"id": "a"}, {"id": "b", "note": "x" * 50}])
+    # The log lost the end of its last line after the index was written
+    with open(log_path, "r+b") as f:
+        f.truncate(log_path.stat().st_size - 10)
+    log = JsonLinesLog(log_path, fsync="never", index_key="id")
+    assert log.get("b") is None
+    assert log.get("a") == {"id": "a"}
+    assert (tmp_path / "orders.jsonl.idx").read_text() == "a\t0\n"
+
+def test_stale_offsets_are_rebuilt_on_lookup(tmp_path):
+    log_path = tmp_path / "orders.jsonl"
+    JsonLinesLog(log_path, fsync="never", index_key="id").append_many([{"id": "a"}, {"id": "b"}])
+    index_path = tmp_path / "orders.jsonl.idx"
+    offsets = index_path.read_text()
+    index_path.write_text(offsets.replace("a\t", "tmp\t").replace("b\t", "a\t").replace("tmp\t", "b\t"))
+    log = JsonLinesLog(log_path, fsync="never", index_key="id")
+    assert log.get("a") == {"id": "a"}
+    assert log.get("b") == {"id": "b"}
+
+def test_index_appends_do_not_leave_gaps_after_another_process_rewrote_it(tmp_path):
+    log_path = tmp_path / "orders.jsonl"
+    writer = JsonLinesLog(log_path, fsync="never", index_key="id")
+    writer.append_many([{"id": "a"}, {"id": "b"}])
+    assert writer.get("b") == {"id": "b"}
+    # Another process rebuilt the index from a scan that ended before "b" was appended
+    index_path = tmp_path / "orders.jsonl.idx"
+    index_path.unlink()
+    index_path.write_text("a\t0\n")
+    writer.append({"id": "c"})
+    assert writer.get("c") == {"id": "c"}
+
+    reader = JsonLinesLog(log_path, fsync="never", index_key="id")
+    assert sorted(reader.keys()) == ["a", "b", "c"]
+    assert reader.get("b") == {"id": "b"}
+
+def _append_many_times(log_path, barrier, worker, times):
+    log = JsonLinesLog(log_path, fsync="never", index_key="id")
+    barrier.wait()
+    for n in range(times):
+        log.append({"id": f"{worker}_{n}", "padding": "x" * 500})
+
+def test_appends_from_worker_processes_never_interleave(tmp_path):
+    log_path = tmp_path / "orders.jsonl"
+    context = multiprocessing.get_context("fork")
+    workers, times = 4, 100
+    barrier = context.Barrier(workers)
+    processes = [context.Process(target=_append_many_times, args=(log_path, barrier, worker, times))
+                 for worker in range(workers)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(30)
+        assert process.exitcode == 0
+    lines = log_path.read_bytes().splitlines()
+    assert len(lines) == workers * times
+    assert {json.loads(line)["id"] for line in lines} == {f"{w}_{n}" for w in range(workers) for n in range(times)}
+    assert len(JsonLinesLog(log_path, index_key="id").keys()) == workers * times
+
+def test_group_commit_shares_fsyncs_between_concurrent_appends(tmp_path, monkeypatch):
+    log = JsonLinesLog(tmp_path / "orders.jsonl", fsync="group", index_key="id")
+    real_fsync, synced = os.fsync, []
+
+    def slow_fsync(fd):
+        time.sleep(0.01)
+        real_fsync(fd)
+        synced.append(fd)
+
+    monkeypatch.setattr(os, "fsync", slow_fsync)
+    tickets = threading.local()
+    written_locked = log._written_locked
+
+    def remember_ticket(payload):
+        tickets.ticket = written_locked(payload)
+        return tickets.ticket
+
+    monkeypatch.setattr(log, "_written_locked", remember_ticket)
+    appenders = 16
+    barrier = threading.Barrier(appenders)
+    durable = []
+
+    def append(n):
+        barrier.wait()
+        assert log.append({"id": str(n)})
+        # Returning means a finished fsync covered this append
+        durable.append(log._synced >= tickets.ticket)
+
+    threads = [threading.Thread(target=append, args=(n,)) for n in range(appenders)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert all(durable) and len(durable) == appenders
+    assert 1 <= len(synced) < appenders
+    assert log._synced == appenders
+    assert sorted(log.keys(), key=int) == [str(n) for n in range(appenders)]
+
+def test_append_after_a_torn_final_line_keeps_the_new_record(tmp_path):
+    log_path = tmp_path / "orders.jsonl"
+    log = JsonLinesLog(log_path, fsync="never", index_key="id")
+    log.append({"id": "a"})
+    # A crash in the middle of an append leaves part of a line behind
+    with open(log_path, "ab") as f:
+        f.write(b'{"id": "b", "sta')
+    assert log.append({"id": "c"})
+    assert log.get("c") == {"id": "c"}
+    assert sorted(log.keys()) == ["a", "c"]
+    assert [record["id"] for record in JsonLinesLog(log_path, index_key="id")] == ["a", "c"]
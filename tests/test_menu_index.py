@@ -0,0 +1,63 @@
+import pytest
+
+import file_storage
+from file_storage import MenuService
+from menu_index import MenuIndex
+
+MENU = {
+    "pizza": [
+        {"id": 1, "name": "BBQ Chicken Pizza", "description": "Smoky", "price": 15.0, "popular": True},
+        {"id": 2, "name": "Margherita", "description": "Fresh basil", "price": 12.0, "popular": False},
+    ],
+    "chicken": [{"id": 3, "name": "Hot Wings", "description": "Spicy chicken", "price": 9.0, "popular": True}],
+}
+
+@pytest.fixture(scope="module")
+def index():
+    return MenuIndex(MENU)
+
+def ids(items):
+    return [item["id"] for item in items]
+
+def test_words_match_prefixes_in_menu_order(index):
+    assert ids(index.search("chick")) == [1, 3]
+    assert ids(index.search("bbq chick")) == [1]
+    assert ids(index.search("chicken", max_price=10)) == [3]
+
+@pytest.mark.parametrize("text", ["!!!", "-", "?*%"])
+def test_punctuation_only_text_matches_nothing(index, text):
+    assert index.search(text) == []
+    assert index.search(text, category="pizza") == []
+
+@pytest.mark.parametrize("text", [None, "", "   "])
+def test_blank_text_is_no_filter(index, text):
+    assert ids(index.search(text)) == [1, 2, 3]
+    assert ids(index.search(text, popular=True)) == [1, 3]
+
+def test_items_are_looked_up_by_id_and_category(index):
+    assert index.get_item(3)["name"] == "Hot Wings"
+    assert index.get_item(99) is None
+    assert ids(index.get_category("pizza")) == [1, 2]
+    assert index.get_category("salads") == []
+    assert ids(index.popular) == [1, 3]
+    assert {item_id: item and item["name"] for item_id, item in index.get_items([2, 99]).items()} == {2: "Margherita", 99: None}
+
+class MenuDocument:
+    def __init__(self):
+        self.snapshot = {"data": MENU, "version": 1}
+
+    def get_document_snapshot(self, name):
+        return self.snapshot
+
+def test_the_service_index_is_rebuilt_only_for_a_new_menu_version(monkeypatch):
+    document = MenuDocument()
+    monkeypatch.setattr(file_storage, "get_backend", lambda: document)
+    monkeypatch.setattr(MenuService, "_index", None)
+    index = MenuService.get_menu_index()
+    assert MenuService.get_menu_index() is index
+    assert MenuService.get_item_by_id(2)["name"] == "Margherita"
+
+    document.snapshot = {"data": {"pizza": [dict(MENU["pizza"][1], name="Marinara")]}, "version": 2}
+    assert MenuService.get_item_by_id(2)["name"] == "Marinara"
+    assert ids(MenuService.get_menu_by_category("pizza")) == [2]
+    assert MenuService.get_menu_by_category("chicken") == []
@@ -0,0 +1,42 @@
+import logging
+
+import pytest
+from fastapi.testclient import TestClient
+
+import server
+from metrics import Counter, Histogram
+
+@pytest.fixture(scope="module")
+def client():
+    logging.disable(logging.INFO)
+    with TestClient(server.app) as client:
+        yield client
+    logging.disable(logging.NOTSET)
+
+def test_requests_are_labelled_by_route_template(client):
+    assert client.get("/api/orders/order_metrics1").status_code == 404
+    assert client.get("/api/orders/order_metrics2").status_code == 404
+    assert client.get("/api/no-such-route/metrics").status_code == 404
+    body = client.get("/api/metrics").text
+    assert 'chickza_http_requests_total{method="GET",route="/api/orders/{order_id}",status="404"}' in body
+    assert 'chickza_http_requests_total{method="GET",route="unmatched",status="404"}' in body
+    assert 'chickza_http_request_duration_seconds_count{method="GET",route="/api/orders/{order_id}"}' in body
+    assert "order_metrics" not in body and "no-such-route" not in body
+
+def test_counters_render_escaped_label_values():
+    counter = Counter("requests_total", "Requests", ("path",))
+    counter.inc('say "hi"\n')
+    counter.inc('say "hi"\n', amount=2)
+    assert counter.render()[-1] == 'requests_total{path="say \\"hi\\"\\n"} 3'
+
+def test_histograms_render_cumulative_buckets():
+    histogram = Histogram("latency_seconds", "Latency", ("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 2.0):
+        histogram.observe(value, "/x")
+    lines = histogram.render()[2:]
+    assert lines[:3] == [
+        'latency_seconds_bucket{route="/x",le="0.1"} 2',
+        'latency_seconds_bucket{route="/x",le="1"} 3',
+        'latency_seconds_bucket{route="/x",le="+Inf"} 4',
+    ]
+    assert lines[3:] == ['latency_seconds_sum{route="/x"} 2.650000', 'latency_seconds_count{route="/x"} 4']
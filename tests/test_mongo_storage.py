@@ -0,0 +1,43 @@
+import asyncio
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+import mongo_storage
+from file_storage import OrderStatusConflict
+from mongo_storage import MongoOrderService, init_mongo
+
+ORDER = {
+    "items": [{"id": 1, "quantity": 2, "price": 16.99}],
+    "customer_info": {"name": "Ada", "phone": "(555) 0100"},
+    "order_type": "pickup",
+}
+
+@pytest.fixture
+def run():
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(init_mongo(AsyncMongoMockClient()["chickza_test"]))
+    yield loop.run_until_complete
+    mongo_storage.close_mongo()
+    loop.close()
+
+def test_status_update_returns_the_order_without_hidden_fields(run):
+    order = run(MongoOrderService.create_order(dict(ORDER)))
+    updated = run(MongoOrderService.update_order_status(order["id"], "preparing"))
+    assert updated["status"] == "preparing"
+    assert "_id" not in updated and "phone_digits" not in updated
+    assert run(MongoOrderService.get_order_by_id(order["id"]))["status"] == "preparing"
+    assert run(MongoOrderService.update_order_status("missing", "preparing")) is None
+
+def test_stale_status_update_conflicts(run):
+    order = run(MongoOrderService.create_order(dict(ORDER)))
+    backend = mongo_storage.get_mongo_backend()
+    run(backend.update_order_status(order["id"], "pending", "preparing"))
+    with pytest.raises(OrderStatusConflict):
+        run(backend.update_order_status(order["id"], "pending", "cancelled"))
+
+def test_batches_are_priced_and_stored(run):
+    results = run(MongoOrderService.import_orders([dict(ORDER), dict(ORDER, items=[{"id": 10 ** 20, "quantity": 1}])]))
+    assert [result["status"] for result in results] == ["created", "rejected"]
+    created = run(MongoOrderService.create_orders([dict(ORDER)] * 20))
+    assert len(created) == 20 and all(order["subtotal"] == 33.98 for order in created)
@@ -0,0 +1,64 @@
+import json
+import logging
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+
+import server
+
+ORDER = {
+    "items": [{"id": 1, "name": "Margherita Classic", "description": "", "price": 16.99, "image": "",
+               "category": "pizza", "quantity": 1}],
+    "customer_info": {"name": "Ada", "phone": "555-0100"},
+    "subtotal": 16.99, "tax": 1.49, "total": 18.48,
+}
+
+@pytest.fixture(scope="module")
+def client():
+    logging.disable(logging.INFO)
+    with TestClient(server.app) as client:
+        yield client
+    logging.disable(logging.NOTSET)
+
+@pytest.fixture
+def limits(monkeypatch):
+    monkeypatch.setattr(server, "MAX_BATCH_ORDERS", 3)
+    monkeypatch.setattr(server, "MAX_BATCH_BYTES", 4096)
+
+def ndjson(count: int) -> bytes:
+    return b"".join(json.dumps(ORDER).encode() + b"\n" for _ in range(count))
+
+def test_batch_within_limits_is_created(client, limits):
+    response = client.post("/api/orders/batch", content=ndjson(3), headers={"Content-Type": "application/x-ndjson"})
+    assert response.status_code == 200 and response.json()["created"] == 3
+
+def test_oversized_body_is_rejected_before_parsing(client, limits, monkeypatch):
+    monkeypatch.setattr(server, "parse_order_batch", pytest.fail)
+    body = json.dumps([ORDER] * 20).encode()
+    assert client.post("/api/orders/batch", content=body, headers={"Content-Type": "application/json"}).status_code == 413
+
+    def chunked():
+        yield body
+
+    # Without a Content-Length the limit is enforced while the body streams in
+    assert client.post("/api/orders/batch", content=chunked(), headers={"Content-Type": "application/json"}).status_code == 413
+
+def test_too_many_ndjson_orders_are_counted_before_parsing(client, limits, monkeypatch):
+    monkeypatch.setattr(server, "parse_order_batch", pytest.fail)
+    response = client.post("/api/orders/batch", content=ndjson(4), headers={"Content-Type": "application/x-ndjson"})
+    assert response.status_code == 413
+
+def test_batches_are_parsed_and_validated_off_the_event_loop(client, limits, monkeypatch):
+    threads = []
+    parse = server.parse_order_batch
+
+    def recording_parse(body, content_type):
+        threads.append(threading.current_thread().name)
+        return parse(body, content_type)
+
+    monkeypatch.setattr(server, "parse_order_batch", recording_parse)
+    response = client.post("/api/orders/batch", content=json.dumps([ORDER, {"items": []}]),
+                           headers={"Content-Type": "application/json"})
+    assert [result["status"] for result in response.json()["results"]] == ["created", "rejected"]
+    assert threads and threads[0].startswith("storage")
@@ -0,0 +1,98 @@
+import asyncio
+import json
+import logging
+
+import pytest
+from fastapi.testclient import TestClient
+
+import server
+from file_storage import FileStorage, JsonLinesBackend, OrderStatusConflict
+from order_events import order_events
+
+ORDER = {
+    "items": [{"id": 1, "name": "Margherita Classic", "description": "", "price": 16.99, "image": "",
+               "category": "pizza", "quantity": 1}],
+    "customer_info": {"name": "Ada", "phone": "555-0100"},
+    "subtotal": 16.99, "tax": 1.49, "total": 18.48,
+}
+
+@pytest.fixture(scope="module")
+def client():
+    logging.disable(logging.INFO)
+    with TestClient(server.app) as client:
+        yield client
+    logging.disable(logging.NOTSET)
+
+def patch(client, order_id: str, status: str):
+    return client.patch(f"/api/orders/{order_id}/status", json={"status": status})
+
+def events(body: str) -> list:
+    return [json.loads(line[len("data: "):])["status"] for line in body.splitlines() if line.startswith("data: ")]
+
+def test_orders_move_through_each_status_in_turn(client):
+    order_id = client.post("/api/orders", json=ORDER).json()["id"]
+    for status in ("preparing", "ready", "completed"):
+        response = patch(client, order_id, status)
+        assert response.status_code == 200 and response.json()["status"] == status
+    assert client.get(f"/api/orders/{order_id}").json()["status"] == "completed"
+
+@pytest.mark.parametrize("moves, status_code", [
+    (["ready"], 409),
+    (["preparing", "pending"], 409),
+    (["preparing", "preparing"], 409),
+    (["preparing", "ready", "completed", "pending"], 409),
+    (["shipped"], 400),
+])
+def test_other_moves_are_rejected(client, moves, status_code):
+    order_id = client.post("/api/orders", json=ORDER).json()["id"]
+    *allowed, rejected = moves
+    for status in allowed:
+        assert patch(client, order_id, status).status_code == 200
+    assert patch(client, order_id, rejected).status_code == status_code
+
+def test_unknown_order_is_not_found(client):
+    assert patch(client, "order_missing", "preparing").status_code == 404
+    assert client.get("/api/orders/order_missing/events").status_code == 404
+
+@pytest.fixture
+def backend(tmp_path):
+    return JsonLinesBackend(None, FileStorage(str(tmp_path)), fsync="never")
+
+def stored(order_id: str, created_at: str = "2026-03-02T12:00:00") -> dict:
+    return {"id": order_id, "status": "pending", "items": [], "customer_info": {}, "created_at": created_at}
+
+def test_update_from_a_stale_status_conflicts(backend):
+    backend.add_order(stored("a"))
+    assert backend.update_order_status("a", "pending", "preparing")["status"] == "preparing"
+    # Another worker read the order as pending before this one moved it on
+    with pytest.raises(OrderStatusConflict):
+        backend.update_order_status("a", "pending", "preparing")
+
+def test_archived_orders_cannot_change_status(backend):
+    backend.add_order(dict(stored("old", "2020-01-01T00:00:00"), status="ready"))
+    assert backend.compact("2021-01-01", "2021-01-01")["orders"] == 1
+    assert backend.get_order("old")["status"] == "ready"
+    with pytest.raises(OrderStatusConflict, match="archived"):
+        backend.update_order_status("old", "ready", "completed")
+    assert backend.update_order_status("missing", "ready", "completed") is None
+
+def test_stream_of_a_completed_order_sends_one_event_and_ends(client):
+    order_id = client.post("/api/orders", json=ORDER).json()["id"]
+    for status in ("preparing", "ready", "completed"):
+        patch(client, order_id, status)
+    response = client.get(f"/api/orders/{order_id}/events")
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert events(response.text) == ["completed"]
+
+def test_stream_delivers_each_status_change():
+    async def follow():
+        order = await server.order_service.create_order(dict(ORDER))
+        subscription = order_events.subscribe(order["id"])
+        stream = server.status_stream(subscription, order)
+        received = [await stream.__anext__()]
+        for status in ("preparing", "ready", "completed"):
+            await server.order_service.update_order_status(order["id"], status)
+        received.extend([chunk async for chunk in stream])
+        return received
+
+    assert events("".join(asyncio.run(follow()))) == ["pending", "preparing", "ready", "completed"]
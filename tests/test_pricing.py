@@ -0,0 +1,60 @@
+import pytest
+
+from menu_index import MenuIndex
+from pricing import MAX_ITEM_QUANTITY, TAX_RATE, PriceTable, PricingError, price_orders
+
+MENU = {
+    "pizza": [{"id": 1, "name": "Margherita", "description": "", "image": "", "category": "pizza", "price": 12.5}],
+    "chicken": [{"id": 7, "name": "Wings", "description": "", "image": "", "category": "chicken", "price": 9.99}],
+}
+
+def order(*lines, **totals) -> dict:
+    return dict({"order_type": "pickup", "items": [{"id": item_id, "quantity": quantity, "price": price}
+                                                    for item_id, quantity, price in lines]}, **totals)
+
+ORDERS = [
+    order((1, 2, 12.5), (7, 1, 9.99), total=round(34.99 * (1 + TAX_RATE), 2)),
+    order((7, 3, None), subtotal=1.0),
+    order((1, 1, 11.0)),
+    order((3, 1, 5.0), (7, 0, 9.99)),
+    order((10 ** 20, 1, 5.0)),
+    order(),
+]
+
+@pytest.fixture(scope="module")
+def index():
+    return MenuIndex(MENU)
+
+def test_single_orders_and_batches_price_alike(index):
+    scalar = PriceTable(index, vectorize_min=len(ORDERS) + 1).quote(ORDERS)
+    batch = PriceTable(index, vectorize_min=1).quote(ORDERS)
+    assert scalar == batch
+    assert [quote["errors"] for quote in scalar] == [
+        [],
+        ["subtotal should be 29.97"],
+        ["price of item 1 is 12.50"],
+        ["unknown menu item 3", "invalid quantity for item 7"],
+        [f"unknown menu item {10 ** 20}"],
+        ["order has no items"],
+    ]
+    assert scalar[0]["subtotal"] == 34.99
+    assert [(item["name"], item["quantity"]) for item in scalar[0]["items"]] == [("Margherita", 2), ("Wings", 1)]
+
+@pytest.mark.parametrize("copies", [1, 40])
+def test_item_ids_outside_int64_are_pricing_errors(index, copies):
+    with pytest.raises(PricingError, match="unknown menu item"):
+        price_orders(index, [order((10 ** 20, 1, 5.0))] * copies)
+
+def test_sparse_menu_ids_do_not_size_the_table(index):
+    table = PriceTable(MenuIndex({"pizza": [dict(MENU["pizza"][0], id=10 ** 15)], "chicken": []}), vectorize_min=1)
+    assert table.quote([order((10 ** 15, 1, 12.5))])[0]["errors"] == []
+    assert len(table._sorted_prices()[0]) == 2
+
+@pytest.mark.parametrize("quantity", [MAX_ITEM_QUANTITY + 1, 10 ** 16, 2 ** 62])
+def test_quantities_above_the_limit_are_rejected_by_both_paths(index, quantity):
+    subtotal = round(quantity * 12.5, 2)
+    orders = [order((1, quantity, 12.5), subtotal=subtotal)] * 2
+    scalar = PriceTable(index, vectorize_min=3).quote(orders)
+    batch = PriceTable(index, vectorize_min=1).quote(orders)
+    assert scalar == batch
+    assert scalar[0]["errors"] == ["invalid quantity for item 1"]
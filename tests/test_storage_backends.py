@@ -0,0 +1,98 @@
+import pytest
+
+from file_storage import FileStorage, JsonLinesBackend, OrderStatusConflict
+from sqlite_storage import SQLiteBackend
+
+def order(n: int, status: str = "pending", order_type: str = "pickup") -> dict:
+    return {
+        "id": f"order_{n:03d}",
+        "status": status,
+        "order_type": order_type,
+        "items": [{"id": 1, "quantity": 1, "price": 16.99}],
+        "customer_info": {"name": "Ada", "phone": f"(555) 01{n:02d}"},
+        "total": 18.35,
+        "created_at": f"2026-06-{n % 28 + 1:02d}T12:00:00",
+    }
+
+def message(n: int) -> dict:
+    return {"id": f"msg_{n:03d}", "name": "Ada", "message": "Hi", "created_at": f"2026-06-{n % 28 + 1:02d}T12:00:00"}
+
+@pytest.fixture(params=["file", "sqlite"])
+def backend(request, tmp_path):
+    if request.param == "sqlite":
+        backend = SQLiteBackend(None, str(tmp_path / "chickza.db"))
+    else:
+        backend = JsonLinesBackend(None, FileStorage(str(tmp_path)), fsync="never")
+    yield backend
+    backend.close()
+
+def pages(list_page, limit: int, **filters) -> list:
+    records, cursor = list_page(limit=limit, **filters)
+    while cursor is not None:
+        page, cursor = list_page(cursor=cursor, limit=limit, **filters)
+        records.extend(page)
+    return records
+
+def test_orders_round_trip(backend):
+    assert backend.add_order(order(1))
+    assert backend.add_orders([order(2), order(3)])
+    assert backend.get_order("order_002") == order(2)
+    assert backend.get_order("missing") is None
+
+def test_list_orders_follows_the_cursor(backend):
+    assert backend.add_orders([order(n) for n in range(25)])
+    first, cursor = backend.list_orders(limit=10)
+    assert len(first) == 10 and cursor is not None
+    records = pages(backend.list_orders, 10)
+    assert [record["id"] for record in records] == [order(n)["id"] for n in range(25)]
+    assert len({record["id"] for record in records}) == 25
+
+def test_list_orders_applies_the_filters(backend):
+    assert backend.add_orders([order(n, order_type="delivery" if n % 3 == 0 else "pickup") for n in range(12)])
+    delivery = pages(backend.list_orders, 2, order_type="delivery")
+    assert {record["id"] for record in delivery} == {order(n)["id"] for n in range(0, 12, 3)}
+    assert [record["id"] for record in backend.list_orders(phone="555-0105")[0]] == ["order_005"]
+    dated = backend.list_orders(created_from="2026-06-03", created_to="2026-06-05")[0]
+    assert {record["id"] for record in dated} == {"order_002", "order_003"}
+    assert {record["id"] for record in backend.iter_orders(order_type="delivery")} == {record["id"] for record in delivery}
+
+def test_status_updates_are_stored(backend):
+    assert backend.add_order(order(1))
+    updated = backend.update_order_status("order_001", "pending", "preparing")
+    assert updated["status"] == "preparing" and "updated_at" in updated
+    assert backend.get_order("order_001") == updated
+    assert [record["id"] for record in backend.list_orders(status="preparing")[0]] == ["order_001"]
+    assert backend.list_orders(status="pending")[0] == []
+    assert backend.update_order_status("missing", "pending", "preparing") is None
+
+def test_stale_status_update_conflicts(backend):
+    assert backend.add_order(order(1))
+    backend.update_order_status("order_001", "pending", "preparing")
+    with pytest.raises(OrderStatusConflict):
+        backend.update_order_status("order_001", "pending", "preparing")
+    assert backend.get_order("order_001")["status"] == "preparing"
+
+def test_order_snapshot_and_changes_cover_every_order(backend):
+    assert backend.add_orders([order(1), order(2)])
+    records, position = backend.order_snapshot()
+    assert {record["id"] for record in records} == {"order_001", "order_002"}
+
+    backend.add_order(order(3))
+    backend.update_order_status("order_001", "pending", "preparing")
+    changes = backend.order_changes(position)
+    if changes is None:
+        # Backends without a change feed are loaded again from a snapshot
+        records, position = backend.order_snapshot()
+        latest = {record["id"]: record["status"] for record in records}
+    else:
+        versions, position = changes
+        latest = {record["id"]: record["status"] for record in versions}
+        assert backend.order_changes(position) == ([], position)
+    assert {"order_001": "preparing", "order_003": "pending"}.items() <= latest.items()
+
+def test_messages_page_within_the_date_range(backend):
+    assert backend.add_message(message(0))
+    assert all(backend.add_message(message(n)) for n in range(1, 20))
+    records = pages(backend.list_messages, 4, created_from="2026-06-05", created_to="2026-06-15")
+    assert {record["id"] for record in records} == {message(n)["id"] for n in range(4, 14)}
+    assert [record["id"] for record in backend.iter_messages()] == [message(n)["id"] for n in range(20)]